@@ -5,4 +5,65 @@ load_dotenv()
 
 ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
 DEFAULT_SYMBOL = os.getenv("SYMBOL", "AAPL")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
\ No newline at end of file
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# Cliente HTTP de Alpha Vantage
+ALPHA_MAX_CONNECTIONS = int(os.getenv("ALPHA_MAX_CONNECTIONS", "20"))
+ALPHA_MAX_CONCURRENCY = int(os.getenv("ALPHA_MAX_CONCURRENCY", "10"))
+
+# Cuota de Alpha Vantage (plan gratuito por defecto) y espera máxima
+# de una petición de usuario antes de responder 429
+ALPHA_CALLS_PER_MINUTE = int(os.getenv("ALPHA_CALLS_PER_MINUTE", "5"))
+ALPHA_CALLS_PER_DAY = int(os.getenv("ALPHA_CALLS_PER_DAY", "25"))
+ALPHA_MAX_WAIT = float(os.getenv("ALPHA_MAX_WAIT", "10"))
+
+# Fracción de cada cuota reservada a peticiones de usuario: los
+# refrescos de fondo no pueden gastarla
+ALPHA_INTERACTIVE_RESERVE = float(os.getenv("ALPHA_INTERACTIVE_RESERVE", "0.2"))
+
+# Cache de datos de mercado (límite por símbolos y por memoria)
+MARKET_CACHE_MAX_ENTRIES = int(os.getenv("MARKET_CACHE_MAX_ENTRIES", "256"))
+MARKET_CACHE_MAX_BYTES = int(os.getenv("MARKET_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Almacén local (SQLite) del histórico OHLCV; vacío para desactivarlo
+MARKET_STORE_PATH = os.getenv("MARKET_STORE_PATH", "data/market.sqlite")
+
+# Últimas filas usadas para KPIs, indicadores y pronósticos (100 = lo que
+# trae outputsize=compact), aunque el almacén acumule más historia
+MARKET_ANALYSIS_ROWS = int(os.getenv("MARKET_ANALYSIS_ROWS", "100"))
+
+# Cache de pronósticos
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "128"))
+
+# Pool de procesos para ajustes de Prophet
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "2"))
+FORECAST_QUEUE_SIZE = int(os.getenv("FORECAST_QUEUE_SIZE", "8"))
+FORECAST_TIMEOUT = float(os.getenv("FORECAST_TIMEOUT", "60"))
+FORECAST_JOBS_MAX = int(os.getenv("FORECAST_JOBS_MAX", "256"))
+
+# Streaming SSE de datos de mercado
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "16"))
+STREAM_POLL_SECONDS = float(os.getenv("STREAM_POLL_SECONDS", "60"))
+
+# Refresh anticipado en segundo plano (watchlist separada por comas)
+REFRESH_WATCHLIST = [
+    symbol.strip()
+    for symbol in os.getenv("REFRESH_WATCHLIST", DEFAULT_SYMBOL).split(",")
+    if symbol.strip()
+]
+REFRESH_TOP_SYMBOLS = int(os.getenv("REFRESH_TOP_SYMBOLS", "5"))
+REFRESH_CALLS_PER_MINUTE = int(os.getenv("REFRESH_CALLS_PER_MINUTE", "2"))
+
+# Llamadas diarias del refresh: por defecto la mitad de la cuota diaria,
+# el resto queda para las peticiones de usuario
+REFRESH_CALLS_PER_DAY = int(os.getenv("REFRESH_CALLS_PER_DAY", str(ALPHA_CALLS_PER_DAY // 2)))
+
+# Cache de búsquedas de símbolos
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+
+# Listado local de símbolos (CSV de LISTING_STATUS) para buscar sin Alpha
+SYMBOL_LISTING_PATH = os.getenv("SYMBOL_LISTING_PATH", "data/listing_status.csv")
+
+# Llamadas a Gemini (insights de KPIs)
+INSIGHT_MAX_CONCURRENCY = int(os.getenv("INSIGHT_MAX_CONCURRENCY", "4"))
+INSIGHT_TIMEOUT = float(os.getenv("INSIGHT_TIMEOUT", "20"))
@@ -0,0 +1,115 @@
+import asyncio
+import math
+import httpx
+from app.config.config import (
+    ALPHA_API_KEY,
+    ALPHA_CALLS_PER_DAY,
+    ALPHA_CALLS_PER_MINUTE,
+    ALPHA_INTERACTIVE_RESERVE,
+    ALPHA_MAX_CONCURRENCY,
+    ALPHA_MAX_CONNECTIONS,
+    ALPHA_MAX_WAIT
+)
+from app.core.rate_limit import INTERACTIVE, RateLimiter, RateLimitedError, TokenBucket
+
+
+ALPHA_URL = "https://www.alphavantage.co/query"
+ALPHA_TIMEOUT = 15
+
+# Cliente compartido: pool de conexiones con keep-alive
+_client: httpx.AsyncClient | None = None
+
+# Límite de peticiones simultáneas hacia Alpha
+_semaphore: asyncio.Semaphore | None = None
+
+# Cuota por minuto y por día compartida por todas las llamadas
+_limiter: RateLimiter | None = None
+
+# Alpha responde 200 con este aviso cuando se agota la cuota
+RATE_LIMIT_RETRY_SECONDS = 60
+
+
+def get_client():
+
+    global _client
+
+    if _client is None or _client.is_closed:
+
+        _client = httpx.AsyncClient(
+            timeout=ALPHA_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=ALPHA_MAX_CONNECTIONS,
+                max_keepalive_connections=ALPHA_MAX_CONNECTIONS,
+                keepalive_expiry=30
+            )
+        )
+
+    return _client
+
+
+def _get_semaphore():
+
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(ALPHA_MAX_CONCURRENCY)
+
+    return _semaphore
+
+
+def get_limiter():
+
+    global _limiter
+
+    if _limiter is None:
+        _limiter = RateLimiter([
+            TokenBucket(
+                ALPHA_CALLS_PER_MINUTE / 60,
+                ALPHA_CALLS_PER_MINUTE,
+                reserve=math.ceil(ALPHA_CALLS_PER_MINUTE * ALPHA_INTERACTIVE_RESERVE)
+            ),
+            TokenBucket(
+                ALPHA_CALLS_PER_DAY / 86400,
+                ALPHA_CALLS_PER_DAY,
+                reserve=math.ceil(ALPHA_CALLS_PER_DAY * ALPHA_INTERACTIVE_RESERVE)
+            )
+        ])
+
+    return _limiter
+
+
+def _is_rate_limited(data: dict):
+
+    notice = data.get("Note") or data.get("Information") or ""
+
+    return "rate limit" in notice.lower() or "call frequency" in notice.lower()
+
+
+async def alpha_get(params: dict, priority: int = INTERACTIVE, timeout: float | None = ALPHA_MAX_WAIT):
+
+    query = {
+        **params,
+        "apikey": ALPHA_API_KEY
+    }
+
+    # Esperar cupo hasta timeout; si no alcanza, RateLimitedError (429)
+    await get_limiter().acquire(priority, timeout)
+
+    async with _get_semaphore():
+        r = await get_client().get(ALPHA_URL, params=query)
+
+    data = r.json()
+
+    if _is_rate_limited(data):
+        raise RateLimitedError(RATE_LIMIT_RETRY_SECONDS)
+
+    return data
+
+
+async def close_client():
+
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,111 @@
+from collections import OrderedDict
+
+
+class LRUCache:
+
+    # Cache acotado por número de entradas y por bytes aproximados,
+    # con expulsión LRU y contadores de hits/misses/evictions.
+    # La vigencia (TTL) la decide quien lo usa, como con el dict anterior.
+
+    def __init__(self, max_entries: int, max_bytes: int | None = None, sizeof=None):
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._sizeof = sizeof or (lambda value: 0)
+
+        self._data = OrderedDict()
+        self._sizes = {}
+
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+
+        if key not in self._data:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._data.move_to_end(key)
+
+        return self._data[key]
+
+    def peek(self, key, default=None):
+
+        # Lectura sin contar hit/miss ni cambiar el orden LRU
+        return self._data.get(key, default)
+
+    def __getitem__(self, key):
+
+        value = self.get(key, _MISSING)
+
+        if value is _MISSING:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key, value):
+
+        if key in self._data:
+            self._remove(key)
+
+        size = self._sizeof(value)
+
+        self._data[key] = value
+        self._sizes[key] = size
+        self.bytes += size
+
+        self._evict()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def pop(self, key, default=None):
+
+        if key not in self._data:
+            return default
+
+        return self._remove(key)
+
+    def clear(self):
+
+        self._data.clear()
+        self._sizes.clear()
+        self.bytes = 0
+
+    def stats(self):
+
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+    def _remove(self, key):
+
+        self.bytes -= self._sizes.pop(key)
+
+        return self._data.pop(key)
+
+    def _evict(self):
+
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+
+            self._remove(oldest)
+            self.evictions += 1
+
+
+_MISSING = object()
@@ -1,19 +1,81 @@
+import hashlib
+import time
+import numpy as np
+import pandas as pd
 from prophet import Prophet
+from app.config.config import FORECAST_CACHE_MAX_ENTRIES
+from app.core.cache import LRUCache
 
 
-def run_forecast(df, periods=30):
+# Cache de pronósticos por (símbolo, huella de la serie, motor)
+FORECAST_CACHE_SECONDS = 60 * 60
 
-    data = df.reset_index()
+_forecast_cache = LRUCache(
+    max_entries=FORECAST_CACHE_MAX_ENTRIES,
+    sizeof=lambda entry: int(entry["data"].memory_usage(index=True, deep=True).sum())
+)
 
-    data = data[["index", "4. close"]]
-    data.columns = ["ds", "y"]
 
-    model = Prophet(
+# Motores de pronóstico
+PROPHET_ENGINE = "prophet"
+FAST_ENGINE = "fast"
+
+# Motor rápido: tendencia lineal + estacionalidad semanal (ridge)
+FAST_WEEKLY_ORDER = 3
+FAST_RIDGE_ALPHA = 1e-3
+
+# Intervalo del 80%, el mismo ancho por defecto de Prophet
+INTERVAL_Z = 1.2816
+
+# Warm start: parámetros del último ajuste por símbolo
+WARM_START_MAX_NEW_ROWS = 10
+WARM_START_MAX_LEVEL_CHANGE = 0.2
+
+_warm_starts = LRUCache(max_entries=FORECAST_CACHE_MAX_ENTRIES)
+
+
+def _new_model():
+
+    return Prophet(
         weekly_seasonality=True,
         yearly_seasonality=True
     )
 
-    model.fit(data)
+
+def _fit_params(model):
+
+    # Formato de init de Stan: escalares y vectores del ajuste MAP
+    params = model.params
+
+    return {
+        "k": float(params["k"][0][0]),
+        "m": float(params["m"][0][0]),
+        "sigma_obs": float(params["sigma_obs"][0][0]),
+        "delta": params["delta"][0],
+        "beta": params["beta"][0]
+    }
+
+
+def run_forecast(df, periods=30, init=None):
+
+    data = df.reset_index()
+
+    data = data[["index", "4. close"]]
+    data.columns = ["ds", "y"]
+
+    model = _new_model()
+
+    if init is None:
+        model.fit(data)
+
+    else:
+        try:
+            model.fit(data, init=init)
+
+        except Exception:
+            # Parámetros incompatibles con la serie: ajuste en frío
+            model = _new_model()
+            model.fit(data)
 
     future = model.make_future_dataframe(
         periods=periods,
@@ -22,6 +84,174 @@ def run_forecast(df, periods=30):
 
     forecast = model.predict(future)
 
-    return forecast[
+    result = forecast[
         ["ds", "yhat", "yhat_upper", "yhat_lower"]
     ]
+
+    # Viaja con el resultado (también desde el pool de procesos)
+    result.attrs["prophet_params"] = _fit_params(model)
+
+    return result
+
+
+def _fast_features(days: np.ndarray, t_scale: float):
+
+    t = days / t_scale
+    angle = 2 * np.pi * days / 7
+
+    columns = [np.ones_like(t), t]
+
+    for k in range(1, FAST_WEEKLY_ORDER + 1):
+        columns += [np.sin(k * angle), np.cos(k * angle)]
+
+    return np.column_stack(columns)
+
+
+def run_fast_forecast(df, periods=30):
+
+    close = df["4. close"].dropna()
+
+    history = pd.DatetimeIndex(close.index)
+
+    future = pd.date_range(
+        history[-1] + pd.Timedelta(days=1),
+        periods=periods,
+        freq="D"
+    )
+
+    ds = history.append(future)
+
+    days = ((ds - history[0]) / pd.Timedelta(days=1)).to_numpy(dtype=float)
+
+    X = _fast_features(days, max(days[len(history) - 1], 1.0))
+    X_history = X[:len(history)]
+
+    y = close.to_numpy(dtype=float)
+
+    # Ridge en forma cerrada (sin penalizar el intercepto)
+    penalty = FAST_RIDGE_ALPHA * np.eye(X.shape[1])
+    penalty[0, 0] = 0
+
+    gram_inv = np.linalg.pinv(X_history.T @ X_history + penalty)
+    beta = gram_inv @ (X_history.T @ y)
+
+    yhat = X @ beta
+
+    residuals = y - yhat[:len(history)]
+    dof = max(len(history) - X.shape[1], 1)
+    sigma = np.sqrt(residuals @ residuals / dof)
+
+    # Intervalo de predicción: crece al extrapolar lejos de los datos
+    leverage = np.einsum("ij,jk,ik->i", X, gram_inv, X)
+    half_width = INTERVAL_Z * sigma * np.sqrt(1 + leverage)
+
+    return pd.DataFrame({
+        "ds": ds,
+        "yhat": yhat,
+        "yhat_upper": yhat + half_width,
+        "yhat_lower": yhat - half_width
+    })
+
+
+def remember_fit(symbol: str, df: pd.DataFrame, result: pd.DataFrame):
+
+    params = result.attrs.get("prophet_params")
+
+    if params is None:
+        return
+
+    close = df["4. close"]
+
+    _warm_starts[symbol] = {
+        "params": params,
+        "last_date": close.index[-1],
+        "last_close": float(close.iloc[-1]),
+        "level": float(close.abs().max())
+    }
+
+
+def warm_start_init(symbol: str, df: pd.DataFrame):
+
+    state = _warm_starts.get(symbol)
+
+    if state is None:
+        return None
+
+    close = df["4. close"]
+
+    # Demasiados días nuevos: el ajuste anterior ya no es buen punto de partida
+    new_rows = int((close.index > state["last_date"]).sum())
+
+    if new_rows > WARM_START_MAX_NEW_ROWS:
+        return None
+
+    # La serie anterior debe seguir igual (sin splits ni correcciones grandes)
+    if state["last_date"] not in close.index:
+        return None
+
+    previous = float(close.loc[state["last_date"]])
+
+    if abs(previous / state["last_close"] - 1) > WARM_START_MAX_LEVEL_CHANGE:
+        return None
+
+    # Prophet escala y por su máximo: con otra escala los parámetros no sirven
+    if abs(float(close.abs().max()) / state["level"] - 1) > WARM_START_MAX_LEVEL_CHANGE:
+        return None
+
+    return state["params"]
+
+
+def series_fingerprint(close: pd.Series):
+
+    hashed = pd.util.hash_pandas_object(close, index=True).values
+
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def _get_entry(symbol: str, fingerprint: str, engine: str):
+
+    entry = _forecast_cache.get((symbol, fingerprint, engine))
+
+    if entry and time.time() - entry["time"] < FORECAST_CACHE_SECONDS:
+        return entry
+
+    return None
+
+
+def get_cached_forecast(symbol: str, fingerprint: str, periods: int, engine: str = PROPHET_ENGINE):
+
+    entry = _get_entry(symbol, fingerprint, engine)
+
+    if entry is None or entry["periods"] < periods:
+        return None
+
+    result = entry["data"]
+
+    # Un horizonte más largo sirve a uno más corto: el ajuste no depende
+    # de periods, solo sobran las últimas filas futuras
+    extra = entry["periods"] - periods
+
+    if extra:
+        result = result.iloc[:len(result) - extra]
+
+    return result
+
+
+def store_forecast(symbol: str, fingerprint: str, periods: int, result: pd.DataFrame, engine: str = PROPHET_ENGINE):
+
+    entry = _get_entry(symbol, fingerprint, engine)
+
+    # Conservar siempre el horizonte más largo
+    if entry and entry["periods"] >= periods:
+        return
+
+    _forecast_cache[(symbol, fingerprint, engine)] = {
+        "data": result,
+        "periods": periods,
+        "time": time.time()
+    }
+
+
+def forecast_cache_stats():
+
+    return _forecast_cache.stats()
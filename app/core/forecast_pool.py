@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.config.config import (
+    FORECAST_QUEUE_SIZE,
+    FORECAST_TIMEOUT,
+    FORECAST_WORKERS
+)
+
+
+class PoolSaturatedError(Exception):
+    pass
+
+
+class ForecastTimeoutError(Exception):
+    pass
+
+
+# Segundos sugeridos al cliente cuando el pool está lleno
+RETRY_AFTER_SECONDS = 5
+
+_executor = None
+
+# Trabajos en ejecución o en cola (se liberan al terminar en el worker)
+_pending = 0
+_pending_lock = threading.Lock()
+
+_rejected = 0
+
+
+def _get_executor():
+
+    global _executor
+
+    if _executor is None:
+
+        # spawn: los workers no heredan hilos ni el event loop del servidor
+        _executor = ProcessPoolExecutor(
+            max_workers=FORECAST_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    return _executor
+
+
+def _discard(executor):
+
+    global _executor
+
+    # Pool roto (ej: un worker murió por memoria): el siguiente
+    # submit crea uno nuevo en lugar de fallar para siempre
+    if _executor is executor:
+        _executor = None
+
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _release(_future):
+
+    global _pending
+
+    with _pending_lock:
+        _pending -= 1
+
+
+def _reserve():
+
+    global _pending, _rejected
+
+    with _pending_lock:
+
+        if _pending >= FORECAST_WORKERS + FORECAST_QUEUE_SIZE:
+            _rejected += 1
+            return False
+
+        _pending += 1
+        return True
+
+
+async def submit(fn, *args):
+
+    # Pool lleno: rechazar en vez de acumular trabajo
+    if not _reserve():
+        raise PoolSaturatedError("Forecast pool saturated")
+
+    executor = _get_executor()
+
+    try:
+        future = executor.submit(fn, *args)
+
+    except BaseException as exc:
+        _release(None)
+
+        if isinstance(exc, BrokenProcessPool):
+            _discard(executor)
+
+        raise
+
+    future.add_done_callback(_release)
+
+    try:
+        return await asyncio.wait_for(
+            asyncio.wrap_future(future),
+            FORECAST_TIMEOUT
+        )
+
+    except BrokenProcessPool:
+        _discard(executor)
+        raise
+
+    except asyncio.TimeoutError:
+        # Si seguía en cola se cancela; si ya corría, el worker lo termina
+        raise ForecastTimeoutError("Forecast timed out")
+
+
+def pool_stats():
+
+    return {
+        "workers": FORECAST_WORKERS,
+        "capacity": FORECAST_WORKERS + FORECAST_QUEUE_SIZE,
+        "pending": _pending,
+        "rejected": _rejected
+    }
+
+
+def shutdown():
+
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
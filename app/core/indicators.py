@@ -0,0 +1,191 @@
+from functools import cached_property
+import numpy as np
+import pandas as pd
+
+
+# Días hábiles por año para anualizar Sharpe y Sortino
+TRADING_DAYS = 252
+
+
+class _Intermediates:
+
+    # Series intermedias calculadas una sola vez por petición
+    # y compartidas entre los indicadores que las usan
+
+    def __init__(self, df: pd.DataFrame):
+
+        self.df = df
+        self._emas = {}
+
+    def column(self, name: str):
+
+        if name not in self.df.columns:
+            raise ValueError(f"Missing column: {name}")
+
+        return self.df[name]
+
+    @cached_property
+    def close(self):
+        return self.column("4. close")
+
+    @cached_property
+    def prev_close(self):
+        return self.close.shift(1)
+
+    @cached_property
+    def delta(self):
+        return self.close - self.prev_close
+
+    @cached_property
+    def returns(self):
+        return (self.close / self.prev_close - 1).dropna()
+
+    @cached_property
+    def sma_20(self):
+        return self.close.rolling(20).mean()
+
+    @cached_property
+    def std_20(self):
+        return self.close.rolling(20).std(ddof=0)
+
+    @cached_property
+    def true_range(self):
+
+        high = self.column("2. high")
+        low = self.column("3. low")
+
+        return pd.concat([
+            high - low,
+            (high - self.prev_close).abs(),
+            (low - self.prev_close).abs()
+        ], axis=1).max(axis=1)
+
+    def ema(self, span: int):
+
+        if span not in self._emas:
+            self._emas[span] = self.close.ewm(span=span, adjust=False).mean()
+
+        return self._emas[span]
+
+    def wilder(self, series: pd.Series, period: int = 14):
+
+        # Suavizado de Wilder: EMA con alpha = 1 / period
+        return series.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()
+
+
+def _last(series: pd.Series):
+
+    return series.iloc[-1] if len(series) else np.nan
+
+
+def _macd(data: _Intermediates):
+
+    macd = data.ema(12) - data.ema(26)
+    signal = macd.ewm(span=9, adjust=False).mean()
+
+    return {
+        "macd": _last(macd),
+        "signal": _last(signal),
+        "histogram": _last(macd - signal)
+    }
+
+
+def _rsi_wilder(data: _Intermediates):
+
+    gain = data.wilder(data.delta.clip(lower=0))
+    loss = data.wilder(-data.delta.clip(upper=0))
+
+    rsi = 100 - (100 / (1 + gain / loss))
+
+    return {"rsi_14": _last(rsi)}
+
+
+def _bollinger(data: _Intermediates):
+
+    middle = _last(data.sma_20)
+    width = 2 * _last(data.std_20)
+
+    return {
+        "upper": middle + width,
+        "middle": middle,
+        "lower": middle - width
+    }
+
+
+def _atr(data: _Intermediates):
+
+    return {"atr_14": _last(data.wilder(data.true_range))}
+
+
+def _obv(data: _Intermediates):
+
+    volume = data.column("5. volume")
+
+    obv = (np.sign(data.delta.fillna(0)) * volume).cumsum()
+
+    return {"obv": _last(obv)}
+
+
+def _sharpe(data: _Intermediates):
+
+    returns = data.returns
+
+    ratio = returns.mean() / returns.std() * np.sqrt(TRADING_DAYS)
+
+    return {"sharpe": ratio}
+
+
+def _sortino(data: _Intermediates):
+
+    returns = data.returns
+
+    # Desviación solo de los rendimientos negativos (objetivo 0)
+    downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+
+    ratio = returns.mean() / downside * np.sqrt(TRADING_DAYS)
+
+    return {"sortino": ratio}
+
+
+INDICATORS = {
+    "macd": _macd,
+    "rsi_wilder": _rsi_wilder,
+    "bollinger": _bollinger,
+    "atr": _atr,
+    "obv": _obv,
+    "sharpe": _sharpe,
+    "sortino": _sortino
+}
+
+
+def _clean(value):
+
+    value = float(value)
+
+    # NaN/inf no son JSON válido
+    if not np.isfinite(value):
+        return None
+
+    return round(value, 2)
+
+
+def calculate_indicators(df: pd.DataFrame, names: list[str] | None = None):
+
+    names = names or list(INDICATORS)
+
+    unknown = [name for name in names if name not in INDICATORS]
+
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+
+    data = _Intermediates(df)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+
+        return {
+            name: {
+                key: _clean(value)
+                for key, value in INDICATORS[name](data).items()
+            }
+            for name in dict.fromkeys(names)
+        }
@@ -1,6 +1,7 @@
+import asyncio
 import time
 import google.generativeai as genai
-from app.config.config import GEMINI_API_KEY
+from app.config.config import GEMINI_API_KEY, INSIGHT_MAX_CONCURRENCY, INSIGHT_TIMEOUT
 
 
 genai.configure(api_key=GEMINI_API_KEY)
@@ -11,13 +12,62 @@ _ai_cache = {}
 
 CACHE_TTL = 60 * 60  # 1 hora
 
+# Límite de llamadas simultáneas a Gemini
+_semaphore: asyncio.Semaphore | None = None
+
+_stats = {"waiting": 0, "in_flight": 0, "timeouts": 0}
+
+
+class InsightTimeoutError(Exception):
+    pass
+
+
+def _get_semaphore():
+
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(INSIGHT_MAX_CONCURRENCY)
+
+    return _semaphore
+
 
 def _make_key(symbol: str, kpi: str, value: str):
 
     return f"{symbol}:{kpi}:{value}"
 
 
-def generate_kpi_insight(kpi_name: str, value: str, symbol: str):
+async def _generate(prompt: str):
+
+    _stats["waiting"] += 1
+
+    try:
+        await _get_semaphore().acquire()
+    finally:
+        _stats["waiting"] -= 1
+
+    _stats["in_flight"] += 1
+
+    try:
+        # API asíncrona: no ocupa un hilo del pool mientras Gemini responde
+        return await asyncio.wait_for(
+            model.generate_content_async(
+                prompt,
+                request_options={"timeout": INSIGHT_TIMEOUT}
+            ),
+            INSIGHT_TIMEOUT
+        )
+
+    except asyncio.TimeoutError:
+        _stats["timeouts"] += 1
+        raise InsightTimeoutError("Gemini timed out")
+
+    finally:
+        _stats["in_flight"] -= 1
+        _get_semaphore().release()
+
+
+async def generate_kpi_insight(kpi_name: str, value: str, symbol: str):
 
     now = time.time()
 
@@ -45,7 +95,7 @@ def generate_kpi_insight(kpi_name: str, value: str, symbol: str):
     Use max 3 short sentences.
     """
 
-    response = model.generate_content(prompt)
+    response = await _generate(prompt)
 
     text = response.text.strip()
 
@@ -54,4 +104,12 @@ def generate_kpi_insight(kpi_name: str, value: str, symbol: str):
         "time": now
     }
 
-    return text
\ No newline at end of file
+    return text
+
+
+def insight_stats():
+
+    return {
+        **_stats,
+        "cache_entries": len(_ai_cache)
+    }
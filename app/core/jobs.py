@@ -0,0 +1,83 @@
+import asyncio
+import time
+import uuid
+from app.core.cache import LRUCache
+
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobStore:
+
+    # Trabajos en segundo plano con resultado guardado en un LRU acotado.
+    # Un trabajo con la misma clave que otro pendiente o terminado
+    # devuelve el existente en lugar de repetir el cálculo.
+
+    def __init__(self, max_jobs: int):
+
+        self._jobs = LRUCache(max_entries=max_jobs)
+        self._by_key = LRUCache(max_entries=max_jobs)
+
+    def submit(self, key, work):
+
+        job = self._find(key)
+
+        if job is not None and job["status"] != FAILED:
+            return job
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "key": key,
+            "status": PENDING,
+            "result": None,
+            "error": None,
+            "error_type": None,
+            "created": time.time()
+        }
+
+        # Referencia al task para que no lo recolecte el GC
+        job["task"] = asyncio.create_task(self._run(job, work))
+
+        self._jobs[job["id"]] = job
+        self._by_key[key] = job["id"]
+
+        return job
+
+    def get(self, job_id: str):
+
+        return self._jobs.get(job_id)
+
+    def clear(self):
+
+        self._jobs.clear()
+        self._by_key.clear()
+
+    def stats(self):
+
+        return self._jobs.stats()
+
+    def _find(self, key):
+
+        job_id = self._by_key.get(key)
+
+        if job_id is None:
+            return None
+
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: dict, work):
+
+        try:
+            job["result"] = await work()
+            job["status"] = DONE
+
+        except Exception as e:
+            # El tipo permite responder 503/504 en lugar de 500
+            job["error"] = str(e) or type(e).__name__
+            job["error_type"] = type(e).__name__
+            job["status"] = FAILED
+
+        finally:
+            job["task"] = None
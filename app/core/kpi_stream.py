@@ -0,0 +1,386 @@
+import copy
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from app.config.config import MARKET_CACHE_MAX_ENTRIES
+from app.core.cache import LRUCache
+from app.core.kpis import _scan
+
+
+class _RollingMean:
+
+    # Media móvil con suma acumulada: O(1) por dato.
+    # Igual que pandas rolling(window): NaN si falta algún dato en la ventana
+
+    def __init__(self, window: int):
+
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+
+    @classmethod
+    def from_values(cls, window: int, values: np.ndarray):
+
+        # Solo importa la última ventana: sin recorrer la serie completa
+        rolling = cls(window)
+
+        tail = values[-window:]
+        missing = np.isnan(tail)
+
+        rolling.values = deque(tail.tolist())
+        rolling.total = float(tail[~missing].sum())
+        rolling.nans = int(missing.sum())
+
+        return rolling
+
+    def copy(self):
+
+        rolling = copy.copy(self)
+        rolling.values = self.values.copy()
+
+        return rolling
+
+    def push(self, value: float):
+
+        self.values.append(value)
+
+        if math.isnan(value):
+            self.nans += 1
+        else:
+            self.total += value
+
+        if len(self.values) > self.window:
+
+            old = self.values.popleft()
+
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+
+    def mean(self):
+
+        if len(self.values) < self.window or self.nans:
+            return math.nan
+
+        return self.total / self.window
+
+
+# Barras mínimas que deben quedar al desplazar la ventana: la barra que
+# sale no puede estar en ma_50 ni en el RSI (14 diferencias)
+_MIN_SLIDING_ROWS = 51
+
+
+class KPIAccumulator:
+
+    # KPIs de calculate_kpis actualizados barra a barra:
+    # medias móviles y RSI con sumas acumuladas, drawdown con máximo
+    # acumulado y media/varianza de rendimientos con Welford.
+    # Admite ventanas que se desplazan (compact de Alpha, ventana de
+    # análisis): la barra más vieja sale restándola de las sumas
+
+    def __init__(self):
+
+        self.first_date = None
+        self.last_date = None
+        self.last_close = math.nan
+
+        # Precios de la ventana (para sacar la barra más vieja)
+        self.closes = deque()
+
+        # Welford sobre rendimientos diarios
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+        self.ma_20 = _RollingMean(20)
+        self.ma_50 = _RollingMean(50)
+
+        self.gain_14 = _RollingMean(14)
+        self.loss_14 = _RollingMean(14)
+
+        self.running_max = math.nan
+        self.max_drawdown = math.nan
+
+        # Estado antes de la última barra (Alpha puede corregirla)
+        self._before_last = None
+
+    @classmethod
+    def from_series(cls, close: pd.Series):
+
+        if close.empty:
+            return cls()
+
+        # Todo menos la última barra con el kernel vectorizado de
+        # calculate_kpis; la última con push para guardar el checkpoint
+        accumulator = cls._from_values(close.index[:-1], close.to_numpy(dtype=float)[:-1])
+        accumulator._push_many(close.iloc[-1:])
+
+        return accumulator
+
+    @classmethod
+    def _from_values(cls, index: pd.Index, values: np.ndarray):
+
+        accumulator = cls()
+
+        if len(values) == 0:
+            return accumulator
+
+        accumulator.count, accumulator.mean, accumulator.m2, max_drawdown = _scan(values)
+
+        accumulator.count = int(accumulator.count)
+        accumulator.mean = float(accumulator.mean)
+        accumulator.m2 = float(accumulator.m2)
+        accumulator.max_drawdown = float(max_drawdown)
+
+        # fmax ignora NaN; solo NaN si no hay ningún precio
+        accumulator.running_max = float(np.fmax.reduce(values))
+
+        accumulator.ma_20 = _RollingMean.from_values(20, values)
+        accumulator.ma_50 = _RollingMean.from_values(50, values)
+
+        # RSI: diff() con NaN cuenta como 0, la primera barra también
+        delta = np.zeros_like(values)
+        delta[1:] = np.nan_to_num(np.diff(values), nan=0.0)
+
+        accumulator.gain_14 = _RollingMean.from_values(14, np.maximum(delta, 0.0))
+        accumulator.loss_14 = _RollingMean.from_values(14, np.maximum(-delta, 0.0))
+
+        accumulator.first_date = index[0]
+        accumulator.last_date = index[-1]
+        accumulator.last_close = float(values[-1])
+        accumulator.closes = deque(values.tolist())
+
+        return accumulator
+
+    def push(self, date, close: float):
+
+        previous = self.last_close
+
+        # Rendimiento (pct_change): requiere ambos precios
+        if not math.isnan(previous) and not math.isnan(close):
+
+            value = close / previous - 1
+
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+
+        self.ma_20.push(close)
+        self.ma_50.push(close)
+
+        # RSI: diff() con NaN cuenta como 0 en ganancias y pérdidas
+        change = close - previous
+
+        if math.isnan(change):
+            change = 0.0
+
+        self.gain_14.push(max(change, 0.0))
+        self.loss_14.push(max(-change, 0.0))
+
+        # Drawdown sobre el máximo acumulado
+        if not math.isnan(close):
+
+            if math.isnan(self.running_max) or close > self.running_max:
+                self.running_max = close
+
+            drawdown = (close - self.running_max) / self.running_max
+
+            if math.isnan(self.max_drawdown) or drawdown < self.max_drawdown:
+                self.max_drawdown = drawdown
+
+        if self.first_date is None:
+            self.first_date = date
+
+        self.last_date = date
+        self.last_close = close
+        self.closes.append(close)
+
+    def extend(self, close: pd.Series):
+
+        # Solo se procesan las barras nuevas y se sacan las que dejaron la
+        # ventana. Si la serie empieza antes, no contiene la última barra
+        # conocida o queda muy corta se devuelve False para reconstruir
+        # (las barras intermedias no se revisan)
+        index = close.index
+
+        try:
+            last = index.get_loc(self.last_date)
+        except KeyError:
+            return False
+
+        if index[0] < self.first_date:
+            return False
+
+        # Barras conocidas que siguen en la serie; el resto salió de la ventana
+        kept = last + 1
+        dropped = len(self.closes) - kept
+
+        if dropped < 0 or (dropped == 0) != (index[0] == self.first_date):
+            return False
+
+        # Las ventanas de 50 y 14 barras deben quedar completas
+        if dropped and kept <= _MIN_SLIDING_ROWS:
+            return False
+
+        values = close.to_numpy(dtype=float)
+
+        if not _same(float(values[last]), self.last_close):
+
+            # Última barra corregida: volver al estado anterior a ella
+            before = self._before_last
+
+            if (
+                before is None
+                or last == 0
+                or index[last - 1] != before.last_date
+                or not _same(float(values[last - 1]), before.last_close)
+            ):
+                return False
+
+            self.__dict__.update(before._checkpoint().__dict__)
+
+            last -= 1
+
+        for _ in range(dropped):
+            self._drop_first()
+
+        self.first_date = index[0]
+
+        self._push_many(close.iloc[last + 1:])
+
+        return True
+
+    def _drop_first(self):
+
+        # Medias móviles y RSI no cambian: con más de 50 barras la que
+        # sale ya no está en ninguna de sus ventanas
+        first = self.closes.popleft()
+        second = self.closes[0]
+
+        # Rendimiento que sale de la ventana: Welford inverso
+        if not math.isnan(first) and not math.isnan(second):
+
+            value = second / first - 1
+
+            self.count -= 1
+
+            if self.count == 0:
+                self.mean = 0.0
+                self.m2 = 0.0
+
+            else:
+                previous_mean = self.mean
+
+                self.mean = (previous_mean * (self.count + 1) - value) / self.count
+                self.m2 = max(0.0, self.m2 - (value - self.mean) * (value - previous_mean))
+
+        # Si la barra que sale no superaba a la siguiente, los máximos
+        # acumulados de las demás no cambian (caso común): O(1). Si no,
+        # se recalcula el drawdown sobre la ventana
+        if math.isnan(first) or math.isnan(second) or first > second:
+
+            values = np.array(self.closes)
+
+            running_max = np.fmax.accumulate(values)
+            drawdown = (values - running_max) / running_max
+            drawdown = drawdown[~np.isnan(drawdown)]
+
+            self.running_max = float(running_max[-1])
+            self.max_drawdown = float(drawdown.min()) if len(drawdown) else math.nan
+
+    def kpis(self):
+
+        volatility = (
+            math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+        )
+
+        daily_return = self.mean if self.count else math.nan
+
+        ma_50 = self.ma_50.mean()
+
+        trend = "bullish" if self.last_close > ma_50 else "bearish"
+
+        return {
+            "last_price": round(self.last_close, 2),
+
+            "daily_return_pct": round(daily_return * 100, 2),
+            "volatility_pct": round(volatility * 100, 2),
+
+            "ma_20": round(self.ma_20.mean(), 2),
+            "ma_50": round(ma_50, 2),
+
+            "rsi_14": round(self._rsi(), 2),
+
+            "max_drawdown_pct": round(self.max_drawdown * 100, 2),
+
+            "trend": trend
+        }
+
+    def _rsi(self):
+
+        avg_gain = self.gain_14.mean()
+        avg_loss = self.loss_14.mean()
+
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return math.nan
+
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else math.nan
+
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def _push_many(self, close: pd.Series):
+
+        values = close.to_numpy(dtype=float)
+
+        for i, (date, value) in enumerate(zip(close.index, values)):
+
+            if i == len(values) - 1:
+                self._before_last = self._checkpoint()
+
+            self.push(date, float(value))
+
+    def _checkpoint(self):
+
+        # Copias superficiales: los valores guardados son inmutables
+        state = copy.copy(self)
+
+        state.closes = self.closes.copy()
+
+        state.ma_20 = self.ma_20.copy()
+        state.ma_50 = self.ma_50.copy()
+        state.gain_14 = self.gain_14.copy()
+        state.loss_14 = self.loss_14.copy()
+
+        state._before_last = None
+
+        return state
+
+
+def _same(a: float, b: float):
+
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+# Acumuladores por símbolo
+_accumulators = LRUCache(max_entries=MARKET_CACHE_MAX_ENTRIES)
+
+
+def get_streaming_kpis(symbol: str, df: pd.DataFrame):
+
+    close = df["4. close"]
+
+    accumulator = _accumulators.get(symbol)
+
+    if accumulator is None or not accumulator.extend(close):
+
+        # Primera vez o historia distinta: se reconstruye una sola vez
+        accumulator = KPIAccumulator.from_series(close)
+
+        _accumulators[symbol] = accumulator
+
+    return accumulator.kpis()
@@ -1,74 +1,176 @@
+import numpy as np
 import pandas as pd
 
 
-def calculate_kpis(df: pd.DataFrame):
+try:
+    from numba import njit
+except ImportError:  # Numba es opcional
+    njit = None
+
+
+def _scan_loop(close):
+
+    # Un solo recorrido: media/varianza de rendimientos (Welford)
+    # y máximo drawdown sobre el máximo acumulado
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+
+    running_max = np.nan
+    max_drawdown = np.nan
+
+    for i in range(len(close)):
+
+        price = close[i]
+
+        if i > 0 and not np.isnan(price) and not np.isnan(close[i - 1]):
+
+            value = price / close[i - 1] - 1
+
+            count += 1
+            delta = value - mean
+            mean += delta / count
+            m2 += delta * (value - mean)
+
+        if not np.isnan(price):
+
+            if np.isnan(running_max) or price > running_max:
+                running_max = price
+
+            drawdown = (price - running_max) / running_max
+
+            if np.isnan(max_drawdown) or drawdown < max_drawdown:
+                max_drawdown = drawdown
+
+    return count, mean, m2, max_drawdown
+
+
+def _scan_numpy(close):
+
+    returns = close[1:] / close[:-1] - 1
+    returns = returns[~np.isnan(returns)]
+
+    count = len(returns)
+    mean = returns.mean() if count else 0.0
+    m2 = ((returns - mean) ** 2).sum()
+
+    # fmax ignora NaN: máximo acumulado como cummax de pandas
+    running_max = np.fmax.accumulate(close)
+    drawdown = (close - running_max) / running_max
+    drawdown = drawdown[~np.isnan(drawdown)]
+
+    max_drawdown = drawdown.min() if len(drawdown) else np.nan
+
+    return count, mean, m2, max_drawdown
+
+
+# Con Numba el recorrido se compila; sin Numba se usa NumPy vectorizado
+_scan = njit(cache=True)(_scan_loop) if njit else _scan_numpy
 
-    close = df["4. close"]
+
+def _last_window_mean(values, window: int):
+
+    # Solo interesa la última ventana: igual que rolling(window).mean().iloc[-1]
+    if len(values) < window:
+        return np.nan
+
+    return values[-window:].mean()
+
+
+def _kpi_kernel(close):
 
     # ==========================
-    # Rendimientos
+    # Rendimientos y drawdown
     # ==========================
 
-    returns = close.pct_change().dropna()
+    count, mean, m2, max_drawdown = _scan(close)
 
-    daily_return = returns.mean() * 100
-    volatility = returns.std() * 100
+    daily_return = mean * 100 if count else np.nan
+    volatility = np.sqrt(m2 / (count - 1)) * 100 if count > 1 else np.nan
 
     # ==========================
     # Moving Averages
     # ==========================
 
-    ma_20 = close.rolling(20).mean().iloc[-1]
-    ma_50 = close.rolling(50).mean().iloc[-1]
+    ma_20 = _last_window_mean(close, 20)
+    ma_50 = _last_window_mean(close, 50)
 
     # ==========================
     # RSI (14)
     # ==========================
 
-    delta = close.diff()
+    # diff() con NaN cuenta como 0, igual que delta.where(...)
+    delta = np.empty_like(close)
+    delta[0] = 0.0
+    delta[1:] = np.nan_to_num(np.diff(close), nan=0.0)
 
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
+    avg_gain = _last_window_mean(np.maximum(delta, 0.0), 14)
+    avg_loss = _last_window_mean(np.maximum(-delta, 0.0), 14)
 
-    avg_gain = gain.rolling(14).mean()
-    avg_loss = loss.rolling(14).mean()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = np.float64(avg_gain) / np.float64(avg_loss)
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
+    rsi_value = 100 - (100 / (1 + rs))
 
-    rsi_value = rsi.iloc[-1]
+    return {
+        "last_price": close[-1],
+        "daily_return_pct": daily_return,
+        "volatility_pct": volatility,
+        "ma_20": ma_20,
+        "ma_50": ma_50,
+        "rsi_14": rsi_value,
+        "max_drawdown_pct": max_drawdown * 100
+    }
 
-    # ==========================
-    # Drawdown
-    # ==========================
 
-    rolling_max = close.cummax()
-    drawdown = (close - rolling_max) / rolling_max
+def _kpis_from_close(close):
 
-    max_drawdown = drawdown.min() * 100
+    values = _kpi_kernel(close)
 
     # ==========================
     # Trend
     # ==========================
 
-    trend = "bullish" if close.iloc[-1] > ma_50 else "bearish"
+    trend = "bullish" if values["last_price"] > values["ma_50"] else "bearish"
 
     # ==========================
     # Resultado
     # ==========================
 
-    return {
-        "last_price": round(close.iloc[-1], 2),
+    result = {
+        key: round(np.float64(value), 2)
+        for key, value in values.items()
+    }
 
-        "daily_return_pct": round(daily_return, 2),
-        "volatility_pct": round(volatility, 2),
+    result["trend"] = trend
 
-        "ma_20": round(ma_20, 2),
-        "ma_50": round(ma_50, 2),
+    return result
 
-        "rsi_14": round(rsi_value, 2),
 
-        "max_drawdown_pct": round(max_drawdown, 2),
+def calculate_kpis(df: pd.DataFrame):
 
-        "trend": trend
-    }
+    return _kpis_from_close(df["4. close"].to_numpy(dtype=float))
+
+
+def _finite(value):
+
+    # NaN/inf (ej: ma_50 con menos de 50 filas) no son JSON válido
+    return float(value) if np.isfinite(value) else None
+
+
+def calculate_kpis_batch(closes: dict):
+
+    # Mismo kernel que calculate_kpis, sin DataFrame por símbolo ni
+    # matriz ancha: cada serie se recorre una vez con su propio largo
+    result = {}
+
+    for symbol, close in closes.items():
+
+        kpis = _kpis_from_close(close.to_numpy(dtype=float))
+
+        result[symbol] = {
+            key: value if key == "trend" else _finite(value)
+            for key, value in kpis.items()
+        }
+
+    return result
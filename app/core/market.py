@@ -1,31 +1,91 @@
+import asyncio
+import hashlib
+import sqlite3
 import time
-import requests
+from collections import Counter
 import pandas as pd
-from app.config.config import ALPHA_API_KEY, DEFAULT_SYMBOL
+from app.config.config import (
+    DEFAULT_SYMBOL,
+    MARKET_ANALYSIS_ROWS,
+    MARKET_CACHE_MAX_BYTES,
+    MARKET_CACHE_MAX_ENTRIES
+)
+from app.core import store
+from app.core.alpha_client import alpha_get
+from app.core.cache import LRUCache
+from app.core.rate_limit import BACKGROUND, INTERACTIVE, RateLimitedError
+from app.core.kpi_stream import get_streaming_kpis
 
 
-# Cache por símbolo
-_cache = {}
+def _entry_size(entry: dict):
+
+    return int(entry["data"].memory_usage(index=True, deep=True).sum())
+
+
+# Cache por símbolo (LRU acotado por entradas y bytes)
+_cache = LRUCache(
+    max_entries=MARKET_CACHE_MAX_ENTRIES,
+    max_bytes=MARKET_CACHE_MAX_BYTES,
+    sizeof=_entry_size
+)
+
+# Datos frescos: se sirven sin consultar Alpha
 CACHE_SECONDS = 300
 
+# Datos viejos (stale) hasta esta edad: se sirven al instante
+# mientras se refrescan en segundo plano
+MAX_STALE_SECONDS = 60 * 60
+
+# Tras un refresh fallido, esperar antes de reintentar en segundo plano
+ERROR_BACKOFF_SECONDS = 30
+
+
+class InvalidSymbolError(Exception):
+
+    # Alpha rechazó el símbolo ("Error Message"): no es un error transitorio
+    pass
+
+
+# Último refresh fallido por símbolo. Acotado como el cache: perder
+# un error viejo solo adelanta un reintento
+_last_error = LRUCache(max_entries=MARKET_CACHE_MAX_ENTRIES)
+
+# Fetches en curso por símbolo (single-flight)
+_inflight: dict[str, asyncio.Task] = {}
+
+# Símbolos cuyo fetch en curso tiene prioridad de fondo
+_background_fetches: set[str] = set()
+
+# Peticiones recientes por símbolo (popularidad para el refresh anticipado)
+_requests: Counter = Counter()
+
+# Funciones avisadas tras cada refresh exitoso (ej: streaming SSE)
+_listeners: list = []
+
+
+def add_refresh_listener(listener):
 
-def _fetch_from_alpha(symbol: str):
+    _listeners.append(listener)
 
-    url = "https://www.alphavantage.co/query"
+
+async def _fetch_from_alpha(symbol: str, priority: int = INTERACTIVE):
 
     params = {
         "function": "TIME_SERIES_DAILY",
         "symbol": symbol,
-        "apikey": ALPHA_API_KEY,
         "outputsize": "compact"
     }
 
-    r = requests.get(url, params=params, timeout=15)
-    data = r.json()
+    # Con poca cuota, las peticiones de usuario pasan antes que los refrescos de fondo
+    data = await alpha_get(params, priority)
 
     series = data.get("Time Series (Daily)")
 
     if not series:
+
+        if "Error Message" in data:
+            raise InvalidSymbolError(f"Alpha error: {data}")
+
         raise Exception(f"Alpha error: {data}")
 
     df = pd.DataFrame.from_dict(series, orient="index")
@@ -36,29 +96,289 @@ def _fetch_from_alpha(symbol: str):
     return df.sort_index()
 
 
-def get_market_data(symbol: str | None = None):
+def data_version(df: pd.DataFrame):
+
+    hashed = pd.util.hash_pandas_object(df, index=True).values
+
+    return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+
+
+def analysis_window(df: pd.DataFrame):
+
+    # El histórico guardado crece cada día: KPIs, indicadores y
+    # pronósticos usan siempre las mismas últimas filas
+    if len(df) <= MARKET_ANALYSIS_ROWS:
+        return df
+
+    return df.iloc[-MARKET_ANALYSIS_ROWS:]
+
+
+def _snapshot(symbol: str, df: pd.DataFrame, fetched_at: float):
+
+    # Los KPIs se calculan una vez por versión de datos, al traerlos,
+    # y se guardan junto al DataFrame
+    return {
+        "data": df,
+        "time": fetched_at,
+        "version": data_version(df),
+        "kpis": get_streaming_kpis(symbol, analysis_window(df))
+    }
+
+
+async def _persist(symbol: str, df: pd.DataFrame, now: float):
+
+    if not store.enabled():
+        return df
+
+    # Se agregan solo los días nuevos al histórico guardado
+    try:
+        return await asyncio.to_thread(store.merge_series, symbol, df, now)
+
+    except sqlite3.Error:
+        return df
+
+
+async def _load_stored(symbol: str):
+
+    if not store.enabled():
+        return None
+
+    # Arranque en caliente: histórico guardado en disco
+    try:
+        stored = await asyncio.to_thread(store.load_series, symbol)
+
+    except sqlite3.Error:
+        return None
+
+    if stored is None:
+        return None
+
+    cached = _snapshot(symbol, stored["data"], stored["time"])
+
+    _cache[symbol] = cached
+
+    return cached
+
+
+async def _refresh(symbol: str, now: float, priority: int = INTERACTIVE):
+
+    try:
+        df = await _fetch_from_alpha(symbol, priority)
+
+        df = await _persist(symbol, df, now)
+
+        cached = _snapshot(symbol, df, now)
+
+        _cache[symbol] = cached
+
+        _last_error.pop(symbol, None)
+
+        # Un listener con error no hace fallar el fetch ni a los demás
+        for listener in _listeners:
+            try:
+                listener(symbol, cached)
+            except Exception:
+                pass
+
+        return cached
+
+    except Exception as exc:
+        _last_error[symbol] = time.time()
+
+        # Símbolo inválido (o que dejó de existir): fuera del refresh
+        # anticipado. Timeouts o cortes de red no le quitan popularidad
+        if isinstance(exc, InvalidSymbolError):
+            _requests.pop(symbol, None)
+
+        raise
+
+    finally:
+        _inflight.pop(symbol, None)
+        _background_fetches.discard(symbol)
+
+
+def _consume_result(task: asyncio.Task):
+
+    # Evita "exception was never retrieved" si todos los clientes cancelaron
+    if not task.cancelled():
+        task.exception()
+
+
+def _fetch_single_flight(symbol: str, now: float, priority: int = INTERACTIVE):
+
+    task = _inflight.get(symbol)
+
+    if task is None:
+        task = asyncio.create_task(_refresh(symbol, now, priority))
+        task.add_done_callback(_consume_result)
 
-    global _cache_data, _cache_time
+        _inflight[symbol] = task
+
+        if priority == BACKGROUND:
+            _background_fetches.add(symbol)
+
+    return task
+
+
+def can_refresh(symbol: str, now: float):
+
+    # Ni en curso ni recién fallido (no insistir contra Alpha)
+    if symbol in _inflight:
+        return False
+
+    failed_at = _last_error.peek(symbol)
+
+    if failed_at is None:
+        return True
+
+    # Pasado el backoff el error ya no cuenta: se libera la entrada
+    if now - failed_at >= ERROR_BACKOFF_SECONDS:
+        _last_error.pop(symbol)
+        return True
+
+    return False
+
+
+def _revalidate(symbol: str, now: float):
+
+    if can_refresh(symbol, now):
+        _fetch_single_flight(symbol, now, BACKGROUND)
+
+
+async def get_market_snapshot(symbol: str | None = None, track: bool = True):
 
     # Usar default si no viene
     symbol = symbol or DEFAULT_SYMBOL
 
-    now = time.time()
+    snapshot = await _lookup(symbol, time.time())
+
+    # Solo cuentan los símbolos que respondieron: un typo no entra
+    # al refresh anticipado. track=False para lecturas internas (polling)
+    if track:
+        _requests[symbol] += 1
+
+    return snapshot
+
+
+async def _lookup(symbol: str, now: float):
 
     # Cache independiente por símbolo
-    if symbol in _cache:
+    cached = _cache.get(symbol)
 
-        cached = _cache[symbol]
+    if cached is None:
+        cached = await _load_stored(symbol)
 
-        if now - cached["time"] < CACHE_SECONDS:
-            return cached["data"]
+    if cached:
 
-    # Llamada real
-    df = _fetch_from_alpha(symbol)
+        age = now - cached["time"]
 
-    _cache[symbol] = {
-        "data": df,
-        "time": now
-    }
+        if age < CACHE_SECONDS:
+            return cached
+
+        # Stale-while-revalidate: responder ya y refrescar en segundo plano
+        if age < MAX_STALE_SECONDS:
+            _revalidate(symbol, now)
+            return cached
+
+    # Llamada real (una sola por símbolo aunque haya concurrencia).
+    # shield: si un cliente se desconecta no cancela el fetch compartido
+    joined_background = symbol in _background_fetches
+
+    task = _fetch_single_flight(symbol, now)
+
+    try:
+        try:
+            return await asyncio.shield(task)
+
+        except RateLimitedError:
+            if not joined_background:
+                raise
+
+            # El refresh de fondo al que se unió no puede usar la reserva
+            # de usuario: reintentar con prioridad interactiva
+            return await asyncio.shield(_fetch_single_flight(symbol, time.time()))
+
+    except Exception:
+        # Stale-if-error: si Alpha falla, seguir sirviendo lo último bueno
+        if cached:
+            return cached
+
+        raise
+
+
+async def prefetch(symbol: str):
+
+    # Refresh anticipado: no cuenta como petición ni lee el cache
+    return await _fetch_single_flight(symbol, time.time(), BACKGROUND)
+
+
+async def cache_age(symbol: str, now: float):
+
+    cached = _cache.peek(symbol)
+
+    # Tras reiniciar, lo guardado en disco cuenta como cacheado
+    if cached is None:
+        cached = await _load_stored(symbol)
+
+    if cached is None:
+        return None
+
+    return now - cached["time"]
+
+
+def popular_symbols(n: int):
+
+    return [symbol for symbol, _ in _requests.most_common(n)]
+
+
+def decay_requests(factor: float):
+
+    # Las peticiones viejas pesan cada vez menos
+    for symbol in list(_requests):
+
+        _requests[symbol] *= factor
+
+        if _requests[symbol] < 0.5:
+            del _requests[symbol]
+
+
+async def get_market_data(symbol: str | None = None):
+
+    snapshot = await get_market_snapshot(symbol)
+
+    return snapshot["data"]
+
+
+# Filas devueltas por defecto en /market
+MARKET_DEFAULT_ROWS = 150
+
+# Nombres cortos de columnas (?fields=close,volume)
+FIELDS = {name: column for column, name in store.COLUMNS.items()}
+
+
+def slice_market(df: pd.DataFrame, start=None, end=None, limit: int | None = None, fields: list[str] | None = None):
+
+    # Búsqueda binaria sobre el índice ordenado: solo se toman
+    # las filas y columnas pedidas, sin copiar el DataFrame completo
+    lo = df.index.searchsorted(pd.Timestamp(start), side="left") if start is not None else 0
+    hi = df.index.searchsorted(pd.Timestamp(end), side="right") if end is not None else len(df)
+
+    if limit is not None:
+        lo = max(lo, hi - limit)
+
+    if not fields:
+        return df.iloc[lo:hi]
+
+    unknown = [field for field in fields if FIELDS.get(field, field) not in df.columns]
+
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    columns = [df.columns.get_loc(FIELDS.get(field, field)) for field in fields]
+
+    return df.iloc[lo:hi, columns]
+
+
+def cache_stats():
 
-    return df
+    return _cache.stats()
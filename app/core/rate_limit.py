@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+
+# Prioridades: menor número se atiende primero
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class RateLimitedError(Exception):
+
+    # Sin cupo dentro del plazo pedido; retry_after en segundos
+
+    def __init__(self, retry_after: float):
+
+        super().__init__(f"Rate limited, retry after {retry_after:.0f}s")
+
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+
+    # capacity llamadas de ráfaga, recargando rate por segundo.
+    # reserve: tokens que las peticiones de fondo no pueden gastar
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, reserve: float = 0):
+
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = reserve
+
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self):
+
+        now = self._clock()
+
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, n: int = 1):
+
+        # Segundos hasta tener n tokens
+        self._refill()
+
+        if self._tokens >= n:
+            return 0.0
+
+        return (n - self._tokens) / self.rate
+
+    def take(self):
+
+        self._refill()
+        self._tokens -= 1
+
+    @property
+    def tokens(self):
+
+        self._refill()
+
+        return self._tokens
+
+
+class RateLimiter:
+
+    # Varios buckets (ej: por minuto y por día) con una cola de
+    # prioridad: las peticiones interactivas pasan antes que las de fondo,
+    # y las de fondo nunca gastan la reserva de cada bucket.
+    # sleep se puede inyectar (reloj falso en pruebas)
+
+    def __init__(self, buckets: list[TokenBucket], sleep=asyncio.sleep):
+
+        self.buckets = buckets
+
+        self._sleep = sleep
+
+        self._waiters = []
+        self._counter = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+        self.rejected = 0
+
+    def _wait_time(self, n: int = 1, priority: int = INTERACTIVE):
+
+        # Las de fondo necesitan n tokens por encima de la reserva
+        return max(
+            bucket.wait_time(n + bucket.reserve if priority == BACKGROUND else n)
+            for bucket in self.buckets
+        )
+
+    def _take(self):
+
+        for bucket in self.buckets:
+            bucket.take()
+
+    def _ahead(self, priority: int):
+
+        return sum(
+            1 for waiter_priority, _, future in self._waiters
+            if waiter_priority <= priority and not future.done()
+        )
+
+    async def acquire(self, priority: int = INTERACTIVE, timeout: float | None = None):
+
+        ahead = self._ahead(priority)
+
+        # Espera estimada contando a quienes van antes en la cola
+        wait = self._wait_time(ahead + 1, priority)
+
+        if ahead == 0 and wait == 0:
+            self._take()
+            return
+
+        # Fallar rápido en lugar de esperar más que el plazo
+        if timeout is not None and wait > timeout:
+            self._reject(wait)
+
+        future = asyncio.get_running_loop().create_future()
+
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+
+        # Si pasa a la cabeza (ej: interactiva detrás de una de fondo que
+        # espera la reserva), el despachador recalcula su espera
+        if self._dispatcher is not None and self._waiters[0][2] is future:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        # El plazo también aplica ya en la cola: si llegan interactivas
+        # o la estimación falla, no esperar de más
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._reject(self._wait_time(1, priority))
+
+    def _reject(self, wait: float):
+
+        self.rejected += 1
+
+        raise RateLimitedError(max(1, math.ceil(wait)))
+
+    async def _dispatch(self):
+
+        while self._waiters:
+
+            priority, _, future = self._waiters[0]
+
+            # Cliente que se fue (cancelado o sin plazo): no consume cupo
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+
+            wait = self._wait_time(1, priority)
+
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+
+            heapq.heappop(self._waiters)
+
+            self._take()
+            future.set_result(None)
+
+    def stats(self):
+
+        return {
+            "waiting": self._ahead(BACKGROUND),
+            "rejected": self.rejected,
+            "tokens": [round(bucket.tokens, 2) for bucket in self.buckets]
+        }
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from app.config.config import (
+    REFRESH_CALLS_PER_DAY,
+    REFRESH_CALLS_PER_MINUTE,
+    REFRESH_TOP_SYMBOLS,
+    REFRESH_WATCHLIST
+)
+from app.core import market
+
+# Cada cuántos segundos se revisa qué símbolos refrescar
+TICK_SECONDS = 30
+
+# Se refresca cuando falta esto para que venza el cache
+REFRESH_AHEAD_SECONDS = 60
+
+# Peso que conservan las peticiones anteriores en cada revisión
+POPULARITY_DECAY = 0.98
+
+_task: asyncio.Task | None = None
+
+# Refresh lanzados en el último día (presupuesto de llamadas a Alpha)
+_calls: deque = deque()
+
+_stats = {"refreshed": 0, "failed": 0}
+
+
+async def due_symbols(now: float):
+
+    # Watchlist fija + los símbolos más pedidos
+    candidates = dict.fromkeys(
+        REFRESH_WATCHLIST + market.popular_symbols(REFRESH_TOP_SYMBOLS)
+    )
+
+    due = []
+
+    for symbol in candidates:
+
+        # Ya en curso o fallido hace poco
+        if not market.can_refresh(symbol, now):
+            continue
+
+        age = await market.cache_age(symbol, now)
+
+        if age is None:
+            age = float("inf")
+
+        if age >= market.CACHE_SECONDS - REFRESH_AHEAD_SECONDS:
+            due.append((-age, symbol))
+
+    # Los más viejos primero
+    return [symbol for _, symbol in sorted(due)]
+
+
+def _minute_budget(now: float):
+
+    last_minute = sum(1 for called in _calls if now - called < 60)
+
+    return max(0, REFRESH_CALLS_PER_MINUTE - last_minute)
+
+
+def _daily_budget(now: float):
+
+    if REFRESH_CALLS_PER_DAY <= 0:
+        return 0
+
+    while _calls and now - _calls[0] >= 86400:
+        _calls.popleft()
+
+    remaining = REFRESH_CALLS_PER_DAY - len(_calls)
+
+    if not _calls:
+        return remaining
+
+    # La cuota diaria marca el ritmo: una llamada cada 86400 / N segundos
+    # (cada 2 horas con el plan gratuito) en lugar de gastarla de golpe
+    paced = int((now - _calls[-1]) / (86400 / REFRESH_CALLS_PER_DAY))
+
+    return max(0, min(remaining, paced))
+
+
+def _budget(now: float):
+
+    return min(_daily_budget(now), _minute_budget(now))
+
+
+async def tick(now: float | None = None):
+
+    now = now or time.time()
+
+    for symbol in (await due_symbols(now))[:_budget(now)]:
+
+        _calls.append(now)
+
+        try:
+            await market.prefetch(symbol)
+            _stats["refreshed"] += 1
+
+        except Exception:
+            _stats["failed"] += 1
+
+    market.decay_requests(POPULARITY_DECAY)
+
+
+async def _run():
+
+    while True:
+
+        await tick()
+
+        await asyncio.sleep(TICK_SECONDS)
+
+
+def start():
+
+    global _task
+
+    if _task is None and (REFRESH_WATCHLIST or REFRESH_TOP_SYMBOLS):
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+
+    global _task
+
+    if _task is None:
+        return
+
+    _task.cancel()
+
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+
+    _task = None
+
+
+def scheduler_stats():
+
+    return {
+        "running": _task is not None,
+        "watchlist": REFRESH_WATCHLIST,
+        "calls_last_day": len(_calls),
+        **_stats
+    }
@@ -1,20 +1,112 @@
-import requests
-from app.config.config import ALPHA_API_KEY
+import asyncio
+import bisect
+import os
+import time
+from app.config.config import SEARCH_CACHE_MAX_ENTRIES, SYMBOL_LISTING_PATH
+from app.core.alpha_client import alpha_get
+from app.core.cache import LRUCache
+from app.core.universe import SymbolUniverse, load_universe, normalize
 
+# Los listados de símbolos cambian poco
+SEARCH_CACHE_SECONDS = 24 * 60 * 60
 
-def search_symbol(keyword: str):
+# SYMBOL_SEARCH devuelve hasta 10 coincidencias
+SEARCH_MAX_RESULTS = 10
 
-    url = "https://www.alphavantage.co/query"
+# Coincidencias locales suficientes para no consultar Alpha
+LOCAL_MIN_RESULTS = 5
+
+# Resultados por palabra clave normalizada
+_search_cache = LRUCache(max_entries=SEARCH_CACHE_MAX_ENTRIES)
+
+
+class PrefixIndex:
+
+    # Arreglo ordenado de claves (símbolo y nombre en minúsculas):
+    # búsqueda por prefijo con bisect
+
+    def __init__(self):
+
+        self._keys: list[str] = []
+        self._symbols: list[str] = []
+        self._records: dict[str, dict] = {}
+
+    def add(self, record: dict):
+
+        symbol = record["symbol"]
+
+        if symbol in self._records:
+            self._records[symbol] = record
+            return
+
+        self._records[symbol] = record
+
+        for key in dict.fromkeys([symbol.lower(), normalize(record["name"])]):
+
+            position = bisect.bisect_left(self._keys, key)
+
+            self._keys.insert(position, key)
+            self._symbols.insert(position, symbol)
+
+    def search(self, prefix: str, limit: int = SEARCH_MAX_RESULTS):
+
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\uffff", start)
+
+        # Símbolo exacto, luego prefijo de símbolo, luego prefijo de nombre
+        ranked = {}
+
+        for key, symbol in zip(self._keys[start:end], self._symbols[start:end]):
+
+            is_symbol = key == symbol.lower()
+            rank = (0 if key == prefix and is_symbol else 1 if is_symbol else 2, len(symbol), symbol)
+
+            ranked[symbol] = min(rank, ranked.get(symbol, rank))
+
+        best = sorted(ranked, key=ranked.get)[:limit]
+
+        return [self._records[symbol] for symbol in best]
+
+    def clear(self):
+
+        self._keys.clear()
+        self._symbols.clear()
+        self._records.clear()
+
+    def __len__(self):
+        return len(self._records)
+
+
+# Símbolos y nombres vistos en búsquedas anteriores
+_index = PrefixIndex()
+
+# Búsquedas en curso por palabra clave (single-flight)
+_inflight: dict[str, asyncio.Task] = {}
+
+_counters = {"upstream": 0, "coalesced": 0, "prefix_hits": 0}
+
+# Universo local de símbolos (se carga al arrancar si existe el listado)
+_universe: SymbolUniverse | None = None
+
+
+def load_listing(path: str | None = SYMBOL_LISTING_PATH):
+
+    global _universe
+
+    if path and os.path.exists(path):
+        _universe = load_universe(path)
+
+    return _universe
+
+
+async def _search_upstream(keyword: str):
 
     params = {
         "function": "SYMBOL_SEARCH",
         "keywords": keyword,
-        "apikey": ALPHA_API_KEY,
     }
 
-    r = requests.get(url, params=params, timeout=15)
-
-    data = r.json()
+    data = await alpha_get(params)
 
     matches = data.get("bestMatches", [])
 
@@ -28,4 +120,129 @@ def search_symbol(keyword: str):
             "currency": item["8. currency"],
         })
 
+    # Solo respuestas válidas se guardan (no avisos de Alpha).
+    # Menos del máximo de Alpha: la lista tiene todas las coincidencias
+    if "bestMatches" in data:
+
+        _search_cache[normalize(keyword)] = {
+            "results": results,
+            "time": time.time(),
+            "complete": len(results) < SEARCH_MAX_RESULTS
+        }
+
+        for result in results:
+            _index.add(result)
+
     return results
+
+
+def _fresh(entry: dict | None, now: float):
+
+    return entry is not None and now - entry["time"] < SEARCH_CACHE_SECONDS
+
+
+def _matches(result: dict, key: str):
+
+    return key in result["symbol"].lower() or key in normalize(result["name"])
+
+
+def _from_shorter_prefix(key: str, now: float):
+
+    # Una búsqueda completa de "tes" contiene todas las de "tesla":
+    # basta con filtrarla
+    for end in range(len(key) - 1, 0, -1):
+
+        entry = _search_cache.peek(key[:end])
+
+        if _fresh(entry, now) and entry.get("complete"):
+
+            results = [result for result in entry["results"] if _matches(result, key)]
+
+            _search_cache[key] = {
+                "results": results,
+                "time": entry["time"],
+                "complete": True
+            }
+
+            return results
+
+    return None
+
+
+def _consume_result(task: asyncio.Task):
+
+    # Evita "exception was never retrieved" si todos los clientes cancelaron
+    if not task.cancelled():
+        task.exception()
+
+
+async def _search_single_flight(key: str, keyword: str):
+
+    task = _inflight.get(key)
+
+    if task is None:
+
+        _counters["upstream"] += 1
+
+        task = asyncio.create_task(_search_upstream(keyword))
+        task.add_done_callback(_consume_result)
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+        _inflight[key] = task
+
+    else:
+        _counters["coalesced"] += 1
+
+    # shield: si un cliente se desconecta no cancela la búsqueda compartida
+    return await asyncio.shield(task)
+
+
+async def search_symbol(keyword: str):
+
+    key = normalize(keyword)
+
+    # Con listado local se responde sin Alpha; si no hay coincidencias
+    # (ej: mercados fuera de EE. UU.) se sigue con la búsqueda normal
+    if _universe is not None and key:
+
+        results = _universe.search(key, SEARCH_MAX_RESULTS)
+
+        if results:
+            return results
+
+    now = time.time()
+
+    cached = _search_cache.get(key)
+
+    if _fresh(cached, now):
+        return cached["results"]
+
+    if key:
+
+        results = _from_shorter_prefix(key, now)
+
+        if results is not None:
+            _counters["prefix_hits"] += 1
+            return results
+
+    # Typeahead: si el índice local ya tiene suficientes coincidencias
+    # se responde sin consultar Alpha
+    if key:
+
+        local = _index.search(key)
+
+        if len(local) >= LOCAL_MIN_RESULTS:
+            return local
+
+    # Búsquedas iguales y simultáneas comparten una sola llamada a Alpha
+    return await _search_single_flight(key, keyword)
+
+
+def search_cache_stats():
+
+    return {
+        **_search_cache.stats(),
+        **_counters,
+        "indexed_symbols": len(_index),
+        "universe_symbols": len(_universe) if _universe is not None else 0
+    }
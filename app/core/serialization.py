@@ -0,0 +1,123 @@
+import json
+import numpy as np
+import pandas as pd
+
+# Dependencias opcionales: sin ellas se usa json estándar
+# y los formatos binarios no se ofrecen
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def to_columnar(df: pd.DataFrame):
+
+    # Un arreglo de fechas y un arreglo numérico por columna
+    return {
+        "index": df.index.strftime("%Y-%m-%d").tolist(),
+        "columns": {
+            column: np.ascontiguousarray(df[column].to_numpy())
+            for column in df.columns
+        }
+    }
+
+
+def available_media_types():
+
+    media_types = [JSON_MEDIA_TYPE]
+
+    if msgpack is not None:
+        media_types.append(MSGPACK_MEDIA_TYPE)
+
+    if pa is not None:
+        media_types.append(ARROW_MEDIA_TYPE)
+
+    return media_types
+
+
+def negotiate(accept: str | None):
+
+    # Primer tipo aceptado (por calidad q) que se pueda generar
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    candidates = []
+
+    for position, part in enumerate(accept.split(",")):
+
+        media_type, *params = [p.strip() for p in part.split(";")]
+
+        quality = 1.0
+
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    available = available_media_types()
+
+    for _, _, media_type in sorted(candidates):
+
+        if media_type in available:
+            return media_type
+
+    return JSON_MEDIA_TYPE
+
+
+def _to_list(value):
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+
+    raise TypeError(f"Type is not serializable: {type(value)}")
+
+
+def _encode_arrow(payload: dict):
+
+    columns = payload["columns"]
+
+    table = pa.table(
+        {"date": payload["index"], **columns},
+        metadata={"symbol": payload["symbol"]}
+    )
+
+    sink = pa.BufferOutputStream()
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def encode(payload: dict, media_type: str = JSON_MEDIA_TYPE):
+
+    if media_type == ARROW_MEDIA_TYPE:
+        return _encode_arrow(payload)
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(payload, default=_to_list)
+
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    return json.dumps(payload, default=_to_list).encode()
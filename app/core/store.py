@@ -0,0 +1,126 @@
+import os
+import sqlite3
+from contextlib import closing
+import pandas as pd
+from app.config.config import MARKET_STORE_PATH
+
+
+STORE_PATH = MARKET_STORE_PATH or None
+
+# Columnas de Alpha -> columnas de la tabla
+COLUMNS = {
+    "1. open": "open",
+    "2. high": "high",
+    "3. low": "low",
+    "4. close": "close",
+    "5. volume": "volume"
+}
+
+
+def enabled():
+
+    return STORE_PATH is not None
+
+
+def _connect():
+
+    folder = os.path.dirname(STORE_PATH)
+
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    conn = sqlite3.connect(STORE_PATH)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ohlcv (
+            symbol TEXT NOT NULL,
+            date TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            PRIMARY KEY (symbol, date)
+        )
+    """)
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS symbols (
+            symbol TEXT PRIMARY KEY,
+            fetched_at REAL NOT NULL
+        )
+    """)
+
+    return conn
+
+
+def _read_series(conn, symbol: str):
+
+    rows = conn.execute(
+        f"SELECT date, {', '.join(COLUMNS.values())} "
+        "FROM ohlcv WHERE symbol = ? ORDER BY date",
+        (symbol,)
+    ).fetchall()
+
+    df = pd.DataFrame(
+        [row[1:] for row in rows],
+        index=pd.to_datetime([row[0] for row in rows]),
+        columns=list(COLUMNS.keys()),
+        dtype=float
+    )
+
+    return df
+
+
+def load_series(symbol: str):
+
+    with closing(_connect()) as conn:
+
+        meta = conn.execute(
+            "SELECT fetched_at FROM symbols WHERE symbol = ?",
+            (symbol,)
+        ).fetchone()
+
+        if meta is None:
+            return None
+
+        return {
+            "data": _read_series(conn, symbol),
+            "time": meta[0]
+        }
+
+
+def merge_series(symbol: str, df: pd.DataFrame, fetched_at: float):
+
+    with closing(_connect()) as conn, conn:
+
+        last = conn.execute(
+            "SELECT MAX(date) FROM ohlcv WHERE symbol = ?",
+            (symbol,)
+        ).fetchone()[0]
+
+        # Solo días nuevos; el último guardado se reescribe
+        # porque Alpha puede haberlo corregido
+        if last is not None:
+            df = df[df.index >= pd.Timestamp(last)]
+
+        rows = [
+            (symbol, date.strftime("%Y-%m-%d"), *values)
+            for date, values in zip(
+                df.index,
+                df.reindex(columns=list(COLUMNS.keys())).itertuples(index=False)
+            )
+        ]
+
+        conn.executemany(
+            f"INSERT OR REPLACE INTO ohlcv (symbol, date, {', '.join(COLUMNS.values())}) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+        conn.execute(
+            "INSERT OR REPLACE INTO symbols (symbol, fetched_at) VALUES (?, ?)",
+            (symbol, fetched_at)
+        )
+
+        return _read_series(conn, symbol)
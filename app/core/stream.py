@@ -0,0 +1,167 @@
+import asyncio
+import pandas as pd
+from app.config.config import DEFAULT_SYMBOL, STREAM_POLL_SECONDS, STREAM_QUEUE_SIZE
+from app.core import market
+from app.core.serialization import encode, to_columnar
+
+# Comentario SSE periódico para que proxies no cierren la conexión
+KEEPALIVE_SECONDS = 15
+
+
+class _Channel:
+
+    # Suscriptores de un símbolo: comparten un único loop de refresh
+
+    def __init__(self, symbol: str):
+
+        self.symbol = symbol
+        self.subscribers: set[asyncio.Queue] = set()
+        self.last = None
+        self.task = None
+
+
+_channels: dict[str, _Channel] = {}
+
+# Suscriptores lentos a los que se les reemplazó la cola por un snapshot
+_resyncs = 0
+
+
+def _event(kind: str, symbol: str, snapshot: dict, df: pd.DataFrame):
+
+    return {
+        "type": kind,
+        "symbol": symbol,
+        "version": snapshot["version"],
+        **to_columnar(df),
+        "kpis": snapshot["kpis"]
+    }
+
+
+def _full_event(channel: _Channel):
+
+    df = channel.last["data"].tail(market.MARKET_DEFAULT_ROWS)
+
+    return _event("snapshot", channel.symbol, channel.last, df)
+
+
+def _offer(channel: _Channel, queue: asyncio.Queue, event: dict):
+
+    global _resyncs
+
+    try:
+        queue.put_nowait(event)
+
+    except asyncio.QueueFull:
+
+        # Cliente lento: se descartan sus deltas pendientes
+        # y recibe un snapshot completo en su lugar
+        while not queue.empty():
+            queue.get_nowait()
+
+        queue.put_nowait(_full_event(channel))
+
+        _resyncs += 1
+
+
+def _on_refresh(symbol: str, snapshot: dict):
+
+    channel = _channels.get(symbol)
+
+    if channel is None or channel.last is snapshot:
+        return
+
+    previous = channel.last
+
+    if previous is not None and previous["version"] == snapshot["version"]:
+        return
+
+    channel.last = snapshot
+
+    if previous is None:
+        event = _full_event(channel)
+    else:
+        # Barras nuevas más la última conocida (puede venir corregida)
+        df = snapshot["data"]
+        since = df.index.searchsorted(previous["data"].index[-1])
+
+        event = _event("delta", symbol, snapshot, df.iloc[since:])
+
+    for queue in list(channel.subscribers):
+        _offer(channel, queue, event)
+
+
+market.add_refresh_listener(_on_refresh)
+
+
+async def _poll(channel: _Channel):
+
+    # Loop compartido: mantiene el cache al día; los cambios
+    # llegan a los suscriptores vía _on_refresh
+    while True:
+
+        await asyncio.sleep(STREAM_POLL_SECONDS)
+
+        try:
+            # Lectura interna: no suma popularidad en cada vuelta
+            snapshot = await market.get_market_snapshot(channel.symbol, track=False)
+
+            _on_refresh(channel.symbol, snapshot)
+
+        except Exception:
+            pass
+
+
+def _format(event: dict):
+
+    return f"event: {event['type']}\ndata: ".encode() + encode(event) + b"\n\n"
+
+
+async def subscribe(symbol: str | None = None, snapshot: dict | None = None):
+
+    symbol = symbol or DEFAULT_SYMBOL
+
+    if snapshot is None:
+        snapshot = await market.get_market_snapshot(symbol)
+
+    # Sin await desde aquí hasta registrar la cola: no se pierden deltas
+    channel = _channels.get(symbol)
+
+    if channel is None:
+        channel = _channels[symbol] = _Channel(symbol)
+        channel.last = snapshot
+        channel.task = asyncio.create_task(_poll(channel))
+
+    queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    channel.subscribers.add(queue)
+
+    try:
+        yield _format(_full_event(channel))
+
+        while True:
+
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+
+            yield _format(event)
+
+    finally:
+        channel.subscribers.discard(queue)
+
+        # Último suscriptor: se detiene el loop del símbolo
+        if not channel.subscribers:
+            channel.task.cancel()
+            _channels.pop(symbol, None)
+
+
+def stream_stats():
+
+    return {
+        "channels": len(_channels),
+        "subscribers": sum(len(channel.subscribers) for channel in _channels.values()),
+        "resyncs": _resyncs
+    }
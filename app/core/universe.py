@@ -0,0 +1,157 @@
+import bisect
+import numpy as np
+import pandas as pd
+
+# Listado de Alpha (LISTING_STATUS): solo mercado de EE. UU.
+LISTING_REGION = "United States"
+LISTING_CURRENCY = "USD"
+
+# Fracción mínima de trigramas de la búsqueda que debe tener una coincidencia aproximada
+FUZZY_MIN_SIMILARITY = 0.4
+
+
+def normalize(keyword: str):
+
+    return " ".join(keyword.lower().split())
+
+
+def _trigrams(text: str):
+
+    padded = f" {text} "
+
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolUniverse:
+
+    # Tabla columnar de símbolos (arreglos NumPy ordenados por ticker)
+    # con índices para ticker exacto/prefijo, prefijo de nombre y trigramas
+
+    def __init__(self, symbols: list[str], names: list[str]):
+
+        symbol_keys = np.array([symbol.lower() for symbol in symbols], dtype=str)
+
+        order = np.argsort(symbol_keys, kind="stable")
+
+        self.symbols = np.array(symbols, dtype=object)[order]
+        self.names = np.array(names, dtype=object)[order]
+
+        # Claves como listas de str: bisect no convierte el arreglo en cada búsqueda
+        self._symbol_keys = symbol_keys[order].tolist()
+        self._lengths = np.array([len(symbol) for symbol in self.symbols], dtype=np.int32)
+
+        name_keys = np.array([normalize(name) for name in self.names], dtype=str)
+        name_order = np.argsort(name_keys, kind="stable")
+
+        self._name_keys = name_keys[name_order].tolist()
+        self._name_rows = name_order.astype(np.int32)
+
+        # Listas de filas por trigrama (ticker + nombre)
+        postings: dict[str, list[int]] = {}
+        counts = np.zeros(len(self.symbols), dtype=np.int32)
+
+        for row, (symbol_key, name_key) in enumerate(zip(self._symbol_keys, name_keys)):
+
+            grams = _trigrams(symbol_key) | _trigrams(name_key)
+            counts[row] = len(grams)
+
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+
+        self._postings = {
+            gram: np.array(rows, dtype=np.int32)
+            for gram, rows in postings.items()
+        }
+        self._trigram_counts = counts
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _prefix_range(self, keys: list[str], prefix: str):
+
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+
+        return lo, hi
+
+    def _ticker_matches(self, key: str, limit: int):
+
+        lo, hi = self._prefix_range(self._symbol_keys, key)
+
+        # Ya ordenados por ticker: el orden estable por longitud
+        # deja el ticker exacto primero y luego los más cortos
+        return lo + np.argsort(self._lengths[lo:hi], kind="stable")[:limit]
+
+    def _name_matches(self, key: str, limit: int):
+
+        lo, hi = self._prefix_range(self._name_keys, key)
+
+        return self._name_rows[lo:min(hi, lo + limit)]
+
+    def _fuzzy_matches(self, key: str, limit: int):
+
+        query = _trigrams(key)
+        grams = [gram for gram in query if gram in self._postings]
+
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+
+        shared = np.bincount(
+            np.concatenate([self._postings[gram] for gram in grams]),
+            minlength=len(self.symbols)
+        )
+
+        rows = np.flatnonzero(shared)
+        shared = shared[rows]
+
+        # Fracción de trigramas de la búsqueda presentes en la fila;
+        # a igualdad gana la fila más parecida en total (Jaccard)
+        coverage = shared / len(query)
+        jaccard = shared / (len(query) + self._trigram_counts[rows] - shared)
+
+        keep = coverage >= FUZZY_MIN_SIMILARITY
+
+        rows, coverage, jaccard = rows[keep], coverage[keep], jaccard[keep]
+
+        return rows[np.lexsort((-jaccard, -coverage))[:limit]]
+
+    def _record(self, row: int):
+
+        return {
+            "symbol": self.symbols[row],
+            "name": self.names[row],
+            "region": LISTING_REGION,
+            "currency": LISTING_CURRENCY,
+        }
+
+    def search(self, keyword: str, limit: int = 10):
+
+        key = normalize(keyword)
+
+        if not key:
+            return []
+
+        # Ticker exacto/prefijo, luego prefijo de nombre y por último
+        # trigramas, solo si hacen falta más resultados
+        rows = list(dict.fromkeys(self._ticker_matches(key, limit).tolist()))
+
+        if len(rows) < limit:
+            rows = list(dict.fromkeys(rows + self._name_matches(key, limit).tolist()))
+
+        if len(rows) < limit:
+            rows = list(dict.fromkeys(rows + self._fuzzy_matches(key, limit).tolist()))
+
+        return [self._record(row) for row in rows[:limit]]
+
+
+def load_universe(path: str):
+
+    # CSV de LISTING_STATUS: symbol,name,exchange,assetType,ipoDate,delistingDate,status
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+
+    if "status" in df.columns:
+        df = df[df["status"].str.lower() == "active"]
+
+    df = df[df["symbol"] != ""]
+
+    return SymbolUniverse(df["symbol"].tolist(), df["name"].tolist())
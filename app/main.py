@@ -1,8 +1,33 @@
-from fastapi import FastAPI
+import asyncio
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import alpha_client, forecast_pool, scheduler, search
+from app.core.rate_limit import RateLimitedError
 from app.routes import finanzas_routes
 
-app = FastAPI(title="Financial API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    # Listado local de símbolos para /search (si existe el CSV)
+    await asyncio.to_thread(search.load_listing)
+
+    # Refresh anticipado del watchlist y de los símbolos más pedidos
+    scheduler.start()
+
+    yield
+
+    await scheduler.stop()
+
+    # Cerrar pool de conexiones HTTP y pool de procesos
+    await alpha_client.close_client()
+    forecast_pool.shutdown()
+
+
+app = FastAPI(title="Financial API", lifespan=lifespan)
 
 
 # CORS (React)
@@ -14,5 +39,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cuota de Alpha agotada: 429 en lugar de un error genérico
+@app.exception_handler(RateLimitedError)
+async def rate_limited(request: Request, exc: RateLimitedError):
+
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Alpha Vantage rate limit reached"},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
 # Agregar rutas
 app.include_router(finanzas_routes.router)
@@ -1,48 +1,337 @@
-from fastapi import APIRouter, HTTPException, Query
+import hashlib
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from app.core.forecast_pool import (
+    RETRY_AFTER_SECONDS,
+    ForecastTimeoutError,
+    PoolSaturatedError
+)
+from app.core.indicators import INDICATORS
+from app.core.insights import InsightTimeoutError
+from app.core.jobs import DONE, FAILED
+from app.core.market import MARKET_DEFAULT_ROWS
+from app.core.serialization import JSON_MEDIA_TYPE, encode, negotiate
 from app.services import finanzas_service
 
 router = APIRouter(prefix="/finance", tags=["Finance"])
 
+# Máximo de símbolos por petición batch
+KPI_BATCH_MAX_SYMBOLS = 50
+
+
+# ============================
+# Cache HTTP (ETag + Cache-Control)
+# ============================
+
+def _etag(version: str, request: Request, *extra: str):
+
+    # Versión de los datos + ruta + parámetros: misma respuesta, mismo ETag
+    params = sorted(request.query_params.multi_items())
+
+    key = "|".join([version, request.url.path, repr(params), *extra])
+
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str):
+
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    return "*" in tags or etag in tags
+
+
+async def _cache_headers(request: Request, symbol: str, *extra: str):
+
+    # Una sola lectura del snapshot por petición: el cuerpo se arma
+    # con el mismo snapshot que generó el ETag
+    freshness = await finanzas_service.market_freshness(symbol)
+
+    headers = {
+        "ETag": _etag(freshness["version"], request, *extra),
+        "Cache-Control": f"max-age={freshness['max_age']}"
+    }
+
+    return headers, freshness["snapshot"]
+
+
+def _not_modified(request: Request, headers: dict):
+
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    return None
+
 @router.get("/market")
-def market_data(
+async def market_data(
+    request: Request,
+    response: Response,
+    symbol: str = Query(
+        default=None,
+        description="Símbolo bursátil (ej: AAPL, TSLA)"
+    ),
+    layout: Literal["dict", "columnar"] = Query(
+        default="dict",
+        description="dict (columna -> fecha -> valor) o columnar (arreglos por columna)"
+    ),
+    start: date = Query(default=None, description="Fecha inicial (YYYY-MM-DD)"),
+    end: date = Query(default=None, description="Fecha final (YYYY-MM-DD)"),
+    limit: int = Query(default=MARKET_DEFAULT_ROWS, ge=1, description="Máximo de filas (las más recientes)"),
+    fields: list[str] = Query(
+        default=None,
+        description="Columnas separadas por coma (ej: close,volume)"
+    )
+):
+    fields = [
+        field.strip()
+        for value in fields or []
+        for field in value.split(",")
+        if field.strip()
+    ] or None
+
+    params = {"start": start, "end": end, "limit": limit, "fields": fields}
+
+    # Accept: application/x-msgpack o Arrow IPC si están instalados
+    media_type = negotiate(request.headers.get("accept"))
+
+    headers, snapshot = await _cache_headers(request, symbol, media_type)
+    headers["Vary"] = "Accept"
+
+    not_modified = _not_modified(request, headers)
+
+    if not_modified:
+        return not_modified
+
+    try:
+        if layout == "dict" and media_type == JSON_MEDIA_TYPE:
+            response.headers.update(headers)
+            return await finanzas_service.market_data(symbol, **params, snapshot=snapshot)
+
+        # Formatos binarios siempre usan el layout columnar
+        payload = await finanzas_service.market_data_columnar(symbol, **params, snapshot=snapshot)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return Response(encode(payload, media_type), media_type=media_type, headers=headers)
+
+
+@router.get("/stream")
+async def stream(
     symbol: str = Query(
         default=None,
         description="Símbolo bursátil (ej: AAPL, TSLA)"
     )
 ):
-    return finanzas_service.market_data(symbol)
+    # Errores del primer fetch antes de enviar los headers 200
+    events = await finanzas_service.stream_market(symbol)
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/forecast")
-def forecast(
+async def forecast(
+    request: Request,
+    response: Response,
+    symbol: str = Query(
+        default=None,
+        description="Símbolo bursátil (ej: AAPL, TSLA)"
+    ),
+    periods: int = 30,
+    engine: Literal["prophet", "fast"] = Query(
+        default="prophet",
+        description="Motor de pronóstico: prophet o fast (lineal, milisegundos)"
+    )
+):
+    headers, snapshot = await _cache_headers(request, symbol)
+
+    not_modified = _not_modified(request, headers)
+
+    if not_modified:
+        return not_modified
+
+    response.headers.update(headers)
+
+    try:
+        return await finanzas_service.get_forecast(symbol, periods, engine, snapshot=snapshot)
+    except PoolSaturatedError:
+        raise HTTPException(
+            status_code=503,
+            detail="Forecast service busy",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    except ForecastTimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Forecast timed out"
+        )
+
+@router.post("/forecast/jobs", status_code=202)
+async def create_forecast_job(
     symbol: str = Query(
         default=None,
         description="Símbolo bursátil (ej: AAPL, TSLA)"
     ),
-    periods: int = 30
+    periods: int = 30,
+    engine: Literal["prophet", "fast"] = Query(
+        default="prophet",
+        description="Motor de pronóstico: prophet o fast (lineal, milisegundos)"
+    )
 ):
-    return finanzas_service.get_forecast(symbol, periods)
+    return await finanzas_service.submit_forecast_job(symbol, periods, engine)
+
+
+@router.get("/forecast/jobs/{job_id}")
+async def forecast_job(job_id: str):
+
+    job = await finanzas_service.get_forecast_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+def _raise_job_error(job: dict):
+
+    # Mismos códigos que /forecast: pool lleno o timeout no son errores internos
+    error_type = job.get("error_type")
+
+    if error_type == PoolSaturatedError.__name__:
+        raise HTTPException(
+            status_code=503,
+            detail=job["error"],
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+    if error_type == ForecastTimeoutError.__name__:
+        raise HTTPException(status_code=504, detail=job["error"])
+
+    raise HTTPException(status_code=500, detail=job["error"])
+
+
+@router.get("/forecast/jobs/{job_id}/result")
+async def forecast_job_result(job_id: str):
+
+    job = await finanzas_service.get_forecast_job(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job["status"] == FAILED:
+        _raise_job_error(job)
+
+    # Aún en proceso: se devuelve el estado para seguir consultando
+    if job["status"] != DONE:
+        return JSONResponse(status_code=202, content=job)
+
+    return await finanzas_service.get_forecast_job_result(job_id)
 
 @router.get("/kpis")
-def kpis(symbol: str = Query(default=None, description="Símbolo bursátil (ej: AAPL, TSLA)")):
-    return finanzas_service.get_kpis(symbol)
+async def kpis(
+    request: Request,
+    response: Response,
+    symbol: str = Query(default=None, description="Símbolo bursátil (ej: AAPL, TSLA)")
+):
+    headers, snapshot = await _cache_headers(request, symbol)
+
+    not_modified = _not_modified(request, headers)
+
+    if not_modified:
+        return not_modified
+
+    response.headers.update(headers)
+
+    return await finanzas_service.get_kpis(symbol, snapshot=snapshot)
+
+
+@router.get("/kpis/batch")
+async def kpis_batch(
+    symbols: list[str] = Query(
+        description="Símbolos separados por coma o repetidos (ej: AAPL,TSLA)"
+    )
+):
+    symbols = [
+        symbol.strip()
+        for value in symbols
+        for symbol in value.split(",")
+        if symbol.strip()
+    ]
+
+    if not symbols:
+        raise HTTPException(status_code=422, detail="No symbols given")
+
+    if len(symbols) > KPI_BATCH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Max {KPI_BATCH_MAX_SYMBOLS} symbols"
+        )
+
+    return await finanzas_service.get_kpis_batch(symbols)
+
+
+@router.get("/indicators")
+async def indicators(
+    symbol: str = Query(default=None, description="Símbolo bursátil (ej: AAPL, TSLA)"),
+    indicators: list[str] = Query(
+        default=None,
+        description=f"Indicadores separados por coma (por defecto todos): {', '.join(INDICATORS)}"
+    )
+):
+    names = [
+        name.strip()
+        for value in indicators or []
+        for name in value.split(",")
+        if name.strip()
+    ]
+
+    unknown = [name for name in names if name not in INDICATORS]
+
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown indicators: {', '.join(unknown)}"
+        )
+
+    try:
+        return await finanzas_service.get_indicators(symbol, names or None)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @router.get("/search")
-def search(q: str):
+async def search(q: str):
 
-    return finanzas_service.search_symbols(q)
+    return await finanzas_service.search_symbols(q)
 
 
 @router.get("/kpi-insight")
-def kpi_insight(
+async def kpi_insight(
     kpi: str, value: str,
     symbol: str = Query(default=None, description="Símbolo bursátil (ej: AAPL, TSLA)")
 ):
     try:
-        return finanzas_service.get_kpi_insight(kpi, value, symbol)
+        return await finanzas_service.get_kpi_insight(kpi, value, symbol)
+    except InsightTimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="AI service timed out"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail="AI service error"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/metrics")
+async def metrics():
+
+    return await finanzas_service.get_metrics()
@@ -1,52 +1,257 @@
-from app.config.config import DEFAULT_SYMBOL
-from app.core.forecast import run_forecast
-from app.core.insights import generate_kpi_insight
-from app.core.kpis import calculate_kpis
-from app.core.market import get_market_data
-from app.core.search import search_symbol
+import asyncio
+import time
+from app.config.config import DEFAULT_SYMBOL, FORECAST_JOBS_MAX
+from app.core.forecast import (
+    FAST_ENGINE,
+    PROPHET_ENGINE,
+    forecast_cache_stats,
+    get_cached_forecast,
+    remember_fit,
+    run_fast_forecast,
+    run_forecast,
+    series_fingerprint,
+    store_forecast,
+    warm_start_init
+)
+from app.core import alpha_client, forecast_pool, scheduler
+from app.core.indicators import calculate_indicators
+from app.core.insights import generate_kpi_insight, insight_stats
+from app.core.jobs import DONE, JobStore
+from app.core.kpis import calculate_kpis_batch
+from app.core.market import (
+    analysis_window,
+    CACHE_SECONDS,
+    cache_stats,
+    get_market_data,
+    get_market_snapshot,
+    MARKET_DEFAULT_ROWS,
+    slice_market
+)
+from app.core.search import search_cache_stats, search_symbol
+from app.core.serialization import to_columnar
+from app.core.stream import stream_stats, subscribe
 
 
-def market_data(symbol: str):
+async def market_freshness(symbol: str):
 
-    df = get_market_data(symbol)
+    # Versión de los datos y segundos que le quedan en cache. El snapshot
+    # se devuelve para armar la respuesta con los mismos datos del ETag
+    snapshot = await get_market_snapshot(symbol)
+
+    age = time.time() - snapshot["time"]
+
+    return {
+        "version": snapshot["version"],
+        "max_age": max(0, int(CACHE_SECONDS - age)),
+        "snapshot": snapshot
+    }
+
+
+async def _market_frame(symbol: str, snapshot: dict | None = None):
+
+    # Con snapshot ya leído no se vuelve a consultar el cache
+    if snapshot is None:
+        return await get_market_data(symbol)
+
+    return snapshot["data"]
+
+
+async def market_data(symbol: str, start=None, end=None, limit: int = MARKET_DEFAULT_ROWS, fields: list[str] | None = None, snapshot: dict | None = None):
+
+    df = await _market_frame(symbol, snapshot)
 
     return {
         "symbol": symbol or DEFAULT_SYMBOL,
-        "data": df.tail(150).to_dict()
+        "data": slice_market(df, start, end, limit, fields).to_dict()
     }
 
-def get_forecast(symbol: str, periods: int = 30):
 
-    df = get_market_data(symbol)
+async def market_data_columnar(symbol: str, start=None, end=None, limit: int = MARKET_DEFAULT_ROWS, fields: list[str] | None = None, snapshot: dict | None = None):
 
-    result = run_forecast(df, periods)
+    df = await _market_frame(symbol, snapshot)
 
     return {
         "symbol": symbol or DEFAULT_SYMBOL,
+        **to_columnar(slice_market(df, start, end, limit, fields))
+    }
+
+async def stream_market(symbol: str):
+
+    # El primer snapshot se lee antes de abrir el stream: un símbolo
+    # inválido o sin cuota responde 500/429 y no un 200 vacío
+    snapshot = await get_market_snapshot(symbol)
+
+    # Eventos SSE: snapshot inicial y luego deltas en cada refresh
+    return subscribe(symbol, snapshot)
+
+
+# Pronósticos asíncronos (POST + polling)
+_forecast_jobs = JobStore(max_jobs=FORECAST_JOBS_MAX)
+
+
+async def _fit_forecast(key: str, df, periods: int, engine: str):
+
+    # Modelo lineal vectorizado: milisegundos, no necesita el pool
+    if engine == FAST_ENGINE:
+        return run_fast_forecast(df, periods)
+
+    # Datos nuevos pero similares: partir del ajuste anterior
+    init = warm_start_init(key, df)
+
+    # Prophet es CPU intensivo: se ajusta en el pool de procesos
+    result = await forecast_pool.submit(run_forecast, df, periods, init)
+
+    remember_fit(key, df, result)
+
+    return result
+
+async def _run_forecast_cached(key: str, df, fingerprint: str, periods: int, engine: str):
+
+    # Mismo símbolo, misma serie y mismo motor: no se vuelve a ajustar
+    result = get_cached_forecast(key, fingerprint, periods, engine)
+
+    if result is None:
+
+        result = await _fit_forecast(key, df, periods, engine)
+
+        store_forecast(key, fingerprint, periods, result, engine)
+
+    return {
+        "symbol": key,
         "forecast": result.to_dict(orient="records")
     }
 
-def get_kpis(symbol: str):
-    df = get_market_data(symbol)
-    kpis = calculate_kpis(df)
+async def get_forecast(symbol: str, periods: int = 30, engine: str = PROPHET_ENGINE, snapshot: dict | None = None):
+
+    df = analysis_window(await _market_frame(symbol, snapshot))
+
+    key = symbol or DEFAULT_SYMBOL
+    fingerprint = series_fingerprint(df["4. close"])
+
+    return await _run_forecast_cached(key, df, fingerprint, periods, engine)
+
+
+def _job_status(job: dict):
+
+    symbol, periods, engine, _ = job["key"]
+
+    return {
+        "job_id": job["id"],
+        "symbol": symbol,
+        "periods": periods,
+        "engine": engine,
+        "status": job["status"],
+        "error": job["error"],
+        "error_type": job["error_type"]
+    }
+
+async def submit_forecast_job(symbol: str, periods: int = 30, engine: str = PROPHET_ENGINE):
+
+    df = analysis_window(await get_market_data(symbol))
+
+    key = symbol or DEFAULT_SYMBOL
+    fingerprint = series_fingerprint(df["4. close"])
+
+    # Misma versión de datos y horizonte: se reutiliza el trabajo existente
+    job = _forecast_jobs.submit(
+        (key, periods, engine, fingerprint),
+        lambda: _run_forecast_cached(key, df, fingerprint, periods, engine)
+    )
+
+    return _job_status(job)
+
+async def get_forecast_job(job_id: str):
+
+    job = _forecast_jobs.get(job_id)
+
+    if job is None:
+        return None
+
+    return _job_status(job)
+
+async def get_forecast_job_result(job_id: str):
+
+    job = _forecast_jobs.get(job_id)
+
+    if job is None or job["status"] != DONE:
+        return None
+
+    return job["result"]
+
+async def get_kpis(symbol: str, snapshot: dict | None = None):
+
+    # KPIs ya calculados al traer los datos: solo una búsqueda en cache
+    if snapshot is None:
+        snapshot = await get_market_snapshot(symbol)
 
     return {
         "symbol": symbol or DEFAULT_SYMBOL,
-        "kpis": kpis
+        "kpis": snapshot["kpis"]
     }
 
 
-def search_symbols(keyword: str):
+async def get_kpis_batch(symbols: list[str]):
+
+    symbols = list(dict.fromkeys(symbols))
+
+    # Fetches concurrentes (cada símbolo usa su cache y single-flight)
+    frames = await asyncio.gather(
+        *[get_market_data(symbol) for symbol in symbols],
+        return_exceptions=True
+    )
+
+    closes = {}
+    errors = {}
+
+    for symbol, df in zip(symbols, frames):
+
+        if isinstance(df, Exception):
+            errors[symbol] = str(df)
+        else:
+            closes[symbol] = analysis_window(df)["4. close"]
+
+    return {
+        "kpis": calculate_kpis_batch(closes) if closes else {},
+        "errors": errors
+    }
+
+
+async def get_indicators(symbol: str, names: list[str] | None = None):
+
+    df = analysis_window(await get_market_data(symbol))
 
     return {
-        "results": search_symbol(keyword)
+        "symbol": symbol or DEFAULT_SYMBOL,
+        "indicators": calculate_indicators(df, names)
     }
 
 
-def get_kpi_insight(kpi: str, value: str, symbol: str):
-    insight = generate_kpi_insight(kpi, value, symbol or DEFAULT_SYMBOL)
+async def search_symbols(keyword: str):
+
+    return {
+        "results": await search_symbol(keyword)
+    }
+
+
+async def get_kpi_insight(kpi: str, value: str, symbol: str):
+    insight = await generate_kpi_insight(kpi, value, symbol or DEFAULT_SYMBOL)
 
     return {
         "kpi": kpi,
         "insight": insight
-    }
\ No newline at end of file
+    }
+
+
+async def get_metrics():
+
+    return {
+        "market_cache": cache_stats(),
+        "forecast_cache": forecast_cache_stats(),
+        "search_cache": search_cache_stats(),
+        "forecast_pool": forecast_pool.pool_stats(),
+        "forecast_jobs": _forecast_jobs.stats(),
+        "streams": stream_stats(),
+        "scheduler": scheduler.scheduler_stats(),
+        "alpha_rate_limit": alpha_client.get_limiter().stats(),
+        "insights": insight_stats()
+    }
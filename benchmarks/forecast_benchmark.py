@@ -0,0 +1,85 @@
+# Compara el motor rápido contra Prophet en precisión y latencia.
+#
+# Uso: python -m benchmarks.forecast_benchmark [series]
+#
+# Cada serie sintética es un random walk con tendencia y efecto semanal
+# sobre días hábiles. Se ajusta con los primeros 100 días y se evalúa
+# sobre los 20 siguientes (MAE y cobertura del intervalo del 80%).
+
+import logging
+import sys
+import time
+import numpy as np
+import pandas as pd
+from app.core.forecast import run_fast_forecast, run_forecast
+
+
+TRAIN_ROWS = 100
+TEST_ROWS = 20
+
+
+def _series(seed: int):
+
+    rng = np.random.default_rng(seed)
+
+    dates = pd.bdate_range("2024-01-01", periods=TRAIN_ROWS + TEST_ROWS)
+
+    weekly = np.array([0.4, -0.2, 0.1, -0.3, 0.0])[dates.dayofweek]
+    drift = rng.normal(0.05, 0.05)
+
+    close = 100 + np.cumsum(rng.normal(drift, 1.0, len(dates))) + weekly
+
+    return pd.DataFrame({"4. close": close}, index=dates)
+
+
+def _evaluate(engine, df: pd.DataFrame):
+
+    train = df.iloc[:TRAIN_ROWS]
+    test = df.iloc[TRAIN_ROWS:]
+
+    periods = (test.index[-1] - train.index[-1]).days
+
+    start = time.perf_counter()
+    forecast = engine(train, periods)
+    elapsed = time.perf_counter() - start
+
+    predicted = forecast.set_index("ds").loc[test.index]
+    actual = test["4. close"]
+
+    mae = (predicted["yhat"] - actual).abs().mean()
+
+    inside = (
+        (actual >= predicted["yhat_lower"])
+        & (actual <= predicted["yhat_upper"])
+    ).mean()
+
+    return mae, inside, elapsed
+
+
+def main(n_series: int = 10):
+
+    # Prophet y cmdstanpy son muy verbosos
+    logging.disable(logging.WARNING)
+
+    engines = {
+        "prophet": run_forecast,
+        "fast": run_fast_forecast
+    }
+
+    print(f"{n_series} series, train={TRAIN_ROWS}, test={TEST_ROWS}")
+    print(f"{'engine':<10}{'MAE':>10}{'coverage':>10}{'ms/fit':>12}")
+
+    for name, engine in engines.items():
+
+        results = np.array([
+            _evaluate(engine, _series(seed))
+            for seed in range(n_series)
+        ])
+
+        mae, coverage, seconds = results.mean(axis=0)
+
+        print(f"{name:<10}{mae:>10.3f}{coverage:>10.0%}{seconds * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
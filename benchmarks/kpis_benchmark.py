@@ -0,0 +1,91 @@
+# Compara calculate_kpis (kernel NumPy) contra el cálculo anterior con
+# objetos rolling de pandas, por llamada y a distintos tamaños de serie.
+# También mide la reconstrucción del acumulador de /kpis (from_series).
+#
+# Uso: python -m benchmarks.kpis_benchmark
+
+import timeit
+import numpy as np
+import pandas as pd
+from app.core import kpis
+from app.core.kpi_stream import KPIAccumulator
+from app.core.kpis import calculate_kpis
+
+
+SIZES = [100, 5_000, 50_000]
+
+
+def calculate_kpis_pandas(df: pd.DataFrame):
+
+    # Implementación anterior, como referencia
+    close = df["4. close"]
+
+    returns = close.pct_change().dropna()
+
+    daily_return = returns.mean() * 100
+    volatility = returns.std() * 100
+
+    ma_20 = close.rolling(20).mean().iloc[-1]
+    ma_50 = close.rolling(50).mean().iloc[-1]
+
+    delta = close.diff()
+
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    rs = gain.rolling(14).mean() / loss.rolling(14).mean()
+    rsi_value = (100 - (100 / (1 + rs))).iloc[-1]
+
+    rolling_max = close.cummax()
+    max_drawdown = ((close - rolling_max) / rolling_max).min() * 100
+
+    trend = "bullish" if close.iloc[-1] > ma_50 else "bearish"
+
+    return {
+        "last_price": round(close.iloc[-1], 2),
+        "daily_return_pct": round(daily_return, 2),
+        "volatility_pct": round(volatility, 2),
+        "ma_20": round(ma_20, 2),
+        "ma_50": round(ma_50, 2),
+        "rsi_14": round(rsi_value, 2),
+        "max_drawdown_pct": round(max_drawdown, 2),
+        "trend": trend
+    }
+
+
+def _per_call_us(fn, df):
+
+    number = 200
+    seconds = min(timeit.repeat(lambda: fn(df), number=number, repeat=5))
+
+    return seconds / number * 1e6
+
+
+def main():
+
+    rng = np.random.default_rng(0)
+
+    kernel = "numba" if kpis.njit else "numpy"
+
+    print(f"kernel: {kernel}")
+    print(f"{'rows':>8}{'pandas us':>12}{'kernel us':>12}{'speedup':>10}{'rebuild us':>12}")
+
+    for rows in SIZES:
+
+        df = pd.DataFrame(
+            {"4. close": 100 + np.cumsum(rng.normal(0, 1, rows))},
+            index=pd.date_range("2000-01-01", periods=rows)
+        )
+
+        # Warm-up (compilación de Numba si está disponible)
+        assert calculate_kpis(df) == calculate_kpis_pandas(df)
+
+        before = _per_call_us(calculate_kpis_pandas, df)
+        after = _per_call_us(calculate_kpis, df)
+        rebuild = _per_call_us(lambda frame: KPIAccumulator.from_series(frame["4. close"]), df)
+
+        print(f"{rows:>8}{before:>12.1f}{after:>12.1f}{before / after:>9.1f}x{rebuild:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
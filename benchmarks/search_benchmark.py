@@ -0,0 +1,95 @@
+# Latencia de SymbolUniverse.search sobre un universo sintético del
+# tamaño del listado de Alpha (decenas de miles de símbolos).
+#
+# Uso: python -m benchmarks.search_benchmark
+
+import random
+import string
+import time
+import numpy as np
+from app.core.universe import SymbolUniverse
+
+
+SIZES = [10_000, 50_000]
+
+QUERIES = 2_000
+
+
+def _word(rng: random.Random, low: int, high: int):
+
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(low, high)))
+
+
+def _listing(rng: random.Random, size: int):
+
+    words = [_word(rng, 3, 9).title() for _ in range(size // 10)]
+
+    symbols = set()
+
+    while len(symbols) < size:
+        symbols.add(_word(rng, 1, 5).upper())
+
+    symbols = sorted(symbols)
+
+    names = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        + rng.choice([" Inc", " Corp", " Ltd", " ETF"])
+        for _ in symbols
+    ]
+
+    return symbols, names
+
+
+def _queries(rng: random.Random, symbols: list[str], names: list[str]):
+
+    queries = []
+
+    for _ in range(QUERIES):
+
+        kind = rng.random()
+        row = rng.randrange(len(symbols))
+
+        if kind < 0.4:
+            # Typeahead de ticker
+            symbol = symbols[row]
+            queries.append(symbol[:rng.randint(1, len(symbol))].lower())
+        elif kind < 0.8:
+            # Prefijo de nombre
+            name = names[row]
+            queries.append(name[:rng.randint(2, len(name))])
+        else:
+            # Texto con errores
+            queries.append(_word(rng, 3, 10))
+
+    return queries
+
+
+def main():
+
+    rng = random.Random(0)
+
+    print(f"{'symbols':>8}{'build s':>10}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+
+    for size in SIZES:
+
+        symbols, names = _listing(rng, size)
+
+        start = time.perf_counter()
+        universe = SymbolUniverse(symbols, names)
+        build = time.perf_counter() - start
+
+        latencies = []
+
+        for query in _queries(rng, symbols, names):
+
+            start = time.perf_counter()
+            universe.search(query)
+            latencies.append((time.perf_counter() - start) * 1e6)
+
+        p50, p99 = np.percentile(latencies, [50, 99])
+
+        print(f"{size:>8}{build:>10.2f}{p50:>10.1f}{p99:>10.1f}{max(latencies):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
-from unittest.mock import MagicMock, Mock, patch
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import numpy as np
 import pandas as pd
 import pytest
-from app.core.market import _cache
+from app.core.forecast import _forecast_cache, _warm_starts
+from app.core.kpi_stream import _accumulators
+from app.core.market import _cache, _last_error, _requests
+from app.core import scheduler
+from app.core.rate_limit import RateLimiter, TokenBucket
+from app.core.search import _index, _inflight as _search_inflight, _search_cache
+from app.core.stream import _channels
 from app.routes.finanzas_routes import router
 import app.services.finanzas_service as finanzas_service
 import app.main as main_app
@@ -39,6 +46,64 @@ def clear_cache():
     """Limpia cache antes de cada test"""
 
     _cache.clear()
+    _last_error.clear()
+    _forecast_cache.clear()
+    _warm_starts.clear()
+    _accumulators.clear()
+    finanzas_service._forecast_jobs.clear()
+    _channels.clear()
+    _requests.clear()
+    scheduler._calls.clear()
+    _search_cache.clear()
+    _index.clear()
+    _search_inflight.clear()
+
+
+@pytest.fixture(autouse=True)
+def unlimited_rate(monkeypatch):
+    """Cuota de Alpha sin límite salvo en sus propios tests"""
+
+    limiter = RateLimiter([TokenBucket(rate=1e9, capacity=1e9)])
+
+    monkeypatch.setattr("app.core.alpha_client._limiter", limiter)
+
+
+@pytest.fixture(autouse=True)
+def no_listing(monkeypatch):
+    """Sin listado local de símbolos salvo en sus propios tests"""
+
+    monkeypatch.setattr("app.core.search._universe", None)
+
+
+@pytest.fixture(autouse=True)
+def disable_store(monkeypatch):
+    """Sin almacén en disco salvo en sus propios tests"""
+
+    monkeypatch.setattr("app.core.store.STORE_PATH", None)
+
+
+@pytest.fixture(autouse=True)
+def thread_forecast_pool(monkeypatch):
+    """Pool de hilos en lugar de procesos (los mocks no se serializan)"""
+
+    executor = ThreadPoolExecutor(max_workers=2)
+
+    monkeypatch.setattr("app.core.forecast_pool._executor", executor)
+
+    yield executor
+
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def market_store(monkeypatch, tmp_path):
+    """Almacén SQLite temporal"""
+
+    path = tmp_path / "market.sqlite"
+
+    monkeypatch.setattr("app.core.store.STORE_PATH", str(path))
+
+    return path
 
 
 @pytest.fixture
@@ -82,6 +147,15 @@ def mock_prophet(monkeypatch):
     mock_model.make_future_dataframe.return_value = future_df
     mock_model.predict.return_value = forecast_df
 
+    # Parámetros MAP ajustados (formato de Prophet)
+    mock_model.params = {
+        "k": np.array([[0.1]]),
+        "m": np.array([[0.5]]),
+        "sigma_obs": np.array([[0.05]]),
+        "delta": np.zeros((1, 3)),
+        "beta": np.zeros((1, 4))
+    }
+
     mock_class = Mock(return_value=mock_model)
 
     monkeypatch.setattr(
@@ -169,7 +243,7 @@ def client(monkeypatch):
     # Mock del service
     # =========================
 
-    mock_service = Mock()
+    mock_service = AsyncMock()
 
     mock_service.market_data.return_value = {
         "symbol": "AAPL",
@@ -186,6 +260,12 @@ def client(monkeypatch):
         "kpis": {}
     }
 
+    mock_service.market_freshness.return_value = {
+        "version": "v1",
+        "max_age": 120,
+        "snapshot": {"version": "v1"}
+    }
+
     monkeypatch.setattr(
         "app.routes.finanzas_routes.finanzas_service",
         mock_service
@@ -217,7 +297,7 @@ def mock_dependencies(monkeypatch, sample_service_df):
     """
 
     # Mock get_market_data
-    mock_market = Mock(return_value=sample_service_df)
+    mock_market = AsyncMock(return_value=sample_service_df)
 
     monkeypatch.setattr(
         finanzas_service,
@@ -241,17 +321,22 @@ def mock_dependencies(monkeypatch, sample_service_df):
         mock_forecast
     )
 
-    # Mock calculate_kpis
+    # Mock get_market_snapshot (KPIs precalculados)
     mock_kpis_data = {
         "last_price": 105,
         "trend": "bullish"
     }
 
-    mock_kpis = Mock(return_value=mock_kpis_data)
+    mock_kpis = AsyncMock(return_value={
+        "data": sample_service_df,
+        "time": 1000.0,
+        "version": "v1",
+        "kpis": mock_kpis_data
+    })
 
     monkeypatch.setattr(
         finanzas_service,
-        "calculate_kpis",
+        "get_market_snapshot",
         mock_kpis
     )
 
@@ -280,7 +365,7 @@ def client_main(monkeypatch):
     """
 
     # Mock del service
-    mock_service = Mock()
+    mock_service = AsyncMock()
 
     mock_service.market_data.return_value = {
         "symbol": "AAPL",
@@ -297,6 +382,12 @@ def client_main(monkeypatch):
         "kpis": {}
     }
 
+    mock_service.market_freshness.return_value = {
+        "version": "v1",
+        "max_age": 120,
+        "snapshot": {"version": "v1"}
+    }
+
     # Patch del service dentro del router
     monkeypatch.setattr(
         "app.routes.finanzas_routes.finanzas_service",
@@ -425,7 +516,8 @@ def mock_gemini(mock_gemini_response):
 
     with patch.object(
         model,
-        "generate_content",
+        "generate_content_async",
+        new_callable=AsyncMock,
         return_value=mock_gemini_response
     ) as mock:
 
@@ -0,0 +1,138 @@
+import asyncio
+import httpx
+import pytest
+from app.core import alpha_client
+from app.core.alpha_client import ALPHA_URL, alpha_get, close_client, get_client
+from app.core.rate_limit import RateLimitedError, RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def mock_transport(monkeypatch):
+    """Cliente httpx con transporte simulado"""
+
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request)
+        return httpx.Response(200, json={"ok": True})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    monkeypatch.setattr(alpha_client, "_client", client)
+
+    return requests_seen
+
+
+def test_get_client_is_shared():
+    """El cliente HTTP se reutiliza entre llamadas"""
+
+    async def scenario():
+        first = get_client()
+        second = get_client()
+        await close_client()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is second
+    assert first.is_closed
+
+
+def test_alpha_get_sends_query(mock_transport):
+    """Debe enviar params y apikey a la URL de Alpha"""
+
+    result = asyncio.run(alpha_get({
+        "function": "SYMBOL_SEARCH",
+        "keywords": "tesla"
+    }))
+
+    assert result == {"ok": True}
+
+    request = mock_transport[0]
+
+    assert str(request.url).startswith(ALPHA_URL)
+    assert request.url.params["function"] == "SYMBOL_SEARCH"
+    assert request.url.params["keywords"] == "tesla"
+    assert "apikey" in request.url.params
+
+
+def test_alpha_get_bounded_concurrency(monkeypatch):
+    """No debe superar el máximo de peticiones simultáneas"""
+
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json={})
+
+    async def scenario():
+
+        monkeypatch.setattr(
+            alpha_client,
+            "_client",
+            httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        monkeypatch.setattr(alpha_client, "_semaphore", asyncio.Semaphore(2))
+
+        await asyncio.gather(*[
+            alpha_get({"function": "TIME_SERIES_DAILY"})
+            for _ in range(6)
+        ])
+
+        await close_client()
+
+    asyncio.run(scenario())
+
+    assert peak == 2
+
+
+def test_alpha_get_rate_limit_notice(monkeypatch):
+    """El aviso de cuota de Alpha se convierte en RateLimitedError"""
+
+    notice = {"Information": "We have detected your API key ... our standard API rate limit is 25 requests per day."}
+
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json=notice))
+    )
+
+    monkeypatch.setattr(alpha_client, "_client", client)
+
+    with pytest.raises(RateLimitedError) as exc:
+        asyncio.run(alpha_get({"function": "TIME_SERIES_DAILY"}))
+
+    assert exc.value.retry_after == alpha_client.RATE_LIMIT_RETRY_SECONDS
+
+
+def test_alpha_get_without_quota_skips_request(mock_transport, monkeypatch):
+    """Sin cupo responde 429 sin gastar una llamada"""
+
+    limiter = RateLimiter([TokenBucket(rate=1 / 60, capacity=1)])
+    monkeypatch.setattr(alpha_client, "_limiter", limiter)
+
+    async def scenario():
+        await alpha_get({"function": "SYMBOL_SEARCH"})
+        await alpha_get({"function": "SYMBOL_SEARCH"}, timeout=1)
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(scenario())
+
+    assert len(mock_transport) == 1
+
+
+def test_get_limiter_from_config(monkeypatch):
+    """Buckets por minuto y por día según la configuración"""
+
+    monkeypatch.setattr(alpha_client, "_limiter", None)
+
+    limiter = alpha_client.get_limiter()
+
+    assert [bucket.capacity for bucket in limiter.buckets] == [
+        alpha_client.ALPHA_CALLS_PER_MINUTE,
+        alpha_client.ALPHA_CALLS_PER_DAY
+    ]
+    assert alpha_client.get_limiter() is limiter
@@ -0,0 +1,127 @@
+import pytest
+from app.core.cache import LRUCache
+
+
+def test_get_and_set():
+    """Guarda y recupera valores"""
+
+    cache = LRUCache(max_entries=3)
+
+    cache["a"] = 1
+
+    assert cache["a"] == 1
+    assert cache.get("b") is None
+    assert "a" in cache
+    assert len(cache) == 1
+
+
+def test_peek_does_not_touch_stats_or_order():
+    """peek no cuenta hits ni cambia el orden LRU"""
+
+    cache = LRUCache(max_entries=2)
+
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert cache.peek("a") == 1
+    assert cache.peek("c") is None
+
+    cache["c"] = 3
+
+    assert "a" not in cache
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["misses"] == 0
+
+
+def test_missing_key_raises():
+    """__getitem__ sin la clave lanza KeyError"""
+
+    cache = LRUCache(max_entries=3)
+
+    with pytest.raises(KeyError):
+        cache["a"]
+
+
+def test_evicts_least_recently_used():
+    """Expulsa la entrada menos usada al superar max_entries"""
+
+    cache = LRUCache(max_entries=2)
+
+    cache["a"] = 1
+    cache["b"] = 2
+
+    # "a" pasa a ser la más reciente
+    cache.get("a")
+
+    cache["c"] = 3
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+
+def test_evicts_by_bytes():
+    """Expulsa entradas cuando se supera max_bytes"""
+
+    cache = LRUCache(max_entries=10, max_bytes=100, sizeof=lambda v: v)
+
+    cache["a"] = 60
+    cache["b"] = 30
+
+    assert cache.bytes == 90
+
+    cache["c"] = 40
+
+    assert "a" not in cache
+    assert cache.bytes == 70
+    assert cache.evictions == 1
+
+
+def test_replace_updates_bytes():
+    """Reemplazar una clave no duplica los bytes contados"""
+
+    cache = LRUCache(max_entries=10, sizeof=lambda v: v)
+
+    cache["a"] = 10
+    cache["a"] = 25
+
+    assert cache.bytes == 25
+    assert len(cache) == 1
+
+
+def test_pop_and_clear():
+    """pop y clear liberan bytes"""
+
+    cache = LRUCache(max_entries=10, sizeof=lambda v: v)
+
+    cache["a"] = 10
+    cache["b"] = 20
+
+    assert cache.pop("a") == 10
+    assert cache.pop("x") is None
+    assert cache.bytes == 20
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.bytes == 0
+
+
+def test_stats_counters():
+    """Cuenta hits, misses y evictions"""
+
+    cache = LRUCache(max_entries=1)
+
+    cache["a"] = 1
+    cache.get("a")
+    cache.get("b")
+    cache["b"] = 2
+
+    assert cache.stats() == {
+        "entries": 1,
+        "bytes": 0,
+        "hits": 1,
+        "misses": 1,
+        "evictions": 1
+    }
@@ -1,5 +1,17 @@
+import time
+import numpy as np
 import pandas as pd
-from app.core.forecast import run_forecast
+from app.core.forecast import (
+    FORECAST_CACHE_SECONDS,
+    WARM_START_MAX_NEW_ROWS,
+    get_cached_forecast,
+    remember_fit,
+    run_fast_forecast,
+    run_forecast,
+    series_fingerprint,
+    store_forecast,
+    warm_start_init
+)
 
 
 def test_run_forecast_basic(sample_forecast_df, mock_prophet):
@@ -93,3 +105,227 @@ def test_output_values(mock_prophet, sample_forecast_df):
     assert (result["yhat"] == 110).all()
     assert (result["yhat_upper"] == 115).all()
     assert (result["yhat_lower"] == 105).all()
+
+
+# ============================
+# Tests cache de pronósticos
+# ============================
+
+def _forecast_result(history, periods):
+
+    return pd.DataFrame({
+        "ds": pd.date_range("2024-01-01", periods=history + periods),
+        "yhat": range(history + periods),
+        "yhat_upper": range(history + periods),
+        "yhat_lower": range(history + periods),
+    })
+
+
+def test_series_fingerprint_changes_with_data(sample_forecast_df):
+    """La huella cambia si cambia la serie"""
+
+    close = sample_forecast_df["4. close"]
+
+    changed = close.copy()
+    changed.iloc[-1] = 999
+
+    assert series_fingerprint(close) == series_fingerprint(close.copy())
+    assert series_fingerprint(close) != series_fingerprint(changed)
+
+
+def test_cached_forecast_miss():
+    """Sin entrada no hay pronóstico"""
+
+    assert get_cached_forecast("AAPL", "abc", 30) is None
+
+
+def test_cached_forecast_same_periods():
+    """Mismo horizonte devuelve el resultado guardado"""
+
+    result = _forecast_result(5, 30)
+
+    store_forecast("AAPL", "abc", 30, result)
+
+    assert get_cached_forecast("AAPL", "abc", 30) is result
+    assert get_cached_forecast("AAPL", "other", 30) is None
+    assert get_cached_forecast("TSLA", "abc", 30) is None
+
+
+def test_cached_forecast_slices_shorter_periods():
+    """Un horizonte largo sirve a uno más corto recortando"""
+
+    store_forecast("AAPL", "abc", 60, _forecast_result(5, 60))
+
+    result = get_cached_forecast("AAPL", "abc", 30)
+
+    assert len(result) == 5 + 30
+    assert result["ds"].iloc[-1] == pd.Timestamp("2024-01-01") + pd.Timedelta(days=34)
+
+    # Horizonte mayor al guardado: no sirve
+    assert get_cached_forecast("AAPL", "abc", 90) is None
+
+
+def test_store_forecast_keeps_longest_horizon():
+    """Guardar un horizonte más corto no pisa uno más largo"""
+
+    store_forecast("AAPL", "abc", 60, _forecast_result(5, 60))
+    store_forecast("AAPL", "abc", 30, _forecast_result(5, 30))
+
+    assert len(get_cached_forecast("AAPL", "abc", 60)) == 65
+
+
+def test_cached_forecast_expires(monkeypatch):
+    """Expira pasado FORECAST_CACHE_SECONDS"""
+
+    monkeypatch.setattr(time, "time", lambda: 1000)
+
+    store_forecast("AAPL", "abc", 30, _forecast_result(5, 30))
+
+    monkeypatch.setattr(time, "time", lambda: 1000 + FORECAST_CACHE_SECONDS + 1)
+
+    assert get_cached_forecast("AAPL", "abc", 30) is None
+
+
+# ============================
+# Tests warm start
+# ============================
+
+def _closes(start, values):
+
+    return pd.DataFrame(
+        {"4. close": values},
+        index=pd.date_range(start, periods=len(values))
+    )
+
+
+def test_run_forecast_attaches_params(mock_prophet, sample_forecast_df):
+    """El resultado lleva los parámetros del ajuste"""
+
+    result = run_forecast(sample_forecast_df)
+
+    params = result.attrs["prophet_params"]
+
+    assert params["k"] == 0.1
+    assert params["sigma_obs"] == 0.05
+    assert len(params["delta"]) == 3
+
+
+def test_run_forecast_warm_start_init(mock_prophet, sample_forecast_df):
+    """Con init se pasa a fit como punto de partida"""
+
+    _, mock_model = mock_prophet
+
+    init = {"k": 0.2}
+
+    run_forecast(sample_forecast_df, init=init)
+
+    assert mock_model.fit.call_args.kwargs == {"init": init}
+
+
+def test_run_forecast_warm_start_fallback(mock_prophet, sample_forecast_df):
+    """Si el init no encaja se hace un ajuste en frío"""
+
+    mock_class, mock_model = mock_prophet
+
+    mock_model.fit.side_effect = [ValueError("bad init"), None]
+
+    result = run_forecast(sample_forecast_df, init={"k": 0.2})
+
+    assert len(result) == 30
+    assert mock_class.call_count == 2
+    assert mock_model.fit.call_args.kwargs == {}
+
+
+def test_warm_start_init_after_small_update(mock_prophet):
+    """Pocos días nuevos reutilizan los parámetros anteriores"""
+
+    previous = _closes("2024-01-01", [100.0, 101.0, 102.0])
+    result = run_forecast(previous)
+
+    remember_fit("AAPL", previous, result)
+
+    updated = _closes("2024-01-02", [101.0, 102.0, 103.0])
+
+    assert warm_start_init("AAPL", updated) is result.attrs["prophet_params"]
+    assert warm_start_init("TSLA", updated) is None
+
+
+def test_warm_start_init_structural_change(mock_prophet):
+    """Cambios estructurales obligan a un ajuste en frío"""
+
+    previous = _closes("2024-01-01", [100.0, 101.0, 102.0])
+
+    remember_fit("AAPL", previous, run_forecast(previous))
+
+    # Demasiados días nuevos
+    many = _closes("2024-01-01", [100.0] * (3 + WARM_START_MAX_NEW_ROWS + 1))
+    assert warm_start_init("AAPL", many) is None
+
+    # Serie anterior corregida (p.ej. split)
+    split = _closes("2024-01-01", [50.0, 50.5, 51.0, 51.5])
+    assert warm_start_init("AAPL", split) is None
+
+    # Sin solape con el último ajuste
+    gap = _closes("2024-02-01", [102.0, 103.0])
+    assert warm_start_init("AAPL", gap) is None
+
+    # Salto de nivel
+    jump = _closes("2024-01-01", [100.0, 101.0, 102.0, 150.0])
+    assert warm_start_init("AAPL", jump) is None
+
+
+# ============================
+# Tests motor rápido
+# ============================
+
+def test_run_fast_forecast_schema(sample_forecast_df):
+    """Mismo formato que Prophet: historia + periods días"""
+
+    result = run_fast_forecast(sample_forecast_df, periods=10)
+
+    assert list(result.columns) == ["ds", "yhat", "yhat_upper", "yhat_lower"]
+    assert len(result) == 5 + 10
+
+    assert result["ds"].iloc[5] == pd.Timestamp("2024-01-06")
+    assert result["ds"].iloc[-1] == pd.Timestamp("2024-01-15")
+
+
+def test_run_fast_forecast_follows_trend(bullish_df, bearish_df):
+    """Extrapola la tendencia lineal"""
+
+    up = run_fast_forecast(bullish_df, periods=10)
+    down = run_fast_forecast(bearish_df, periods=10)
+
+    assert up["yhat"].iloc[-1] > bullish_df["4. close"].iloc[-1]
+    assert down["yhat"].iloc[-1] < bearish_df["4. close"].iloc[-1]
+
+
+def test_run_fast_forecast_intervals(bullish_df):
+    """Intervalos ordenados y más anchos al alejarse"""
+
+    noise = np.sin(np.arange(len(bullish_df)))
+
+    df = bullish_df.assign(**{"4. close": bullish_df["4. close"] + noise})
+
+    result = run_fast_forecast(df, periods=30)
+
+    assert (result["yhat_lower"] <= result["yhat"]).all()
+    assert (result["yhat"] <= result["yhat_upper"]).all()
+
+    width = result["yhat_upper"] - result["yhat_lower"]
+
+    assert width.iloc[-1] > width.iloc[len(df)]
+
+
+def test_run_fast_forecast_skips_nan():
+    """Valores NaN no rompen el ajuste"""
+
+    df = pd.DataFrame(
+        {"4. close": [100.0, np.nan, 102.0, 103.0]},
+        index=pd.date_range("2024-01-01", periods=4)
+    )
+
+    result = run_fast_forecast(df, periods=2)
+
+    assert len(result) == 3 + 2
+    assert result["yhat"].notna().all()
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.core import forecast_pool
+from app.core.forecast_pool import (
+    ForecastTimeoutError,
+    PoolSaturatedError,
+    pool_stats,
+    shutdown,
+    submit
+)
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    """Pool con 1 worker y cola de 1"""
+
+    monkeypatch.setattr(forecast_pool, "FORECAST_WORKERS", 1)
+    monkeypatch.setattr(forecast_pool, "FORECAST_QUEUE_SIZE", 1)
+    monkeypatch.setattr(forecast_pool, "_rejected", 0)
+
+
+def test_submit_returns_result():
+    """Ejecuta la función en el pool y devuelve su resultado"""
+
+    result = asyncio.run(submit(sum, [1, 2, 3]))
+
+    assert result == 6
+    assert pool_stats()["pending"] == 0
+
+
+def test_submit_propagates_error():
+    """Errores del worker llegan al llamador"""
+
+    def fail():
+        raise ValueError("bad data")
+
+    with pytest.raises(ValueError):
+        asyncio.run(submit(fail))
+
+    assert pool_stats()["pending"] == 0
+
+
+def test_submit_rejects_when_saturated(small_pool):
+    """Con el pool lleno se rechaza en lugar de encolar"""
+
+    release = threading.Event()
+
+    async def scenario():
+
+        running = [
+            asyncio.create_task(submit(release.wait, 5))
+            for _ in range(2)
+        ]
+
+        await asyncio.sleep(0)
+
+        with pytest.raises(PoolSaturatedError):
+            await submit(sum, [1])
+
+        release.set()
+
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(scenario()) == [True, True]
+
+    stats = pool_stats()
+
+    assert stats["rejected"] == 1
+    assert stats["capacity"] == 2
+
+
+def test_submit_timeout(monkeypatch):
+    """Trabajo que supera FORECAST_TIMEOUT falla con timeout"""
+
+    monkeypatch.setattr(forecast_pool, "FORECAST_TIMEOUT", 0.01)
+
+    release = threading.Event()
+
+    with pytest.raises(ForecastTimeoutError):
+        asyncio.run(submit(release.wait, 5))
+
+    release.set()
+
+
+class BrokenExecutor:
+    """Executor cuyo worker murió"""
+
+    def __init__(self, fail_on_submit):
+        self.fail_on_submit = fail_on_submit
+        self.closed = False
+
+    def submit(self, fn, *args):
+
+        if self.fail_on_submit:
+            raise BrokenProcessPool("worker died")
+
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.closed = True
+
+
+@pytest.mark.parametrize("fail_on_submit", [True, False])
+def test_broken_pool_is_discarded(monkeypatch, fail_on_submit):
+    """Con el pool roto se descarta para crear uno nuevo en el siguiente submit"""
+
+    executor = BrokenExecutor(fail_on_submit)
+
+    monkeypatch.setattr(forecast_pool, "_executor", executor)
+
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(submit(sum, [1]))
+
+    assert forecast_pool._executor is None
+    assert executor.closed
+    assert pool_stats()["pending"] == 0
+
+
+def test_process_pool(monkeypatch):
+    """Con el pool real los trabajos corren en otro proceso"""
+
+    monkeypatch.setattr(forecast_pool, "_executor", None)
+
+    try:
+        assert asyncio.run(submit(sum, [4, 5])) == 9
+
+    finally:
+        shutdown()
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.indicators import INDICATORS, _Intermediates, calculate_indicators
+
+
+@pytest.fixture
+def ohlcv_df():
+    """Serie OHLCV aleatoria de 120 días"""
+
+    rng = np.random.default_rng(7)
+
+    close = 100 + np.cumsum(rng.normal(0, 1, 120))
+
+    return pd.DataFrame(
+        {
+            "1. open": close,
+            "2. high": close + rng.uniform(0.5, 2, 120),
+            "3. low": close - rng.uniform(0.5, 2, 120),
+            "4. close": close,
+            "5. volume": rng.integers(100_000, 1_000_000, 120).astype(float)
+        },
+        index=pd.bdate_range("2024-01-01", periods=120)
+    )
+
+
+def test_all_indicators_by_default(ohlcv_df):
+    """Sin selección devuelve todos los indicadores"""
+
+    result = calculate_indicators(ohlcv_df)
+
+    assert list(result) == list(INDICATORS)
+
+
+def test_subset_selection(ohlcv_df):
+    """Solo calcula los indicadores pedidos"""
+
+    result = calculate_indicators(ohlcv_df, ["rsi_wilder", "macd"])
+
+    assert list(result) == ["rsi_wilder", "macd"]
+
+
+def test_unknown_indicator(ohlcv_df):
+    """Nombre desconocido genera error"""
+
+    with pytest.raises(ValueError):
+        calculate_indicators(ohlcv_df, ["foo"])
+
+
+def test_macd_matches_pandas(ohlcv_df):
+    """MACD 12/26/9 con EMA"""
+
+    close = ohlcv_df["4. close"]
+
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+
+    result = calculate_indicators(ohlcv_df, ["macd"])["macd"]
+
+    assert result["macd"] == round(macd.iloc[-1], 2)
+    assert result["signal"] == round(signal.iloc[-1], 2)
+
+
+def test_rsi_wilder_bounds(ohlcv_df, bullish_df):
+    """RSI de Wilder entre 0 y 100; 100 sin pérdidas"""
+
+    rsi = calculate_indicators(ohlcv_df, ["rsi_wilder"])["rsi_wilder"]["rsi_14"]
+
+    assert 0 <= rsi <= 100
+
+    assert calculate_indicators(bullish_df, ["rsi_wilder"])["rsi_wilder"]["rsi_14"] == 100
+
+
+def test_bollinger_bands(ohlcv_df):
+    """Bandas simétricas alrededor de la media de 20"""
+
+    close = ohlcv_df["4. close"]
+
+    result = calculate_indicators(ohlcv_df, ["bollinger"])["bollinger"]
+
+    assert result["middle"] == round(close.tail(20).mean(), 2)
+    assert result["upper"] > result["middle"] > result["lower"]
+
+
+def test_atr_positive(ohlcv_df):
+    """ATR positivo con high/low"""
+
+    assert calculate_indicators(ohlcv_df, ["atr"])["atr"]["atr_14"] > 0
+
+
+def test_obv_matches_definition(ohlcv_df):
+    """OBV suma o resta el volumen según el cierre"""
+
+    close = ohlcv_df["4. close"].to_numpy()
+    volume = ohlcv_df["5. volume"].to_numpy()
+
+    expected = (np.sign(np.diff(close)) * volume[1:]).sum()
+
+    assert calculate_indicators(ohlcv_df, ["obv"])["obv"]["obv"] == round(expected, 2)
+
+
+def test_sharpe_and_sortino(bullish_df, bearish_df):
+    """Signo según la tendencia; sin pérdidas el Sortino no está definido"""
+
+    bull = calculate_indicators(bullish_df, ["sharpe", "sortino"])
+    bear = calculate_indicators(bearish_df, ["sharpe", "sortino"])
+
+    assert bull["sharpe"]["sharpe"] > 0
+    assert bull["sortino"]["sortino"] is None
+    assert bear["sharpe"]["sharpe"] < 0
+    assert bear["sortino"]["sortino"] < 0
+
+
+def test_missing_columns(bullish_df):
+    """ATR y OBV necesitan high/low y volumen"""
+
+    with pytest.raises(ValueError):
+        calculate_indicators(bullish_df, ["atr"])
+
+    with pytest.raises(ValueError):
+        calculate_indicators(bullish_df, ["obv"])
+
+
+def test_short_series_returns_none(ohlcv_df):
+    """Ventanas sin datos suficientes devuelven None"""
+
+    result = calculate_indicators(ohlcv_df.head(5), ["bollinger", "rsi_wilder"])
+
+    assert result["bollinger"]["middle"] is None
+    assert result["rsi_wilder"]["rsi_14"] is None
+
+
+def test_intermediates_computed_once(ohlcv_df):
+    """Rendimientos y EMAs se comparten entre indicadores"""
+
+    data = _Intermediates(ohlcv_df)
+
+    assert data.returns is data.returns
+    assert data.ema(12) is data.ema(12)
@@ -1,5 +1,15 @@
-from unittest.mock import MagicMock, patch
-from app.core.insights import _make_key, generate_kpi_insight, _ai_cache, CACHE_TTL, model
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from app.core.insights import (
+    _make_key,
+    generate_kpi_insight,
+    insight_stats,
+    InsightTimeoutError,
+    _ai_cache,
+    CACHE_TTL,
+    model
+)
 
 # ============================
 # TEST _make_key
@@ -32,11 +42,11 @@ def test_generate_kpi_insight_calls_gemini(
 
     mock_time.return_value = 1000.0
 
-    result = generate_kpi_insight(
+    result = asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "AAPL"
-    )
+    ))
 
     assert result == "This KPI indicates low risk."
 
@@ -64,20 +74,20 @@ def test_generate_kpi_insight_uses_cache(
     # Primera llamada
     mock_time.return_value = 1000.0
 
-    first = generate_kpi_insight(
+    first = asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "AAPL"
-    )
+    ))
 
     # Segunda llamada dentro TTL
     mock_time.return_value = 1000.0 + 10
 
-    second = generate_kpi_insight(
+    second = asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "AAPL"
-    )
+    ))
 
     assert first == second
 
@@ -101,22 +111,22 @@ def test_generate_kpi_insight_cache_expired(
     # Primera llamada
     mock_time.return_value = 1000.0
 
-    generate_kpi_insight(
+    asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "AAPL"
-    )
+    ))
 
     # Simular expiración
     mock_time.return_value = (
         1000.0 + CACHE_TTL + 1
     )
 
-    generate_kpi_insight(
+    asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "AAPL"
-    )
+    ))
 
     # Gemini llamado 2 veces
     assert mock_gemini.call_count == 2
@@ -137,23 +147,23 @@ def test_generate_kpi_insight_multiple_keys(
 
     mock_time.return_value = 1000.0
 
-    generate_kpi_insight(
+    asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "AAPL"
-    )
+    ))
 
-    generate_kpi_insight(
+    asyncio.run(generate_kpi_insight(
         "RSI",
         "60.1",
         "AAPL"
-    )
+    ))
 
-    generate_kpi_insight(
+    asyncio.run(generate_kpi_insight(
         "RSI",
         "55.2",
         "TSLA"
-    )
+    ))
 
     # 3 keys distintas
     assert len(_ai_cache) == 3
@@ -178,16 +188,93 @@ def test_generate_kpi_insight_strips_text(
 
     with patch.object(
         model,
-        "generate_content",
+        "generate_content_async",
+        new_callable=AsyncMock,
         return_value=dirty_response
     ):
 
         mock_time.return_value = 1000
 
-        result = generate_kpi_insight(
+        result = asyncio.run(generate_kpi_insight(
             "RSI",
             "55",
             "AAPL"
-        )
+        ))
+
+        assert result == "Hello Investor"
+
+# ============================
+# TEST CONCURRENCIA Y TIMEOUT
+# ============================
+
+
+def test_generate_kpi_insight_bounded_concurrency(monkeypatch):
+    """
+    No supera el máximo de llamadas simultáneas y reporta la cola
+    """
+
+    monkeypatch.setattr("app.core.insights._semaphore", None)
+    monkeypatch.setattr("app.core.insights.INSIGHT_MAX_CONCURRENCY", 2)
+
+    active = 0
+    peak = 0
+    waiting = []
+
+    async def slow_generate(prompt, **kwargs):
+
+        nonlocal active, peak
+
+        active += 1
+        peak = max(peak, active)
+        waiting.append(insight_stats()["waiting"])
+
+        await asyncio.sleep(0.01)
+
+        active -= 1
+
+        response = MagicMock()
+        response.text = "ok"
+
+        return response
+
+    async def scenario():
+
+        return await asyncio.gather(*[
+            generate_kpi_insight("RSI", str(value), "AAPL")
+            for value in range(6)
+        ])
+
+    with patch.object(model, "generate_content_async", side_effect=slow_generate):
+        results = asyncio.run(scenario())
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+    assert max(waiting) == 4
+
+    stats = insight_stats()
+
+    assert stats["waiting"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_generate_kpi_insight_timeout(monkeypatch):
+    """
+    Si Gemini no responde a tiempo lanza InsightTimeoutError
+    """
+
+    monkeypatch.setattr("app.core.insights._semaphore", None)
+    monkeypatch.setattr("app.core.insights.INSIGHT_TIMEOUT", 0.01)
+
+    async def hang(prompt, **kwargs):
+        await asyncio.sleep(1)
+
+    timeouts = insight_stats()["timeouts"]
+
+    with patch.object(model, "generate_content_async", side_effect=hang):
+
+        with pytest.raises(InsightTimeoutError):
+            asyncio.run(generate_kpi_insight("RSI", "55", "AAPL"))
 
-        assert result == "Hello Investor"
\ No newline at end of file
+    assert insight_stats()["timeouts"] == timeouts + 1
+    assert insight_stats()["in_flight"] == 0
+    assert "AAPL:RSI:55" not in _ai_cache
@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import AsyncMock
+from app.core.jobs import DONE, FAILED, PENDING, JobStore
+
+
+def test_submit_runs_work():
+    """El trabajo se ejecuta y guarda su resultado"""
+
+    store = JobStore(max_jobs=10)
+    work = AsyncMock(return_value={"ok": True})
+
+    async def scenario():
+
+        job = store.submit("key", work)
+
+        assert job["status"] == PENDING
+
+        await job["task"]
+
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert job["status"] == DONE
+    assert job["result"] == {"ok": True}
+    assert store.get(job["id"]) is job
+
+
+def test_submit_deduplicates_same_key():
+    """Misma clave devuelve el trabajo existente"""
+
+    store = JobStore(max_jobs=10)
+    work = AsyncMock(return_value=1)
+
+    async def scenario():
+
+        first = store.submit("key", work)
+        second = store.submit("key", work)
+        other = store.submit("other", work)
+
+        await asyncio.gather(first["task"], other["task"])
+
+        # Ya terminado: se sigue reutilizando
+        third = store.submit("key", work)
+
+        return first, second, other, third
+
+    first, second, other, third = asyncio.run(scenario())
+
+    assert first is second is third
+    assert other is not first
+    assert work.call_count == 2
+
+
+def test_failed_job_is_retried():
+    """Un trabajo fallido guarda el error y no bloquea reintentos"""
+
+    store = JobStore(max_jobs=10)
+    work = AsyncMock(side_effect=[Exception("Alpha error"), 5])
+
+    async def scenario():
+
+        first = store.submit("key", work)
+        await first["task"]
+
+        second = store.submit("key", work)
+        await second["task"]
+
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["status"] == FAILED
+    assert first["error"] == "Alpha error"
+    assert first["error_type"] == "Exception"
+
+    assert second is not first
+    assert second["result"] == 5
+
+
+def test_store_is_bounded():
+    """Solo se conservan los últimos max_jobs trabajos"""
+
+    store = JobStore(max_jobs=2)
+
+    async def scenario():
+
+        jobs = [
+            store.submit(i, AsyncMock(return_value=i))
+            for i in range(3)
+        ]
+
+        await asyncio.gather(*[job["task"] for job in jobs])
+
+        return jobs
+
+    jobs = asyncio.run(scenario())
+
+    assert store.get(jobs[0]["id"]) is None
+    assert store.get(jobs[2]["id"]) is jobs[2]
+
+
+def test_get_unknown_job():
+    """Id desconocido devuelve None"""
+
+    assert JobStore(max_jobs=2).get("nope") is None
@@ -0,0 +1,200 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.kpi_stream import KPIAccumulator, get_streaming_kpis
+from app.core.kpis import calculate_kpis
+
+
+def _series(rows, seed=3):
+
+    rng = np.random.default_rng(seed)
+
+    return pd.Series(
+        100 + np.cumsum(rng.normal(0, 1, rows)),
+        index=pd.bdate_range("2024-01-01", periods=rows)
+    )
+
+
+def _assert_matches(close, kpis):
+    """Mismos KPIs que calculate_kpis (salvo error de redondeo)"""
+
+    expected = calculate_kpis(pd.DataFrame({"4. close": close}))
+
+    assert set(kpis) == set(expected)
+
+    for key, value in expected.items():
+
+        if isinstance(value, str):
+            assert kpis[key] == value
+        elif math.isnan(value):
+            assert math.isnan(kpis[key])
+        else:
+            assert kpis[key] == pytest.approx(value, abs=0.011)
+
+
+@pytest.mark.parametrize("rows", [1, 5, 14, 20, 50, 120])
+def test_from_series_matches_calculate_kpis(rows):
+    """Construido de una vez coincide con calculate_kpis"""
+
+    close = _series(rows)
+
+    _assert_matches(close, KPIAccumulator.from_series(close).kpis())
+
+
+def test_known_fixtures(bullish_df, bearish_df, flat_df):
+    """Tendencias y volatilidad de los fixtures"""
+
+    for df in (bullish_df, bearish_df, flat_df):
+
+        close = df["4. close"]
+
+        _assert_matches(close, KPIAccumulator.from_series(close).kpis())
+
+
+def test_nan_values():
+    """NaN intermedios se tratan como en pandas"""
+
+    close = _series(80)
+    close.iloc[30] = np.nan
+
+    _assert_matches(close, KPIAccumulator.from_series(close).kpis())
+
+
+def test_from_series_matches_bar_by_bar():
+    """El arranque vectorizado deja el mismo estado que push barra a barra"""
+
+    close = _series(120)
+    close.iloc[[0, 40, 119]] = np.nan
+
+    built = KPIAccumulator.from_series(close.iloc[:100])
+
+    pushed = KPIAccumulator()
+
+    for date, value in close.iloc[:100].items():
+        pushed.push(date, float(value))
+
+    assert built.extend(close)
+
+    for date, value in close.iloc[100:].items():
+        pushed.push(date, float(value))
+
+    assert built.kpis() == pytest.approx(pushed.kpis(), nan_ok=True)
+    assert built.running_max == pushed.running_max
+
+
+def test_extend_appends_new_bars():
+    """Agregar barras nuevas actualiza los KPIs"""
+
+    close = _series(200)
+
+    accumulator = KPIAccumulator.from_series(close.iloc[:100])
+
+    for end in range(101, 200, 9):
+
+        assert accumulator.extend(close.iloc[:end])
+
+        _assert_matches(close.iloc[:end], accumulator.kpis())
+
+
+def test_extend_revised_last_bar():
+    """La última barra puede corregirse (dato intradía)"""
+
+    close = _series(100)
+
+    accumulator = KPIAccumulator.from_series(close)
+
+    revised = close.copy()
+    revised.iloc[-1] += 5
+
+    assert accumulator.extend(revised)
+    _assert_matches(revised, accumulator.kpis())
+
+    # Otra corrección más una barra nueva
+    more = _series(101)
+    more.iloc[-2] -= 3
+
+    assert accumulator.extend(more)
+    _assert_matches(more, accumulator.kpis())
+
+
+def test_extend_sliding_window():
+    """Ventana de 100 barras que avanza un día (compact de Alpha)"""
+
+    close = _series(160)
+
+    accumulator = KPIAccumulator.from_series(close.iloc[:100])
+
+    for end in range(101, 161):
+
+        window = close.iloc[end - 100:end]
+
+        assert accumulator.extend(window)
+
+        _assert_matches(window, accumulator.kpis())
+
+    assert len(accumulator.closes) == 100
+
+
+def test_extend_sliding_window_new_peak_leaves():
+    """Si sale el máximo de la ventana el drawdown se recalcula"""
+
+    close = _series(120)
+    close.iloc[0] = close.max() + 50
+
+    accumulator = KPIAccumulator.from_series(close.iloc[:100])
+
+    assert accumulator.extend(close.iloc[5:105])
+
+    _assert_matches(close.iloc[5:105], accumulator.kpis())
+
+
+def test_extend_sliding_window_with_nan_and_revision():
+    """NaN en la barra que sale y corrección de la última barra"""
+
+    close = _series(110)
+    close.iloc[[1, 3]] = np.nan
+
+    accumulator = KPIAccumulator.from_series(close.iloc[:100])
+
+    revised = close.iloc[3:102].copy()
+    revised.iloc[-2] += 4
+
+    assert accumulator.extend(revised)
+
+    _assert_matches(revised, accumulator.kpis())
+
+
+def test_extend_rejects_other_history():
+    """Con otra historia pide reconstruir"""
+
+    close = _series(100)
+
+    accumulator = KPIAccumulator.from_series(close)
+
+    # Empieza antes que la historia conocida
+    assert not accumulator.extend(pd.concat([_series(1).shift(-1, freq="D"), close]))
+
+    # Sin la última barra conocida
+    assert not accumulator.extend(close.iloc[:50])
+
+    # Ventana desplazada demasiado corta para las medias de 50
+    assert not accumulator.extend(_series(103).iloc[60:])
+
+
+def test_get_streaming_kpis_reuses_accumulator(monkeypatch):
+    """El acumulador por símbolo solo procesa lo nuevo"""
+
+    close = _series(120)
+
+    get_streaming_kpis("AAPL", pd.DataFrame({"4. close": close.iloc[:100]}))
+
+    # Construir de nuevo no debe ser necesario
+    def fail(*args):
+        raise AssertionError("rebuilt")
+
+    monkeypatch.setattr(KPIAccumulator, "from_series", classmethod(fail))
+
+    kpis = get_streaming_kpis("AAPL", pd.DataFrame({"4. close": close}))
+
+    _assert_matches(close, kpis)
@@ -1,7 +1,8 @@
+import json
 import numpy as np
 import pandas as pd
 import pytest
-from app.core.kpis import calculate_kpis
+from app.core.kpis import _scan_loop, _scan_numpy, calculate_kpis, calculate_kpis_batch
 
 
 def test_calculate_kpis_returns_dict(bullish_df):
@@ -177,4 +178,144 @@ def test_rounding_precision(bullish_df):
         if isinstance(value, float):
 
             text = f"{value:.2f}"
-            assert float(text) == value
\ No newline at end of file
+            assert float(text) == value
+
+# ============================
+# Tests calculate_kpis_batch
+# ============================
+
+def _assert_same_kpis(single, batch):
+
+    assert set(single) == set(batch)
+
+    for key, value in single.items():
+
+        # El batch se serializa a JSON: NaN sale como None
+        if isinstance(value, float) and np.isnan(value):
+            assert batch[key] is None
+        else:
+            assert batch[key] == value
+
+
+def test_batch_matches_single(bullish_df, bearish_df, flat_df):
+    """Cada símbolo obtiene los mismos KPIs que calculate_kpis"""
+
+    frames = {
+        "UP": bullish_df,
+        "DOWN": bearish_df,
+        "FLAT": flat_df
+    }
+
+    result = calculate_kpis_batch({
+        symbol: df["4. close"] for symbol, df in frames.items()
+    })
+
+    assert list(result) == ["UP", "DOWN", "FLAT"]
+
+    for symbol, df in frames.items():
+        _assert_same_kpis(calculate_kpis(df), result[symbol])
+
+
+def test_batch_different_lengths(bullish_df):
+    """Series de distinto largo se alinean por su último dato"""
+
+    rng = np.random.default_rng(7)
+
+    long_close = pd.Series(
+        100 + np.cumsum(rng.normal(0, 1, 120)),
+        index=pd.date_range("2024-01-01", periods=120)
+    )
+
+    short_close = bullish_df["4. close"].iloc[-5:]
+
+    result = calculate_kpis_batch({
+        "LONG": long_close,
+        "SHORT": short_close
+    })
+
+    _assert_same_kpis(
+        calculate_kpis(pd.DataFrame({"4. close": long_close})),
+        result["LONG"]
+    )
+    _assert_same_kpis(
+        calculate_kpis(pd.DataFrame({"4. close": short_close})),
+        result["SHORT"]
+    )
+
+
+def test_batch_nan_values(bullish_df):
+    """NaN intermedios dan el mismo resultado que el cálculo individual"""
+
+    close = bullish_df["4. close"].copy()
+    close.iloc[10] = np.nan
+
+    result = calculate_kpis_batch({"AAPL": close})
+
+    _assert_same_kpis(
+        calculate_kpis(pd.DataFrame({"4. close": close})),
+        result["AAPL"]
+    )
+
+
+def test_batch_short_and_flat_are_json_safe(bullish_df, flat_df):
+    """Serie corta (sin ma_50) y plana (RSI 0/0) no dejan NaN"""
+
+    result = calculate_kpis_batch({
+        "SHORT": bullish_df["4. close"].iloc[-10:],
+        "FLAT": flat_df["4. close"]
+    })
+
+    assert result["SHORT"]["ma_50"] is None
+    assert result["FLAT"]["rsi_14"] is None
+    assert result["SHORT"]["trend"] == "bearish"
+
+    json.dumps(result, allow_nan=False)
+
+
+# ============================
+# Tests kernel NumPy
+# ============================
+
+@pytest.mark.parametrize("nan_at", [None, 0, 25])
+def test_scan_loop_matches_numpy(nan_at):
+    """El recorrido para Numba y la versión NumPy coinciden"""
+
+    rng = np.random.default_rng(11)
+
+    close = 100 + np.cumsum(rng.normal(0, 1, 60))
+
+    if nan_at is not None:
+        close[nan_at] = np.nan
+
+    count, mean, m2, drawdown = _scan_loop(close)
+    expected = _scan_numpy(close)
+
+    assert count == expected[0]
+    assert mean == pytest.approx(expected[1])
+    assert m2 == pytest.approx(expected[2])
+    assert drawdown == pytest.approx(expected[3])
+
+
+def test_kernel_matches_pandas_pipeline(bullish_df):
+    """Mismos valores que el cálculo con objetos rolling de pandas"""
+
+    rng = np.random.default_rng(13)
+
+    close = pd.Series(100 + np.cumsum(rng.normal(0, 1, 300)))
+
+    result = calculate_kpis(pd.DataFrame({"4. close": close}))
+
+    returns = close.pct_change().dropna()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean().iloc[-1]
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean().iloc[-1]
+
+    drawdown = (close - close.cummax()) / close.cummax()
+
+    assert result["daily_return_pct"] == round(returns.mean() * 100, 2)
+    assert result["volatility_pct"] == round(returns.std() * 100, 2)
+    assert result["ma_20"] == round(close.rolling(20).mean().iloc[-1], 2)
+    assert result["ma_50"] == round(close.rolling(50).mean().iloc[-1], 2)
+    assert result["rsi_14"] == round(100 - 100 / (1 + gain / loss), 2)
+    assert result["max_drawdown_pct"] == round(drawdown.min() * 100, 2)
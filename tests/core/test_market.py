@@ -1,11 +1,32 @@
+import asyncio
 import time
-from unittest.mock import Mock
+import httpx
+from unittest.mock import AsyncMock, Mock
 from app.core.market import (
     _fetch_from_alpha,
+    _snapshot,
+    InvalidSymbolError,
+    cache_stats,
+    can_refresh,
+    data_version,
     get_market_data,
+    get_market_snapshot,
+    slice_market,
+    popular_symbols,
+    prefetch,
     _cache,
-    CACHE_SECONDS
+    _inflight,
+    _last_error,
+    _requests,
+    CACHE_SECONDS,
+    ERROR_BACKOFF_SECONDS,
+    MAX_STALE_SECONDS
 )
+from app.core.kpi_stream import KPIAccumulator
+from app.core.kpis import calculate_kpis
+from app.core.rate_limit import BACKGROUND, INTERACTIVE, RateLimitedError, RateLimiter, TokenBucket
+from app.core.store import load_series, merge_series
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -16,15 +37,11 @@ import pytest
 def test_fetch_from_alpha_ok(monkeypatch, alpha_response_ok):
     """Debe devolver DataFrame válido"""
 
-    mock_response = Mock()
-    mock_response.json.return_value = alpha_response_ok
+    mock_get = AsyncMock(return_value=alpha_response_ok)
 
-    def mock_get(*args, **kwargs):
-        return mock_response
+    monkeypatch.setattr("app.core.market.alpha_get", mock_get)
 
-    monkeypatch.setattr("requests.get", mock_get)
-
-    df = _fetch_from_alpha("AAPL")
+    df = asyncio.run(_fetch_from_alpha("AAPL"))
 
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 2
@@ -35,19 +52,36 @@ def test_fetch_from_alpha_ok(monkeypatch, alpha_response_ok):
     # Valores float
     assert df["4. close"].dtype == float
 
+    params = mock_get.call_args[0][0]
+
+    assert params["function"] == "TIME_SERIES_DAILY"
+    assert params["symbol"] == "AAPL"
+
 
 def test_fetch_from_alpha_error(monkeypatch):
     """Debe lanzar excepción si Alpha responde mal"""
 
-    mock_response = Mock()
-    mock_response.json.return_value = {
-        "Error Message": "Invalid API call"
-    }
+    monkeypatch.setattr(
+        "app.core.market.alpha_get",
+        AsyncMock(return_value={"Error Message": "Invalid API call"})
+    )
 
-    monkeypatch.setattr("requests.get", lambda *a, **k: mock_response)
+    with pytest.raises(InvalidSymbolError, match="Alpha error"):
+        asyncio.run(_fetch_from_alpha("BAD"))
 
-    with pytest.raises(Exception):
-        _fetch_from_alpha("BAD")
+
+def test_fetch_from_alpha_other_notice(monkeypatch):
+    """Otros avisos de Alpha no marcan el símbolo como inválido"""
+
+    monkeypatch.setattr(
+        "app.core.market.alpha_get",
+        AsyncMock(return_value={"Information": "Premium endpoint"})
+    )
+
+    with pytest.raises(Exception, match="Alpha error") as exc:
+        asyncio.run(_fetch_from_alpha("AAPL"))
+
+    assert not isinstance(exc.value, InvalidSymbolError)
 
 
 # ============================
@@ -62,17 +96,17 @@ def test_get_market_data_calls_fetch(monkeypatch, alpha_response_ok):
         index=pd.to_datetime(["2024-01-01", "2024-01-02"])
     )
 
-    mock_fetch = Mock(return_value=mock_df)
+    mock_fetch = AsyncMock(return_value=mock_df)
 
     monkeypatch.setattr(
         "app.core.market._fetch_from_alpha",
         mock_fetch
     )
 
-    result = get_market_data("AAPL")
+    result = asyncio.run(get_market_data("AAPL"))
 
     assert result.equals(mock_df)
-    mock_fetch.assert_called_once_with("AAPL")
+    mock_fetch.assert_called_once_with("AAPL", INTERACTIVE)
 
 
 def test_get_market_data_uses_cache(monkeypatch):
@@ -93,7 +127,7 @@ def test_get_market_data_uses_cache(monkeypatch):
         "time": fake_time
     }
 
-    result = get_market_data("AAPL")
+    result = asyncio.run(get_market_data("AAPL"))
 
     assert result.equals(mock_df)
 
@@ -102,7 +136,7 @@ def test_get_market_data_cache_expired(monkeypatch):
     """Debe refrescar cache si expiró"""
 
     old_time = 1000
-    new_time = old_time + CACHE_SECONDS + 10
+    new_time = old_time + MAX_STALE_SECONDS + 10
 
     old_df = pd.DataFrame(
         {"4. close": [100.0]},
@@ -121,14 +155,14 @@ def test_get_market_data_cache_expired(monkeypatch):
 
     monkeypatch.setattr(time, "time", lambda: new_time)
 
-    mock_fetch = Mock(return_value=new_df)
+    mock_fetch = AsyncMock(return_value=new_df)
 
     monkeypatch.setattr(
         "app.core.market._fetch_from_alpha",
         mock_fetch
     )
 
-    result = get_market_data("AAPL")
+    result = asyncio.run(get_market_data("AAPL"))
 
     assert result.equals(new_df)
     mock_fetch.assert_called_once()
@@ -142,17 +176,670 @@ def test_get_market_data_default_symbol(monkeypatch):
         index=pd.to_datetime(["2024-01-01"])
     )
 
-    mock_fetch = Mock(return_value=mock_df)
+    mock_fetch = AsyncMock(return_value=mock_df)
 
     monkeypatch.setattr(
         "app.core.market._fetch_from_alpha",
         mock_fetch
     )
 
-    result = get_market_data()
+    result = asyncio.run(get_market_data())
 
     assert result.equals(mock_df)
 
     # Se llamó con DEFAULT_SYMBOL
     args = mock_fetch.call_args[0]
-    assert len(args) == 1
\ No newline at end of file
+    assert args[1:] == (INTERACTIVE,)
+
+
+# ============================
+# Tests stale-while-revalidate
+# ============================
+
+def _stale_cache(monkeypatch, age):
+
+    old_df = pd.DataFrame(
+        {"4. close": [100.0]},
+        index=pd.to_datetime(["2024-01-01"])
+    )
+
+    _cache["AAPL"] = {
+        "data": old_df,
+        "time": 1000
+    }
+
+    monkeypatch.setattr(time, "time", lambda: 1000 + age)
+
+    return old_df
+
+
+def test_get_market_data_stale_served_and_refreshed(monkeypatch):
+    """Dato stale se sirve al instante y se refresca en segundo plano"""
+
+    old_df = _stale_cache(monkeypatch, CACHE_SECONDS + 10)
+
+    new_df = pd.DataFrame(
+        {"4. close": [150.0]},
+        index=pd.to_datetime(["2024-01-02"])
+    )
+
+    mock_fetch = AsyncMock(return_value=new_df)
+
+    monkeypatch.setattr(
+        "app.core.market._fetch_from_alpha",
+        mock_fetch
+    )
+
+    async def scenario():
+
+        result = await get_market_data("AAPL")
+
+        # Refresh pendiente en segundo plano
+        assert "AAPL" in _inflight
+        await _inflight["AAPL"]
+
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result is old_df
+    # Refresh en segundo plano: prioridad baja ante la cuota de Alpha
+    mock_fetch.assert_called_once_with("AAPL", BACKGROUND)
+
+    assert _cache["AAPL"]["data"] is new_df
+
+
+def test_get_market_data_stale_refresh_error_keeps_data(monkeypatch):
+    """Si el refresh en segundo plano falla se mantiene el último dato"""
+
+    old_df = _stale_cache(monkeypatch, CACHE_SECONDS + 10)
+
+    mock_fetch = AsyncMock(side_effect=Exception("Alpha error"))
+
+    monkeypatch.setattr(
+        "app.core.market._fetch_from_alpha",
+        mock_fetch
+    )
+
+    async def scenario():
+
+        first = await get_market_data("AAPL")
+
+        await asyncio.gather(_inflight["AAPL"], return_exceptions=True)
+
+        # Backoff: no se reintenta enseguida
+        second = await get_market_data("AAPL")
+
+        assert "AAPL" not in _inflight
+
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first is old_df
+    assert second is old_df
+    assert _cache["AAPL"]["data"] is old_df
+
+    mock_fetch.assert_called_once()
+
+
+def test_get_market_data_expired_serves_last_good_on_error(monkeypatch):
+    """Fuera de la ventana stale, si Alpha falla se sirve lo último bueno"""
+
+    old_df = _stale_cache(monkeypatch, MAX_STALE_SECONDS + 10)
+
+    mock_fetch = AsyncMock(side_effect=Exception("Alpha error"))
+
+    monkeypatch.setattr(
+        "app.core.market._fetch_from_alpha",
+        mock_fetch
+    )
+
+    result = asyncio.run(get_market_data("AAPL"))
+
+    assert result is old_df
+    mock_fetch.assert_called_once()
+
+
+# ============================
+# Tests single-flight
+# ============================
+
+def _slow_fetch(result, release: asyncio.Event, calls: list):
+
+    async def fetch(symbol, priority=INTERACTIVE):
+        calls.append(symbol)
+        await release.wait()
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+    return fetch
+
+
+def test_get_market_data_single_flight(monkeypatch):
+    """Peticiones concurrentes del mismo símbolo hacen un solo fetch"""
+
+    mock_df = pd.DataFrame(
+        {"4. close": [100.0]},
+        index=pd.to_datetime(["2024-01-01"])
+    )
+
+    async def scenario():
+
+        release = asyncio.Event()
+        calls = []
+
+        monkeypatch.setattr(
+            "app.core.market._fetch_from_alpha",
+            _slow_fetch(mock_df, release, calls)
+        )
+
+        tasks = [
+            asyncio.create_task(get_market_data("AAPL"))
+            for _ in range(5)
+        ]
+
+        await asyncio.sleep(0)
+        assert "AAPL" in _inflight
+
+        release.set()
+
+        return await asyncio.gather(*tasks), calls
+
+    results, calls = asyncio.run(scenario())
+
+    assert all(r is mock_df for r in results)
+    assert calls == ["AAPL"]
+
+    assert "AAPL" not in _inflight
+
+
+def test_get_market_data_single_flight_error(monkeypatch):
+    """El error del fetch llega a todos y no queda registrado"""
+
+    async def scenario():
+
+        release = asyncio.Event()
+        calls = []
+
+        monkeypatch.setattr(
+            "app.core.market._fetch_from_alpha",
+            _slow_fetch(Exception("Alpha error"), release, calls)
+        )
+
+        tasks = [
+            asyncio.create_task(get_market_data("AAPL"))
+            for _ in range(3)
+        ]
+
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+
+    assert all(str(r) == "Alpha error" for r in results)
+    assert calls == ["AAPL"]
+
+    # Sin cache ni fetch colgado: el siguiente intento reintenta
+    assert "AAPL" not in _inflight
+    assert "AAPL" not in _cache
+
+
+def test_get_market_data_cancelled_caller(monkeypatch):
+    """Cancelar a un cliente no cancela el fetch compartido"""
+
+    mock_df = pd.DataFrame(
+        {"4. close": [100.0]},
+        index=pd.to_datetime(["2024-01-01"])
+    )
+
+    async def scenario():
+
+        release = asyncio.Event()
+        calls = []
+
+        monkeypatch.setattr(
+            "app.core.market._fetch_from_alpha",
+            _slow_fetch(mock_df, release, calls)
+        )
+
+        first = asyncio.create_task(get_market_data("AAPL"))
+        second = asyncio.create_task(get_market_data("AAPL"))
+
+        await asyncio.sleep(0)
+        first.cancel()
+
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second, calls
+
+    result, calls = asyncio.run(scenario())
+
+    assert result is mock_df
+    assert calls == ["AAPL"]
+    assert "AAPL" in _cache
+
+
+def test_get_market_data_retries_after_error(monkeypatch):
+    """Tras un error, la siguiente llamada vuelve a consultar Alpha"""
+
+    mock_df = pd.DataFrame(
+        {"4. close": [100.0]},
+        index=pd.to_datetime(["2024-01-01"])
+    )
+
+    mock_fetch = AsyncMock(side_effect=[Exception("Alpha error"), mock_df])
+
+    monkeypatch.setattr(
+        "app.core.market._fetch_from_alpha",
+        mock_fetch
+    )
+
+    with pytest.raises(Exception):
+        asyncio.run(get_market_data("AAPL"))
+
+    assert asyncio.run(get_market_data("AAPL")).equals(mock_df)
+    assert mock_fetch.call_count == 2
+
+
+# ============================
+# Tests cache acotado
+# ============================
+
+def test_cache_accounts_dataframe_bytes():
+    """El cache cuenta la memoria del DataFrame"""
+
+    df = pd.DataFrame(
+        {"4. close": [100.0, 101.0, 102.0]},
+        index=pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"])
+    )
+
+    _cache["AAPL"] = {
+        "data": df,
+        "time": 1000
+    }
+
+    stats = cache_stats()
+
+    assert stats["entries"] == 1
+    assert stats["bytes"] == df.memory_usage(index=True, deep=True).sum()
+
+
+# ============================
+# Tests almacén en disco
+# ============================
+
+def test_get_market_data_warm_start_from_store(monkeypatch, market_store):
+    """Con histórico vigente en disco no se consulta Alpha"""
+
+    df = pd.DataFrame(
+        {
+            "1. open": [100.0],
+            "2. high": [101.0],
+            "3. low": [99.0],
+            "4. close": [100.5],
+            "5. volume": [1000.0]
+        },
+        index=pd.to_datetime(["2024-01-01"])
+    )
+
+    merge_series("AAPL", df, 1000.0)
+
+    monkeypatch.setattr(time, "time", lambda: 1010.0)
+
+    mock_fetch = AsyncMock()
+
+    monkeypatch.setattr(
+        "app.core.market._fetch_from_alpha",
+        mock_fetch
+    )
+
+    result = asyncio.run(get_market_data("AAPL"))
+
+    assert result.equals(df)
+    assert "AAPL" in _cache
+    mock_fetch.assert_not_called()
+
+
+def test_get_market_data_persists_fetch(monkeypatch, market_store, alpha_response_ok):
+    """El fetch se guarda en disco"""
+
+    monkeypatch.setattr(
+        "app.core.market.alpha_get",
+        AsyncMock(return_value=alpha_response_ok)
+    )
+
+    result = asyncio.run(get_market_data("AAPL"))
+
+    stored = load_series("AAPL")
+
+    assert len(result) == 2
+    assert stored["data"].equals(result)
+
+
+# ============================
+# Tests snapshot con KPIs
+# ============================
+
+def test_get_market_snapshot_materializes_kpis(monkeypatch, bullish_df):
+    """Los KPIs se calculan al traer los datos y no en cada lectura"""
+
+    monkeypatch.setattr(
+        "app.core.market._fetch_from_alpha",
+        AsyncMock(return_value=bullish_df)
+    )
+
+    mock_kpis = Mock(return_value={"trend": "bullish"})
+
+    monkeypatch.setattr("app.core.market.get_streaming_kpis", mock_kpis)
+
+    first = asyncio.run(get_market_snapshot("AAPL"))
+    second = asyncio.run(get_market_snapshot("AAPL"))
+
+    assert first is second
+    assert first["kpis"] == {"trend": "bullish"}
+    assert first["version"] == data_version(bullish_df)
+
+    mock_kpis.assert_called_once_with("AAPL", bullish_df)
+
+
+def test_snapshot_kpis_use_fixed_window(monkeypatch):
+    """Con histórico acumulado los KPIs usan solo las últimas filas"""
+
+    monkeypatch.setattr("app.core.market.MARKET_ANALYSIS_ROWS", 100)
+
+    df = pd.DataFrame(
+        {"4. close": [float(i) for i in range(1, 251)]},
+        index=pd.date_range("2024-01-01", periods=250)
+    )
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(return_value=df))
+
+    snapshot = asyncio.run(get_market_snapshot("AAPL"))
+
+    assert len(snapshot["data"]) == 250
+    assert snapshot["kpis"]["max_drawdown_pct"] == 0
+    assert snapshot["kpis"]["daily_return_pct"] == round(
+        df["4. close"].iloc[-100:].pct_change().mean() * 100, 2
+    )
+
+
+def test_snapshot_window_shift_updates_incrementally(monkeypatch):
+    """Un día nuevo desplaza la ventana sin reconstruir el acumulador"""
+
+    monkeypatch.setattr("app.core.market.MARKET_ANALYSIS_ROWS", 100)
+
+    rng = np.random.default_rng(5)
+
+    df = pd.DataFrame(
+        {"4. close": 100 + np.cumsum(rng.normal(0, 1, 111))},
+        index=pd.bdate_range("2024-01-01", periods=111)
+    )
+
+    rebuilds = []
+    from_series = KPIAccumulator.from_series.__func__
+
+    def counting(cls, close):
+        rebuilds.append(len(close))
+        return from_series(cls, close)
+
+    monkeypatch.setattr(KPIAccumulator, "from_series", classmethod(counting))
+
+    for end in range(101, 112):
+        snapshot = _snapshot("AAPL", df.iloc[:end], 1000.0)
+
+    # Solo la primera vez; los 10 días siguientes son incrementales
+    assert rebuilds == [100]
+    assert snapshot["kpis"] == pytest.approx(calculate_kpis(df.iloc[-100:]), abs=0.011)
+
+
+def test_data_version_changes_with_data(bullish_df):
+    """La versión cambia si cambian los datos"""
+
+    changed = bullish_df.copy()
+    changed.iloc[-1, 0] += 1
+
+    assert data_version(bullish_df) == data_version(bullish_df.copy())
+    assert data_version(bullish_df) != data_version(changed)
+
+
+def test_refresh_notifies_listeners(monkeypatch):
+    """Cada refresh exitoso avisa a los listeners"""
+
+    df = pd.DataFrame(
+        {"4. close": [150.0]},
+        index=pd.to_datetime(["2024-01-02"])
+    )
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(return_value=df))
+
+    listener = Mock()
+    monkeypatch.setattr("app.core.market._listeners", [listener])
+
+    snapshot = asyncio.run(get_market_snapshot("AAPL"))
+
+    listener.assert_called_once_with("AAPL", snapshot)
+
+
+def test_failing_listener_does_not_fail_refresh(monkeypatch):
+    """Un listener con error no afecta el fetch ni a los demás listeners"""
+
+    df = pd.DataFrame(
+        {"4. close": [150.0]},
+        index=pd.to_datetime(["2024-01-02"])
+    )
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(return_value=df))
+
+    listener = Mock()
+    monkeypatch.setattr("app.core.market._listeners", [Mock(side_effect=RuntimeError), listener])
+
+    snapshot = asyncio.run(get_market_snapshot("AAPL"))
+
+    listener.assert_called_once_with("AAPL", snapshot)
+    assert "AAPL" not in _last_error
+
+
+def test_refresh_errors_bounded(monkeypatch):
+    """Los errores por símbolo no crecen sin límite y vencen tras el backoff"""
+
+    monkeypatch.setattr(_last_error, "max_entries", 3)
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(
+        side_effect=httpx.ConnectTimeout("timeout")
+    ))
+
+    for symbol in ["A", "B", "C", "D", "E"]:
+        with pytest.raises(httpx.ConnectTimeout):
+            asyncio.run(prefetch(symbol))
+
+    assert len(_last_error) == 3
+    assert "A" not in _last_error
+
+    now = time.time()
+
+    assert not can_refresh("E", now)
+    assert can_refresh("E", now + ERROR_BACKOFF_SECONDS)
+    assert "E" not in _last_error
+
+
+def test_untracked_snapshot_not_counted(monkeypatch):
+
+    _cache["AAPL"] = {"data": pd.DataFrame({"4. close": [1.0]}), "time": time.time()}
+
+    asyncio.run(get_market_snapshot("AAPL", track=False))
+
+    assert popular_symbols(5) == []
+
+
+def test_interactive_retries_rate_limited_background_fetch(monkeypatch, alpha_response_ok):
+    """Una petición de usuario unida a un refresh de fondo sin cupo
+    reintenta con prioridad interactiva y usa la reserva"""
+
+    limiter = RateLimiter([TokenBucket(1 / 3600, 1, reserve=1)])
+
+    async def fake_get(params, priority=INTERACTIVE):
+        await limiter.acquire(priority, timeout=10)
+        return alpha_response_ok
+
+    monkeypatch.setattr("app.core.market.alpha_get", fake_get)
+
+    async def scenario():
+
+        background = asyncio.create_task(prefetch("MSFT"))
+        await asyncio.sleep(0)
+
+        snapshot = await get_market_snapshot("MSFT")
+
+        await asyncio.gather(background, return_exceptions=True)
+
+        return snapshot, background.exception()
+
+    snapshot, error = asyncio.run(scenario())
+
+    assert isinstance(error, RateLimitedError)
+    assert len(snapshot["data"]) == 2
+    assert limiter.buckets[0].tokens < 1
+
+
+def test_interactive_rate_limited_not_retried(monkeypatch):
+    """Sin refresh de fondo de por medio el 429 no se reintenta"""
+
+    fetch = AsyncMock(side_effect=RateLimitedError(60))
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", fetch)
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(get_market_snapshot("MSFT"))
+
+    assert fetch.call_count == 1
+
+
+def test_requests_counted_for_popularity(monkeypatch):
+    """Cada petición suma popularidad; prefetch no"""
+
+    monkeypatch.setattr(time, "time", lambda: 1000)
+
+    _cache["AAPL"] = {"data": pd.DataFrame({"4. close": [1.0]}), "time": 1000}
+
+    asyncio.run(get_market_snapshot("AAPL"))
+    asyncio.run(get_market_snapshot("AAPL"))
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(
+        return_value=pd.DataFrame({"4. close": [1.0]}, index=pd.to_datetime(["2024-01-01"]))
+    ))
+
+    asyncio.run(prefetch("MSFT"))
+
+    assert popular_symbols(5) == ["AAPL"]
+
+
+def test_invalid_symbol_not_counted(monkeypatch):
+    """Un símbolo que Alpha rechaza no suma popularidad"""
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(
+        side_effect=InvalidSymbolError("Alpha error: Invalid API call")
+    ))
+
+    with pytest.raises(Exception):
+        asyncio.run(get_market_snapshot("APPL"))
+
+    assert popular_symbols(5) == []
+
+
+def test_failed_refresh_drops_popularity(monkeypatch):
+    """Si un símbolo popular deja de existir sale del refresh anticipado"""
+
+    _requests["GONE"] = 10
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(
+        side_effect=InvalidSymbolError("Alpha error: Invalid API call")
+    ))
+
+    with pytest.raises(Exception):
+        asyncio.run(prefetch("GONE"))
+
+    assert "GONE" not in _requests
+
+
+def test_network_error_keeps_popularity(monkeypatch):
+    """Un corte de red no saca al símbolo del refresh anticipado"""
+
+    _requests["AAPL"] = 10
+
+    monkeypatch.setattr("app.core.market._fetch_from_alpha", AsyncMock(
+        side_effect=httpx.ConnectTimeout("timeout")
+    ))
+
+    with pytest.raises(httpx.ConnectTimeout):
+        asyncio.run(prefetch("AAPL"))
+
+    assert _requests["AAPL"] == 10
+
+
+# ============================
+# Recorte por fechas, filas y columnas
+# ============================
+
+@pytest.fixture
+def ohlcv_frame():
+    """Diez días OHLCV"""
+
+    index = pd.date_range("2024-01-01", periods=10)
+
+    return pd.DataFrame(
+        {
+            "1. open": range(10),
+            "2. high": range(10),
+            "3. low": range(10),
+            "4. close": [float(i) for i in range(10)],
+            "5. volume": range(10)
+        },
+        index=index
+    )
+
+
+def test_slice_market_dates_inclusive(ohlcv_frame):
+    """start y end incluidos"""
+
+    result = slice_market(ohlcv_frame, "2024-01-03", "2024-01-05")
+
+    assert list(result["4. close"]) == [2.0, 3.0, 4.0]
+
+
+def test_slice_market_limit_keeps_latest(ohlcv_frame):
+    """limit conserva las filas más recientes del rango"""
+
+    result = slice_market(ohlcv_frame, end="2024-01-08", limit=3)
+
+    assert list(result.index.day) == [6, 7, 8]
+
+
+def test_slice_market_fields(ohlcv_frame):
+    """Acepta nombres cortos o de Alpha, en el orden pedido"""
+
+    result = slice_market(ohlcv_frame, fields=["volume", "4. close"])
+
+    assert list(result.columns) == ["5. volume", "4. close"]
+    assert len(result) == 10
+
+
+def test_slice_market_unknown_field(ohlcv_frame):
+
+    with pytest.raises(ValueError):
+        slice_market(ohlcv_frame, fields=["foo"])
+
+
+def test_slice_market_empty_range(ohlcv_frame):
+
+    assert slice_market(ohlcv_frame, "2025-01-01").empty
@@ -0,0 +1,296 @@
+import asyncio
+import pytest
+from app.core.rate_limit import (
+    BACKGROUND,
+    INTERACTIVE,
+    RateLimitedError,
+    RateLimiter,
+    TokenBucket
+)
+
+
+class FakeClock:
+    """Reloj manual: sleep avanza el tiempo sin esperar"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds: float):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _limiter(clock, rate=1.0, capacity=2):
+    """Un bucket: capacity de ráfaga y rate por segundo"""
+
+    return RateLimiter(
+        [TokenBucket(rate, capacity, clock=clock)],
+        sleep=clock.sleep
+    )
+
+
+def test_bucket_refills(clock):
+
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+
+    bucket.take()
+    bucket.take()
+
+    assert bucket.wait_time() == 2.0
+
+    clock.now += 1
+
+    assert bucket.tokens == 0.5
+
+    clock.now += 100
+
+    # Nunca supera la capacidad
+    assert bucket.tokens == 2
+
+
+def test_burst_without_waiting(clock):
+
+    limiter = _limiter(clock)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+
+    asyncio.run(scenario())
+
+    assert clock.now == 0
+
+
+def test_waits_for_token(clock):
+    """Sin cupo espera hasta que se recarga"""
+
+    limiter = _limiter(clock, capacity=1)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire(timeout=5)
+
+    asyncio.run(scenario())
+
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_fast_fail_with_retry_after(clock):
+    """Si la espera supera el plazo responde al instante"""
+
+    limiter = _limiter(clock, rate=0.1, capacity=1)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire(timeout=2)
+
+    with pytest.raises(RateLimitedError) as exc:
+        asyncio.run(scenario())
+
+    assert exc.value.retry_after == 10
+    assert clock.now == 0
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_interactive_before_background(clock):
+    """Las peticiones interactivas pasan antes que las de fondo"""
+
+    limiter = _limiter(clock, capacity=1)
+
+    order = []
+
+    async def call(name, priority):
+        await limiter.acquire(priority)
+        order.append(name)
+
+    async def scenario():
+
+        await limiter.acquire()
+
+        background = asyncio.create_task(call("background", BACKGROUND))
+        await asyncio.sleep(0)
+
+        interactive = asyncio.create_task(call("interactive", INTERACTIVE))
+
+        await asyncio.gather(background, interactive)
+
+    asyncio.run(scenario())
+
+    assert order == ["interactive", "background"]
+
+
+def test_deadline_counts_queue(clock):
+    """La espera estimada incluye a quienes van antes"""
+
+    limiter = _limiter(clock, capacity=1)
+
+    async def scenario():
+
+        await limiter.acquire()
+
+        first = asyncio.create_task(limiter.acquire(timeout=5))
+        await asyncio.sleep(0)
+
+        # Segundo en la cola: 2 segundos de espera > 1.5
+        with pytest.raises(RateLimitedError):
+            await limiter.acquire(timeout=1.5)
+
+        await first
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_consume(clock):
+
+    limiter = _limiter(clock, capacity=1)
+
+    async def scenario():
+
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+
+        await asyncio.gather(waiter, return_exceptions=True)
+        await limiter.acquire()
+
+    asyncio.run(scenario())
+
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_multiple_buckets_use_tightest(clock):
+    """Con cuota por minuto y por día manda la más restrictiva"""
+
+    limiter = RateLimiter(
+        [
+            TokenBucket(5 / 60, 5, clock=clock),
+            TokenBucket(2 / 86400, 2, clock=clock)
+        ],
+        sleep=clock.sleep
+    )
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        await limiter.acquire(timeout=60)
+
+    with pytest.raises(RateLimitedError) as exc:
+        asyncio.run(scenario())
+
+    assert exc.value.retry_after == 43200
+
+
+def test_background_keeps_reserve(clock):
+    """Las de fondo no gastan la reserva; las interactivas sí"""
+
+    limiter = RateLimiter(
+        [TokenBucket(1 / 3600, 3, clock=clock, reserve=2)],
+        sleep=clock.sleep
+    )
+
+    async def scenario():
+
+        await limiter.acquire(BACKGROUND, timeout=10)
+
+        # Solo quedan los 2 tokens reservados
+        with pytest.raises(RateLimitedError) as exc:
+            await limiter.acquire(BACKGROUND, timeout=10)
+
+        await limiter.acquire(timeout=10)
+        await limiter.acquire(timeout=10)
+
+        return exc.value.retry_after
+
+    assert asyncio.run(scenario()) == 3600
+    assert clock.now == 0
+
+
+def test_background_waits_above_reserve(clock):
+    """Una de fondo sin plazo espera a que haya cupo sobre la reserva"""
+
+    limiter = RateLimiter(
+        [TokenBucket(1.0, 2, clock=clock, reserve=1)],
+        sleep=clock.sleep
+    )
+
+    async def scenario():
+
+        await limiter.acquire()
+        await limiter.acquire(BACKGROUND)
+
+    asyncio.run(scenario())
+
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_interactive_jumps_sleeping_background(clock):
+    """Una interactiva no espera a que despierte el despachador de fondo"""
+
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+        await asyncio.Event().wait()
+
+    limiter = RateLimiter(
+        [TokenBucket(1 / 100, 2, clock=clock, reserve=1)],
+        sleep=sleep
+    )
+
+    async def scenario():
+
+        await limiter.acquire()
+        await limiter.acquire()
+
+        background = asyncio.create_task(limiter.acquire(BACKGROUND))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        interactive = asyncio.create_task(limiter.acquire(INTERACTIVE))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        background.cancel()
+        interactive.cancel()
+        limiter._dispatcher.cancel()
+
+        await asyncio.gather(background, interactive, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    # La de fondo necesita 2 tokens (1 + reserva); la interactiva solo 1
+    assert sleeps == [pytest.approx(200), pytest.approx(100)]
+
+
+def test_deadline_applies_while_queued():
+    """El plazo se respeta también después de entrar en la cola"""
+
+    async def never(seconds):
+        await asyncio.Event().wait()
+
+    limiter = RateLimiter([TokenBucket(100.0, 1)], sleep=never)
+
+    async def scenario():
+
+        await limiter.acquire()
+
+        with pytest.raises(RateLimitedError):
+            await limiter.acquire(timeout=0.05)
+
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["rejected"] == 1
+    assert stats["waiting"] == 0
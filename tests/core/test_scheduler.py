@@ -0,0 +1,185 @@
+import asyncio
+from unittest.mock import AsyncMock
+import pandas as pd
+import pytest
+from app.core import market, scheduler, store
+from app.core.market import CACHE_SECONDS, _cache, _last_error, _requests
+
+
+def _cache_entry(symbol: str, fetched_at: float):
+    """Entrada de cache mínima"""
+
+    _cache[symbol] = {
+        "data": pd.DataFrame({"4. close": [100.0]}, index=pd.to_datetime(["2024-01-01"])),
+        "time": fetched_at
+    }
+
+
+@pytest.fixture
+def prefetch(monkeypatch):
+    """Refresh mockeado y watchlist controlada"""
+
+    mock = AsyncMock()
+
+    monkeypatch.setattr(market, "prefetch", mock)
+    monkeypatch.setattr(scheduler, "REFRESH_WATCHLIST", ["AAPL"])
+    monkeypatch.setattr(scheduler, "REFRESH_TOP_SYMBOLS", 2)
+    monkeypatch.setattr(scheduler, "REFRESH_CALLS_PER_MINUTE", 10)
+    monkeypatch.setattr(scheduler, "REFRESH_CALLS_PER_DAY", 86400)
+
+    return mock
+
+
+def test_due_symbols_missing_and_near_expiry(prefetch):
+    """Sin cache o cerca de vencer se refresca; fresco no"""
+
+    now = 10_000.0
+
+    _cache_entry("MSFT", now - 10)
+    _cache_entry("TSLA", now - CACHE_SECONDS + 30)
+
+    _requests.update({"MSFT": 5, "TSLA": 3, "GOOG": 1})
+
+    # AAPL (watchlist, sin cache) primero, luego TSLA; MSFT fresco, GOOG fuera del top
+    assert asyncio.run(scheduler.due_symbols(now)) == ["AAPL", "TSLA"]
+
+
+def test_due_symbols_uses_store_after_restart(prefetch, market_store):
+    """Tras reiniciar, lo guardado hace poco en disco no se vuelve a pedir"""
+
+    now = 10_000.0
+
+    df = pd.DataFrame(
+        {
+            "1. open": [1.0], "2. high": [1.0], "3. low": [1.0],
+            "4. close": [1.0], "5. volume": [1.0]
+        },
+        index=pd.to_datetime(["2024-01-01"])
+    )
+
+    store.merge_series("AAPL", df, now - 5)
+
+    assert asyncio.run(scheduler.due_symbols(now)) == []
+
+    asyncio.run(scheduler.tick(now))
+
+    prefetch.assert_not_called()
+
+
+def test_due_symbols_skips_recent_errors(prefetch):
+
+    now = 10_000.0
+
+    _last_error["AAPL"] = now - 1
+
+    assert asyncio.run(scheduler.due_symbols(now)) == []
+
+
+def test_tick_respects_budget(prefetch, monkeypatch):
+    """No se pasa del presupuesto de llamadas por minuto"""
+
+    monkeypatch.setattr(scheduler, "REFRESH_CALLS_PER_MINUTE", 1)
+
+    _requests.update({"MSFT": 5})
+
+    asyncio.run(scheduler.tick(1000.0))
+
+    prefetch.assert_called_once_with("AAPL")
+
+    # Mismo minuto: sin presupuesto
+    asyncio.run(scheduler.tick(1030.0))
+
+    assert prefetch.call_count == 1
+
+    # Minuto siguiente
+    asyncio.run(scheduler.tick(1061.0))
+
+    assert prefetch.call_count == 2
+
+
+def test_tick_paced_by_daily_quota(prefetch, monkeypatch):
+    """Con 12 llamadas diarias, una cada 2 horas como máximo"""
+
+    monkeypatch.setattr(scheduler, "REFRESH_CALLS_PER_DAY", 12)
+
+    _requests.update({"MSFT": 5})
+
+    # Al arrancar (sin llamadas previas) se refrescan los dos
+    asyncio.run(scheduler.tick(1000.0))
+    asyncio.run(scheduler.tick(1000.0 + 3600))
+
+    assert prefetch.call_count == 2
+
+    asyncio.run(scheduler.tick(1000.0 + 7200))
+
+    assert prefetch.call_count == 3
+    assert scheduler.scheduler_stats()["calls_last_day"] == 3
+
+
+def test_tick_uses_per_minute_allowance(prefetch, monkeypatch):
+    """Con cuota de pago una revisión refresca hasta el límite por minuto"""
+
+    monkeypatch.setattr(scheduler, "REFRESH_WATCHLIST", [f"S{i}" for i in range(12)])
+    monkeypatch.setattr(scheduler, "REFRESH_CALLS_PER_MINUTE", 5)
+
+    asyncio.run(scheduler.tick(1000.0))
+
+    assert prefetch.call_count == 5
+
+    # Mismo minuto: sin cupo
+    asyncio.run(scheduler.tick(1030.0))
+
+    assert prefetch.call_count == 5
+
+    asyncio.run(scheduler.tick(1061.0))
+
+    assert prefetch.call_count == 10
+
+
+def test_due_symbols_skips_inflight(prefetch, monkeypatch):
+
+    monkeypatch.setattr(market, "_inflight", {"AAPL": object()})
+
+    assert asyncio.run(scheduler.due_symbols(10_000.0)) == []
+
+
+def test_tick_counts_failures(prefetch):
+
+    prefetch.side_effect = Exception("Alpha error")
+
+    failed = scheduler.scheduler_stats()["failed"]
+
+    asyncio.run(scheduler.tick(1000.0))
+
+    assert scheduler.scheduler_stats()["failed"] == failed + 1
+
+
+def test_requests_decay(prefetch):
+    """La popularidad decae en cada revisión"""
+
+    _requests.update({"MSFT": 10, "GOOG": 0.5})
+
+    asyncio.run(scheduler.tick(1000.0))
+
+    assert _requests["MSFT"] == pytest.approx(10 * scheduler.POPULARITY_DECAY)
+    assert "GOOG" not in _requests
+
+
+def test_start_and_stop(prefetch, monkeypatch):
+
+    monkeypatch.setattr(scheduler, "TICK_SECONDS", 3600)
+
+    async def scenario():
+
+        scheduler.start()
+        running = scheduler.scheduler_stats()["running"]
+
+        await asyncio.sleep(0)
+        await scheduler.stop()
+
+        return running
+
+    assert asyncio.run(scenario())
+    assert not scheduler.scheduler_stats()["running"]
+
+    prefetch.assert_called_once_with("AAPL")
@@ -1,27 +1,21 @@
+import asyncio
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import patch
 
-from app.core.search import search_symbol
-
-
-# ============================
-# Mock helpers
-# ============================
-
-def mock_response(json_data):
-    """
-    Crea mock de requests response
-    """
-    mock = Mock()
-    mock.json.return_value = json_data
-    return mock
+from app.core.search import (
+    SEARCH_CACHE_SECONDS,
+    SEARCH_MAX_RESULTS,
+    PrefixIndex,
+    search_cache_stats,
+    search_symbol
+)
 
 
 # ============================
 # Tests
 # ============================
 
-@patch("app.core.search.requests.get")
+@patch("app.core.search.alpha_get")
 def test_search_symbol_success(mock_get):
     """
     Debe parsear resultados correctamente
@@ -44,9 +38,9 @@ def test_search_symbol_success(mock_get):
         ]
     }
 
-    mock_get.return_value = mock_response(alpha_response)
+    mock_get.return_value = alpha_response
 
-    result = search_symbol("app")
+    result = asyncio.run(search_symbol("app"))
 
     assert result == [
         {
@@ -66,76 +60,248 @@ def test_search_symbol_success(mock_get):
     mock_get.assert_called_once()
 
 
-@patch("app.core.search.requests.get")
+@patch("app.core.search.alpha_get")
 def test_search_symbol_empty_results(mock_get):
     """
     Debe retornar lista vacía si no hay matches
     """
 
-    mock_get.return_value = mock_response({
+    mock_get.return_value = {
         "bestMatches": []
-    })
+    }
 
-    result = search_symbol("zzz")
+    result = asyncio.run(search_symbol("zzz"))
 
     assert result == []
 
 
-@patch("app.core.search.requests.get")
+@patch("app.core.search.alpha_get")
 def test_search_symbol_no_bestmatches_key(mock_get):
     """
     Debe manejar respuesta sin bestMatches
     """
 
-    mock_get.return_value = mock_response({
+    mock_get.return_value = {
         "Note": "API limit"
-    })
+    }
 
-    result = search_symbol("test")
+    result = asyncio.run(search_symbol("test"))
 
     assert result == []
 
 
-@patch("app.core.search.requests.get")
+@patch("app.core.search.alpha_get")
 def test_search_symbol_incomplete_data(mock_get):
     """
     Si faltan campos debe lanzar KeyError
     (documenta comportamiento actual)
     """
 
-    mock_get.return_value = mock_response({
+    mock_get.return_value = {
         "bestMatches": [
             {
                 "1. symbol": "AAPL"
                 # faltan campos
             }
         ]
-    })
+    }
 
     with pytest.raises(KeyError):
-        search_symbol("apple")
+        asyncio.run(search_symbol("apple"))
 
 
-@patch("app.core.search.requests.get")
+@patch("app.core.search.alpha_get")
 def test_search_symbol_request_called_correctly(mock_get):
     """
-    Verifica URL y params
+    Verifica params enviados a Alpha
     """
 
-    mock_get.return_value = mock_response({
+    mock_get.return_value = {
         "bestMatches": []
-    })
+    }
 
     keyword = "tesla"
 
-    search_symbol(keyword)
+    asyncio.run(search_symbol(keyword))
+
+    params = mock_get.call_args[0][0]
+
+    assert params["function"] == "SYMBOL_SEARCH"
+    assert params["keywords"] == keyword
+
+
+# ============================
+# Cache e índice de prefijos
+# ============================
+
+def _match(symbol: str, name: str):
+    """Coincidencia en formato de Alpha"""
+
+    return {
+        "1. symbol": symbol,
+        "2. name": name,
+        "4. region": "United States",
+        "8. currency": "USD",
+    }
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_cached_by_normalized_keyword(mock_get):
+    """Misma palabra clave (sin importar mayúsculas/espacios) no vuelve a Alpha"""
+
+    mock_get.return_value = {"bestMatches": [_match("TSLA", "Tesla Inc")]}
+
+    first = asyncio.run(search_symbol("Tesla"))
+    second = asyncio.run(search_symbol("  tesla "))
+
+    assert first == second
+    mock_get.assert_called_once()
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_cache_expires(mock_get, monkeypatch):
+
+    mock_get.return_value = {"bestMatches": []}
+
+    monkeypatch.setattr("app.core.search.time.time", lambda: 1000)
+    asyncio.run(search_symbol("zzz"))
+
+    monkeypatch.setattr("app.core.search.time.time", lambda: 1000 + SEARCH_CACHE_SECONDS)
+    asyncio.run(search_symbol("zzz"))
+
+    assert mock_get.call_count == 2
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_notice_not_cached(mock_get):
+    """Avisos de Alpha (sin bestMatches) no se guardan"""
+
+    mock_get.return_value = {"Note": "API limit"}
+
+    asyncio.run(search_symbol("test"))
+    asyncio.run(search_symbol("test"))
+
+    assert mock_get.call_count == 2
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_answered_from_index(mock_get):
+    """Prefijos con suficientes símbolos conocidos se responden localmente"""
+
+    mock_get.return_value = {"bestMatches": [
+        _match("BA", "Boeing Co"),
+        _match("BAC", "Bank of America Corp"),
+        _match("BABA", "Alibaba Group"),
+        _match("BAX", "Baxter International"),
+        _match("BALL", "Ball Corp"),
+    ]}
+
+    asyncio.run(search_symbol("ba"))
+
+    local = asyncio.run(search_symbol("b"))
+
+    assert mock_get.call_count == 1
+    assert [r["symbol"] for r in local] == ["BA", "BAC", "BAX", "BABA", "BALL"]
+
+
+def test_prefix_index_ranking():
+    """Símbolo exacto, prefijo de símbolo y luego prefijo de nombre"""
+
+    index = PrefixIndex()
+
+    index.add({"symbol": "APPN", "name": "Appian Corp", "region": "US", "currency": "USD"})
+    index.add({"symbol": "AAPL", "name": "Apple Inc", "region": "US", "currency": "USD"})
+    index.add({"symbol": "APP", "name": "AppLovin Corp", "region": "US", "currency": "USD"})
+
+    assert [r["symbol"] for r in index.search("app")] == ["APP", "APPN", "AAPL"]
+    assert [r["symbol"] for r in index.search("apple")] == ["AAPL"]
+    assert index.search("zz") == []
+
+    # Repetidos no duplican el índice
+    index.add({"symbol": "APP", "name": "AppLovin Corp", "region": "US", "currency": "USD"})
+
+    assert len(index) == 3
+
+
+# ============================
+# Single-flight y prefijos
+# ============================
+
+def test_search_symbol_single_flight(monkeypatch):
+    """Búsquedas iguales y simultáneas hacen una sola llamada"""
+
+    calls = []
+
+    async def slow_get(params):
+        calls.append(params["keywords"])
+        await asyncio.sleep(0.01)
+        return {"bestMatches": [_match("TSLA", "Tesla Inc")]}
+
+    monkeypatch.setattr("app.core.search.alpha_get", slow_get)
+
+    async def scenario():
+        return await asyncio.gather(*[search_symbol(keyword) for keyword in ["tesla", "Tesla", " tesla"]])
+
+    results = asyncio.run(scenario())
+
+    assert calls == ["tesla"]
+    assert results[0] == results[1] == results[2]
+    assert search_cache_stats()["coalesced"] == 2
+
+
+def test_search_symbol_single_flight_cancelled_caller(monkeypatch):
+    """Si un cliente cancela, los demás reciben el resultado"""
+
+    async def slow_get(params):
+        await asyncio.sleep(0.01)
+        return {"bestMatches": [_match("TSLA", "Tesla Inc")]}
+
+    monkeypatch.setattr("app.core.search.alpha_get", slow_get)
+
+    async def scenario():
+
+        first = asyncio.create_task(search_symbol("tesla"))
+        second = asyncio.create_task(search_symbol("tesla"))
+
+        await asyncio.sleep(0)
+        first.cancel()
+
+        return await second
+
+    assert [r["symbol"] for r in asyncio.run(scenario())] == ["TSLA"]
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_filters_complete_prefix(mock_get):
+    """Un resultado completo de un prefijo responde las búsquedas más largas"""
+
+    mock_get.return_value = {"bestMatches": [
+        _match("TSLA", "Tesla Inc"),
+        _match("TSN", "Tyson Foods Inc"),
+        _match("TT", "Trane Technologies"),
+    ]}
+
+    asyncio.run(search_symbol("t"))
+
+    result = asyncio.run(search_symbol("tes"))
+    by_symbol = asyncio.run(search_symbol("tsn"))
+
+    assert [r["symbol"] for r in result] == ["TSLA"]
+    assert [r["symbol"] for r in by_symbol] == ["TSN"]
+
+    mock_get.assert_called_once()
+    assert search_cache_stats()["prefix_hits"] >= 2
+
 
-    args, kwargs = mock_get.call_args
+@patch("app.core.search.alpha_get")
+def test_search_symbol_incomplete_prefix_goes_upstream(mock_get):
+    """Con el máximo de Alpha la lista puede estar cortada: no se filtra"""
 
-    assert args[0] == "https://www.alphavantage.co/query"
+    mock_get.return_value = {"bestMatches": [
+        _match(f"X{i}", f"Alpha {i}") for i in range(SEARCH_MAX_RESULTS)
+    ]}
 
-    assert kwargs["params"]["function"] == "SYMBOL_SEARCH"
-    assert kwargs["params"]["keywords"] == keyword
-    assert "apikey" in kwargs["params"]
+    asyncio.run(search_symbol("a"))
+    asyncio.run(search_symbol("ab"))
 
-    assert kwargs["timeout"] == 15
+    assert mock_get.call_count == 2
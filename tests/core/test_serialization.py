@@ -0,0 +1,104 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app.core import serialization
+from app.core.serialization import (
+    ARROW_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    encode,
+    negotiate,
+    to_columnar
+)
+
+
+@pytest.fixture
+def payload():
+    """Payload columnar de dos días"""
+
+    df = pd.DataFrame(
+        {
+            "1. open": [100.0, 101.0],
+            "4. close": [100.5, 102.25]
+        },
+        index=pd.to_datetime(["2024-01-01", "2024-01-02"])
+    )
+
+    return {"symbol": "AAPL", **to_columnar(df)}
+
+
+def test_to_columnar_layout(payload):
+    """Un arreglo de fechas y uno por columna"""
+
+    assert payload["index"] == ["2024-01-01", "2024-01-02"]
+    assert list(payload["columns"]) == ["1. open", "4. close"]
+    assert isinstance(payload["columns"]["4. close"], np.ndarray)
+
+
+def test_encode_json(payload):
+    """JSON con los arreglos como listas"""
+
+    result = json.loads(encode(payload))
+
+    assert result["columns"]["4. close"] == [100.5, 102.25]
+
+
+def test_encode_json_without_orjson(payload, monkeypatch):
+    """Sin orjson se usa json estándar con el mismo contenido"""
+
+    expected = json.loads(encode(payload))
+
+    monkeypatch.setattr(serialization, "orjson", None)
+
+    assert json.loads(encode(payload)) == expected
+
+
+def test_negotiate_defaults_to_json():
+    """Sin Accept o con tipos no soportados se responde JSON"""
+
+    assert negotiate(None) == JSON_MEDIA_TYPE
+    assert negotiate("text/html, */*") == JSON_MEDIA_TYPE
+
+
+def test_negotiate_respects_quality(monkeypatch):
+    """Gana el tipo disponible con mayor q"""
+
+    monkeypatch.setattr(serialization, "msgpack", object())
+
+    accept = f"{JSON_MEDIA_TYPE};q=0.5, {MSGPACK_MEDIA_TYPE};q=0.9"
+
+    assert negotiate(accept) == MSGPACK_MEDIA_TYPE
+    assert negotiate(f"{MSGPACK_MEDIA_TYPE};q=0") == JSON_MEDIA_TYPE
+
+
+def test_negotiate_skips_missing_dependency(monkeypatch):
+    """Formato binario sin su librería no se ofrece"""
+
+    monkeypatch.setattr(serialization, "msgpack", None)
+    monkeypatch.setattr(serialization, "pa", None)
+
+    assert negotiate(MSGPACK_MEDIA_TYPE) == JSON_MEDIA_TYPE
+    assert negotiate(ARROW_MEDIA_TYPE) == JSON_MEDIA_TYPE
+
+
+def test_encode_msgpack(payload):
+    """MessagePack conserva el layout columnar"""
+
+    msgpack = pytest.importorskip("msgpack")
+
+    result = msgpack.unpackb(encode(payload, MSGPACK_MEDIA_TYPE))
+
+    assert result["index"] == payload["index"]
+    assert result["columns"]["1. open"] == [100.0, 101.0]
+
+
+def test_encode_arrow(payload):
+    """Arrow IPC con una columna date y el símbolo en metadatos"""
+
+    pa = pytest.importorskip("pyarrow")
+
+    table = pa.ipc.open_stream(encode(payload, ARROW_MEDIA_TYPE)).read_all()
+
+    assert table.column_names == ["date", "1. open", "4. close"]
+    assert table.schema.metadata[b"symbol"] == b"AAPL"
@@ -0,0 +1,80 @@
+import pandas as pd
+from app.core.store import load_series, merge_series
+
+
+def _ohlcv(dates, closes):
+
+    return pd.DataFrame(
+        {
+            "1. open": closes,
+            "2. high": closes,
+            "3. low": closes,
+            "4. close": closes,
+            "5. volume": [1000.0] * len(closes)
+        },
+        index=pd.to_datetime(dates)
+    )
+
+
+def test_load_missing_symbol(market_store):
+    """Símbolo nunca guardado devuelve None"""
+
+    assert load_series("AAPL") is None
+
+
+def test_merge_and_load(market_store):
+    """Guarda la serie y la recupera con la hora del fetch"""
+
+    df = _ohlcv(["2024-01-01", "2024-01-02"], [100.0, 101.0])
+
+    merged = merge_series("AAPL", df, 1000.0)
+
+    assert merged.equals(df)
+
+    cached = load_series("AAPL")
+
+    assert cached["time"] == 1000.0
+    assert cached["data"].equals(df)
+    assert market_store.exists()
+
+
+def test_merge_appends_new_days(market_store):
+    """Agrega días nuevos conservando el histórico anterior"""
+
+    merge_series("AAPL", _ohlcv(["2024-01-01", "2024-01-02"], [100.0, 101.0]), 1000.0)
+
+    # Ventana compacta que ya no incluye el 2024-01-01
+    merged = merge_series(
+        "AAPL",
+        _ohlcv(["2024-01-02", "2024-01-03"], [102.0, 103.0]),
+        2000.0
+    )
+
+    assert list(merged.index.strftime("%Y-%m-%d")) == [
+        "2024-01-01", "2024-01-02", "2024-01-03"
+    ]
+
+    # El último día guardado se corrige
+    assert merged["4. close"].tolist() == [100.0, 102.0, 103.0]
+
+    assert load_series("AAPL")["time"] == 2000.0
+
+
+def test_merge_ignores_old_days(market_store):
+    """Días anteriores al último guardado no se reescriben"""
+
+    merge_series("AAPL", _ohlcv(["2024-01-01", "2024-01-02"], [100.0, 101.0]), 1000.0)
+
+    merged = merge_series("AAPL", _ohlcv(["2024-01-01"], [999.0]), 2000.0)
+
+    assert merged["4. close"].tolist() == [100.0, 101.0]
+
+
+def test_symbols_are_independent(market_store):
+    """Cada símbolo tiene su propio histórico"""
+
+    merge_series("AAPL", _ohlcv(["2024-01-01"], [100.0]), 1000.0)
+    merge_series("TSLA", _ohlcv(["2024-01-01"], [200.0]), 1000.0)
+
+    assert load_series("AAPL")["data"]["4. close"].tolist() == [100.0]
+    assert load_series("TSLA")["data"]["4. close"].tolist() == [200.0]
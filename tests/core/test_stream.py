@@ -0,0 +1,214 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+import pandas as pd
+import pytest
+from app.core import stream
+from app.core.stream import _channels, _on_refresh, stream_stats, subscribe
+
+
+def _snapshot(closes: list[float], version: str):
+    """Snapshot de mercado con cierres diarios desde 2024-01-01"""
+
+    df = pd.DataFrame(
+        {"4. close": closes},
+        index=pd.date_range("2024-01-01", periods=len(closes))
+    )
+
+    return {"data": df, "time": 1000.0, "version": version, "kpis": {"last_price": closes[-1]}}
+
+
+def _parse(chunk: bytes):
+    """Tipo y datos de un evento SSE"""
+
+    lines = chunk.decode().strip().split("\n")
+
+    return lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: "))
+
+
+@pytest.fixture
+def market_snapshot(monkeypatch):
+    """get_market_snapshot mockeado con tres días"""
+
+    mock = AsyncMock(return_value=_snapshot([100.0, 101.0, 102.0], "v1"))
+
+    monkeypatch.setattr("app.core.market.get_market_snapshot", mock)
+    monkeypatch.setattr(stream, "STREAM_POLL_SECONDS", 3600)
+
+    return mock
+
+
+def test_initial_snapshot_then_delta(market_snapshot):
+    """Primero el snapshot completo, luego solo las barras nuevas"""
+
+    async def scenario():
+
+        events = subscribe("AAPL")
+
+        first = _parse(await anext(events))
+
+        # Último día corregido + un día nuevo
+        _on_refresh("AAPL", _snapshot([100.0, 101.0, 102.5, 104.0], "v2"))
+
+        second = _parse(await anext(events))
+
+        await events.aclose()
+
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first[0] == "snapshot"
+    assert first[1]["columns"]["4. close"] == [100.0, 101.0, 102.0]
+
+    assert second[0] == "delta"
+    assert second[1]["index"] == ["2024-01-03", "2024-01-04"]
+    assert second[1]["columns"]["4. close"] == [102.5, 104.0]
+    assert second[1]["kpis"] == {"last_price": 104.0}
+
+
+def test_given_snapshot_not_fetched_again(market_snapshot):
+    """Con el snapshot ya leído (antes de los headers) no se consulta otra vez"""
+
+    async def scenario():
+
+        events = subscribe("AAPL", _snapshot([100.0, 101.0], "v0"))
+
+        first = _parse(await anext(events))
+
+        await events.aclose()
+
+        return first
+
+    kind, data = asyncio.run(scenario())
+
+    assert kind == "snapshot"
+    assert data["version"] == "v0"
+
+    market_snapshot.assert_not_called()
+
+
+def test_same_version_not_pushed(market_snapshot):
+    """Refresh sin cambios en los datos no genera evento"""
+
+    async def scenario():
+
+        events = subscribe("AAPL")
+        await anext(events)
+
+        _on_refresh("AAPL", _snapshot([100.0, 101.0, 102.0], "v1"))
+
+        queue = next(iter(_channels["AAPL"].subscribers))
+        pending = queue.qsize()
+
+        await events.aclose()
+
+        return pending
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_subscribers_share_one_loop(market_snapshot):
+    """Un canal y un loop por símbolo; se detiene con el último suscriptor"""
+
+    async def scenario():
+
+        first = subscribe("AAPL")
+        second = subscribe("AAPL")
+
+        await anext(first)
+        await anext(second)
+
+        channel = _channels["AAPL"]
+        stats = stream_stats()
+
+        await first.aclose()
+        still_open = "AAPL" in _channels
+
+        await second.aclose()
+        await asyncio.sleep(0)
+
+        return stats, still_open, channel.task.cancelled()
+
+    stats, still_open, cancelled = asyncio.run(scenario())
+
+    assert stats["channels"] == 1
+    assert stats["subscribers"] == 2
+    assert still_open
+    assert cancelled
+    assert "AAPL" not in _channels
+
+
+def test_slow_consumer_gets_resync(market_snapshot, monkeypatch):
+    """Cola llena: se descartan los deltas y se envía un snapshot"""
+
+    monkeypatch.setattr(stream, "STREAM_QUEUE_SIZE", 1)
+
+    async def scenario():
+
+        events = subscribe("AAPL")
+        await anext(events)
+
+        _on_refresh("AAPL", _snapshot([100.0, 101.0, 102.0, 103.0], "v2"))
+        _on_refresh("AAPL", _snapshot([100.0, 101.0, 102.0, 103.0, 104.0], "v3"))
+
+        event = _parse(await anext(events))
+
+        await events.aclose()
+
+        return event
+
+    resyncs = stream_stats()["resyncs"]
+
+    kind, data = asyncio.run(scenario())
+
+    assert kind == "snapshot"
+    assert data["version"] == "v3"
+    assert len(data["index"]) == 5
+    assert stream_stats()["resyncs"] == resyncs + 1
+
+
+def test_keepalive(market_snapshot, monkeypatch):
+    """Sin eventos se envía un comentario SSE"""
+
+    monkeypatch.setattr(stream, "KEEPALIVE_SECONDS", 0.01)
+
+    async def scenario():
+
+        events = subscribe("AAPL")
+        await anext(events)
+
+        chunk = await anext(events)
+
+        await events.aclose()
+
+        return chunk
+
+    assert asyncio.run(scenario()) == b": keep-alive\n\n"
+
+
+def test_poll_pushes_new_version(market_snapshot, monkeypatch):
+    """El loop del canal consulta el mercado y envía los cambios"""
+
+    monkeypatch.setattr(stream, "STREAM_POLL_SECONDS", 0.01)
+
+    async def scenario():
+
+        events = subscribe("AAPL")
+        await anext(events)
+
+        market_snapshot.return_value = _snapshot([100.0, 101.0, 102.0, 103.0], "v2")
+
+        event = _parse(await anext(events))
+
+        await events.aclose()
+
+        return event
+
+    kind, data = asyncio.run(scenario())
+
+    assert kind == "delta"
+    assert data["version"] == "v2"
+
+    # El polling no cuenta como petición de usuario
+    market_snapshot.assert_called_with("AAPL", track=False)
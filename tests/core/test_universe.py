@@ -0,0 +1,115 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from app.core import search
+from app.core.search import load_listing, search_symbol
+from app.core.universe import SymbolUniverse, load_universe
+
+
+LISTING_CSV = """symbol,name,exchange,assetType,ipoDate,delistingDate,status
+AAPL,Apple Inc,NASDAQ,Stock,1980-12-12,null,Active
+APP,Applovin Corp - Class A,NASDAQ,Stock,2021-04-15,null,Active
+BA,Boeing Company,NYSE,Stock,1962-01-02,null,Active
+BAC,Bank of America Corp,NYSE,Stock,1973-02-21,null,Active
+MSFT,Microsoft Corporation,NASDAQ,Stock,1986-03-13,null,Active
+TSLA,Tesla Inc,NASDAQ,Stock,2010-06-29,null,Active
+TWTR,Twitter Inc,NYSE,Stock,2013-11-07,2022-10-28,Delisted
+"""
+
+
+@pytest.fixture
+def listing_path(tmp_path):
+    """CSV con el formato de LISTING_STATUS"""
+
+    path = tmp_path / "listing_status.csv"
+    path.write_text(LISTING_CSV)
+
+    return str(path)
+
+
+@pytest.fixture
+def universe(listing_path):
+    return load_universe(listing_path)
+
+
+def _symbols(results):
+    return [r["symbol"] for r in results]
+
+
+def test_load_only_active(universe):
+    """Se ignoran los símbolos dados de baja"""
+
+    assert len(universe) == 6
+    assert universe.search("twtr") == []
+
+
+def test_same_fields_as_search_symbol(universe):
+
+    assert universe.search("AAPL")[0] == {
+        "symbol": "AAPL",
+        "name": "Apple Inc",
+        "region": "United States",
+        "currency": "USD",
+    }
+
+
+def test_exact_ticker_first(universe):
+    """Ticker exacto, luego prefijo de ticker, luego prefijo de nombre"""
+
+    assert _symbols(universe.search("ba")) == ["BA", "BAC"]
+    assert _symbols(universe.search("app")) == ["APP", "AAPL"]
+
+
+def test_name_prefix(universe):
+
+    assert _symbols(universe.search("Bank of")) == ["BAC"]
+    assert _symbols(universe.search("  tesla   INC")) == ["TSLA"]
+
+
+def test_fuzzy_typos(universe):
+    """Errores de escritura se resuelven por trigramas"""
+
+    assert _symbols(universe.search("micosoft"))[0] == "MSFT"
+    assert _symbols(universe.search("boing"))[0] == "BA"
+    assert universe.search("zzzz") == []
+
+
+def test_limit(universe):
+
+    assert len(universe.search("a", limit=2)) == 2
+
+
+def test_empty_query(universe):
+
+    assert universe.search("  ") == []
+
+
+def test_load_listing_missing_file(tmp_path):
+
+    assert load_listing(str(tmp_path / "missing.csv")) is None
+    assert search._universe is None
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_uses_listing(mock_get, listing_path):
+    """Con listado local no se consulta Alpha"""
+
+    load_listing(listing_path)
+
+    result = asyncio.run(search_symbol("tesla"))
+
+    assert _symbols(result) == ["TSLA"]
+    mock_get.assert_not_called()
+
+
+@patch("app.core.search.alpha_get")
+def test_search_symbol_falls_back_upstream(mock_get, listing_path):
+    """Sin coincidencias locales se busca en Alpha"""
+
+    load_listing(listing_path)
+
+    mock_get.return_value = {"bestMatches": []}
+
+    asyncio.run(search_symbol("zzzz"))
+
+    mock_get.assert_called_once()
@@ -2,9 +2,12 @@
 # Tests /market
 # ============================
 
+from datetime import date
 from unittest.mock import patch
 
 import pytest
+from app.core.forecast_pool import ForecastTimeoutError, PoolSaturatedError
+from app.core.insights import InsightTimeoutError
 
 
 def test_market_default_symbol(client):
@@ -16,7 +19,9 @@ def test_market_default_symbol(client):
     assert res.status_code == 200
     assert res.json()["symbol"] == "AAPL"
 
-    mock_service.market_data.assert_called_once_with(None)
+    mock_service.market_data.assert_called_once_with(
+        None, start=None, end=None, limit=150, fields=None, snapshot={"version": "v1"}
+    )
 
 
 def test_market_with_symbol(client):
@@ -27,7 +32,99 @@ def test_market_with_symbol(client):
 
     assert res.status_code == 200
 
-    mock_service.market_data.assert_called_once_with("TSLA")
+    mock_service.market_data.assert_called_once_with(
+        "TSLA", start=None, end=None, limit=150, fields=None, snapshot={"version": "v1"}
+    )
+
+
+def test_market_slice_params(client):
+
+    test_client, mock_service = client
+
+    res = test_client.get(
+        "/finance/market?symbol=AAPL&start=2024-01-01&end=2024-01-31&limit=30&fields=close,volume"
+    )
+
+    assert res.status_code == 200
+
+    mock_service.market_data.assert_called_once_with(
+        "AAPL",
+        start=date(2024, 1, 1),
+        end=date(2024, 1, 31),
+        limit=30,
+        fields=["close", "volume"],
+        snapshot={"version": "v1"}
+    )
+
+
+def test_market_invalid_params(client):
+
+    test_client, mock_service = client
+
+    assert test_client.get("/finance/market?limit=0").status_code == 422
+    assert test_client.get("/finance/market?start=ayer").status_code == 422
+
+    mock_service.market_data.side_effect = ValueError("Unknown fields: foo")
+
+    assert test_client.get("/finance/market?fields=foo").status_code == 422
+
+
+def test_market_columnar(client):
+
+    test_client, mock_service = client
+
+    mock_service.market_data_columnar.return_value = {
+        "symbol": "AAPL",
+        "index": ["2024-01-01"],
+        "columns": {"4. close": [100.0]}
+    }
+
+    res = test_client.get("/finance/market?layout=columnar")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/json"
+    assert res.json()["columns"] == {"4. close": [100.0]}
+
+    mock_service.market_data.assert_not_called()
+
+
+def test_market_msgpack(client):
+
+    msgpack = pytest.importorskip("msgpack")
+
+    test_client, mock_service = client
+
+    mock_service.market_data_columnar.return_value = {
+        "symbol": "AAPL",
+        "index": ["2024-01-01"],
+        "columns": {"4. close": [100.0]}
+    }
+
+    res = test_client.get(
+        "/finance/market",
+        headers={"Accept": "application/x-msgpack"}
+    )
+
+    assert res.headers["content-type"] == "application/x-msgpack"
+    assert msgpack.unpackb(res.content)["symbol"] == "AAPL"
+
+
+def test_stream_sse(client):
+
+    test_client, mock_service = client
+
+    async def events():
+        yield b"event: snapshot\ndata: {}\n\n"
+
+    mock_service.stream_market.return_value = events()
+
+    res = test_client.get("/finance/stream?symbol=AAPL")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    assert res.content == b"event: snapshot\ndata: {}\n\n"
+
+    mock_service.stream_market.assert_called_once_with("AAPL")
 
 
 # ============================
@@ -44,7 +141,9 @@ def test_forecast_default(client):
 
     mock_service.get_forecast.assert_called_once_with(
         None,
-        30
+        30,
+        "prophet",
+        snapshot={"version": "v1"}
     )
 
 
@@ -60,10 +159,180 @@ def test_forecast_with_params(client):
 
     mock_service.get_forecast.assert_called_once_with(
         "MSFT",
-        60
+        60,
+        "prophet",
+        snapshot={"version": "v1"}
+    )
+
+
+def test_forecast_fast_engine(client):
+
+    test_client, mock_service = client
+
+    res = test_client.get("/finance/forecast?symbol=MSFT&engine=fast")
+
+    assert res.status_code == 200
+
+    mock_service.get_forecast.assert_called_once_with(
+        "MSFT",
+        30,
+        "fast",
+        snapshot={"version": "v1"}
     )
 
 
+def test_forecast_unknown_engine(client):
+
+    test_client, _ = client
+
+    res = test_client.get("/finance/forecast?engine=arima")
+
+    assert res.status_code == 422
+
+
+def test_forecast_pool_saturated(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast.side_effect = PoolSaturatedError()
+
+    res = test_client.get("/finance/forecast")
+
+    assert res.status_code == 503
+    assert "retry-after" in res.headers
+
+
+def test_forecast_timeout(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast.side_effect = ForecastTimeoutError()
+
+    res = test_client.get("/finance/forecast")
+
+    assert res.status_code == 504
+
+
+# ============================
+# Tests /forecast/jobs
+# ============================
+
+def _job(status, error=None, error_type=None):
+
+    return {
+        "job_id": "abc",
+        "symbol": "AAPL",
+        "periods": 30,
+        "status": status,
+        "error": error,
+        "error_type": error_type
+    }
+
+
+def test_create_forecast_job(client):
+
+    test_client, mock_service = client
+
+    mock_service.submit_forecast_job.return_value = _job("pending")
+
+    res = test_client.post("/finance/forecast/jobs?symbol=AAPL&periods=30")
+
+    assert res.status_code == 202
+    assert res.json()["job_id"] == "abc"
+
+    mock_service.submit_forecast_job.assert_called_once_with("AAPL", 30, "prophet")
+
+
+def test_forecast_job_status(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = _job("pending")
+
+    res = test_client.get("/finance/forecast/jobs/abc")
+
+    assert res.status_code == 200
+    assert res.json()["status"] == "pending"
+
+
+def test_forecast_job_not_found(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = None
+
+    assert test_client.get("/finance/forecast/jobs/nope").status_code == 404
+    assert test_client.get("/finance/forecast/jobs/nope/result").status_code == 404
+
+
+def test_forecast_job_result_pending(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = _job("pending")
+
+    res = test_client.get("/finance/forecast/jobs/abc/result")
+
+    assert res.status_code == 202
+    assert res.json()["status"] == "pending"
+
+
+def test_forecast_job_result_done(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = _job("done")
+    mock_service.get_forecast_job_result.return_value = {
+        "symbol": "AAPL",
+        "forecast": []
+    }
+
+    res = test_client.get("/finance/forecast/jobs/abc/result")
+
+    assert res.status_code == 200
+    assert res.json() == {"symbol": "AAPL", "forecast": []}
+
+
+def test_forecast_job_result_failed(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = _job("failed", "Alpha error")
+
+    res = test_client.get("/finance/forecast/jobs/abc/result")
+
+    assert res.status_code == 500
+    assert res.json()["detail"] == "Alpha error"
+
+
+def test_forecast_job_result_saturated(client):
+    """Trabajo rechazado por pool lleno: 503 con Retry-After"""
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = _job(
+        "failed", "Forecast pool saturated", "PoolSaturatedError"
+    )
+
+    res = test_client.get("/finance/forecast/jobs/abc/result")
+
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "5"
+
+
+def test_forecast_job_result_timeout(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_forecast_job.return_value = _job(
+        "failed", "Forecast timed out", "ForecastTimeoutError"
+    )
+
+    res = test_client.get("/finance/forecast/jobs/abc/result")
+
+    assert res.status_code == 504
+
+
 # ============================
 # Tests /kpis
 # ============================
@@ -76,7 +345,7 @@ def test_kpis_default(client):
 
     assert res.status_code == 200
 
-    mock_service.get_kpis.assert_called_once_with(None)
+    mock_service.get_kpis.assert_called_once_with(None, snapshot={"version": "v1"})
 
 
 def test_kpis_with_symbol(client):
@@ -87,7 +356,144 @@ def test_kpis_with_symbol(client):
 
     assert res.status_code == 200
 
-    mock_service.get_kpis.assert_called_once_with("GOOG")
+    mock_service.get_kpis.assert_called_once_with("GOOG", snapshot={"version": "v1"})
+
+
+def test_kpis_batch_comma_separated(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_kpis_batch.return_value = {"kpis": {}, "errors": {}}
+
+    res = test_client.get("/finance/kpis/batch?symbols=AAPL,TSLA&symbols=GOOG")
+
+    assert res.status_code == 200
+
+    mock_service.get_kpis_batch.assert_called_once_with(["AAPL", "TSLA", "GOOG"])
+
+
+def test_kpis_batch_requires_symbols(client):
+
+    test_client, _ = client
+
+    assert test_client.get("/finance/kpis/batch").status_code == 422
+    assert test_client.get("/finance/kpis/batch?symbols=,").status_code == 422
+
+
+def test_kpis_batch_too_many_symbols(client):
+
+    test_client, _ = client
+
+    symbols = ",".join(f"S{i}" for i in range(51))
+
+    res = test_client.get(f"/finance/kpis/batch?symbols={symbols}")
+
+    assert res.status_code == 422
+
+
+def test_indicators_subset(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_indicators.return_value = {"symbol": "AAPL", "indicators": {}}
+
+    res = test_client.get("/finance/indicators?symbol=AAPL&indicators=macd,atr")
+
+    assert res.status_code == 200
+
+    mock_service.get_indicators.assert_called_once_with("AAPL", ["macd", "atr"])
+
+
+def test_indicators_default_all(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_indicators.return_value = {"symbol": "AAPL", "indicators": {}}
+
+    test_client.get("/finance/indicators?symbol=AAPL")
+
+    mock_service.get_indicators.assert_called_once_with("AAPL", None)
+
+
+def test_indicators_unknown(client):
+
+    test_client, mock_service = client
+
+    res = test_client.get("/finance/indicators?indicators=macd,foo")
+
+    assert res.status_code == 422
+
+    mock_service.get_indicators.assert_not_called()
+
+
+def test_indicators_missing_columns(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_indicators.side_effect = ValueError("Missing column: 5. volume")
+
+    res = test_client.get("/finance/indicators?indicators=obv")
+
+    assert res.status_code == 422
+
+
+# ============================
+# ETag / 304
+# ============================
+
+@pytest.mark.parametrize("path", [
+    "/finance/market?symbol=AAPL",
+    "/finance/kpis?symbol=AAPL",
+    "/finance/forecast?symbol=AAPL"
+])
+def test_etag_and_cache_control(client, path):
+
+    test_client, _ = client
+
+    res = test_client.get(path)
+
+    assert res.status_code == 200
+    assert res.headers["etag"].startswith('"')
+    assert res.headers["cache-control"] == "max-age=120"
+
+    # Mismo ETag: 304 sin cuerpo
+    again = test_client.get(path, headers={"If-None-Match": res.headers["etag"]})
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == res.headers["etag"]
+
+
+def test_not_modified_skips_service(client):
+
+    test_client, mock_service = client
+
+    etag = test_client.get("/finance/kpis?symbol=AAPL").headers["etag"]
+
+    mock_service.get_kpis.reset_mock()
+
+    test_client.get("/finance/kpis?symbol=AAPL", headers={"If-None-Match": f'W/{etag}, "otro"'})
+
+    mock_service.get_kpis.assert_not_called()
+
+
+def test_etag_changes_with_params_and_version(client):
+
+    test_client, mock_service = client
+
+    etag = test_client.get("/finance/forecast?symbol=AAPL&periods=30").headers["etag"]
+
+    assert test_client.get("/finance/forecast?symbol=AAPL&periods=10").headers["etag"] != etag
+
+    mock_service.market_freshness.return_value = {"version": "v2", "max_age": 300, "snapshot": {"version": "v2"}}
+
+    res = test_client.get(
+        "/finance/forecast?symbol=AAPL&periods=30",
+        headers={"If-None-Match": etag}
+    )
+
+    assert res.status_code == 200
+    assert res.headers["etag"] != etag
 
 
 # ============================
@@ -254,4 +660,36 @@ def test_kpi_insight_propagates_exception(
         }
     )
 
-    assert response.status_code == 500
\ No newline at end of file
+    assert response.status_code == 500
+
+
+def test_kpi_insight_timeout(client_insights):
+    """Debe retornar 504 si Gemini no responde a tiempo"""
+
+    with patch(
+        "app.services.finanzas_service.get_kpi_insight",
+        side_effect=InsightTimeoutError("Gemini timed out")
+    ):
+        response = client_insights.get(
+            "/finance/kpi-insight",
+            params={"kpi": "RSI", "value": "70"}
+        )
+
+    assert response.status_code == 504
+
+# ============================
+# Tests /metrics
+# ============================
+
+def test_metrics_route(client):
+
+    test_client, mock_service = client
+
+    mock_service.get_metrics.return_value = {
+        "market_cache": {"hits": 1}
+    }
+
+    res = test_client.get("/finance/metrics")
+
+    assert res.status_code == 200
+    assert res.json() == {"market_cache": {"hits": 1}}
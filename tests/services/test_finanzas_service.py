@@ -1,4 +1,6 @@
-from unittest.mock import patch
+import asyncio
+import pandas as pd
+from unittest.mock import Mock, patch
 
 import pytest
 from app.config.config import DEFAULT_SYMBOL
@@ -12,7 +14,7 @@ def test_market_data_with_symbol(mock_dependencies):
 
     mocks = mock_dependencies
 
-    result = finanzas_service.market_data("TSLA")
+    result = asyncio.run(finanzas_service.market_data("TSLA"))
 
     # Llamada correcta
     mocks["market"].assert_called_once_with("TSLA")
@@ -24,7 +26,7 @@ def test_market_data_with_symbol(mock_dependencies):
 
 def test_market_data_default_symbol(mock_dependencies):
 
-    result = finanzas_service.market_data(None)
+    result = asyncio.run(finanzas_service.market_data(None))
 
     assert result["symbol"] == "AAPL"
 
@@ -33,12 +35,34 @@ def test_market_data_limits_rows(mock_dependencies):
 
     df = mock_dependencies["df"]
 
-    result = finanzas_service.market_data("AAPL")
+    result = asyncio.run(finanzas_service.market_data("AAPL"))
 
     # .tail(150) no debe romper
     assert len(result["data"]["4. close"]) <= 150
 
 
+def test_market_data_slices_rows(mock_dependencies):
+    """start/limit/fields recortan antes de serializar"""
+
+    result = asyncio.run(
+        finanzas_service.market_data("AAPL", start="2024-01-02", limit=1, fields=["close"])
+    )
+
+    assert result["data"] == {"4. close": {pd.Timestamp("2024-01-03"): 105.0}}
+
+
+def test_market_data_columnar(mock_dependencies):
+    """Layout columnar: fechas y un arreglo por columna"""
+
+    df = mock_dependencies["df"]
+
+    result = asyncio.run(finanzas_service.market_data_columnar("AAPL"))
+
+    assert result["symbol"] == "AAPL"
+    assert len(result["index"]) == len(df.tail(150))
+    assert list(result["columns"]) == list(df.columns)
+
+
 # ============================
 # Tests get_forecast
 # ============================
@@ -47,28 +71,43 @@ def test_get_forecast_basic(mock_dependencies):
 
     mocks = mock_dependencies
 
-    result = finanzas_service.get_forecast("MSFT", 3)
+    result = asyncio.run(finanzas_service.get_forecast("MSFT", 3))
 
     mocks["market"].assert_called_once_with("MSFT")
     mocks["forecast"].assert_called_once_with(
         mocks["df"],
-        3
+        3,
+        None
     )
 
     assert result["symbol"] == "MSFT"
     assert isinstance(result["forecast"], list)
 
 
+def test_get_forecast_fixed_window(mock_dependencies, monkeypatch):
+    """El pronóstico se ajusta con la ventana fija, no con todo el histórico"""
+
+    mocks = mock_dependencies
+
+    monkeypatch.setattr("app.core.market.MARKET_ANALYSIS_ROWS", 2)
+
+    asyncio.run(finanzas_service.get_forecast("MSFT", 3))
+
+    df = mocks["forecast"].call_args.args[0]
+
+    assert df.equals(mocks["df"].tail(2))
+
+
 def test_get_forecast_default_symbol(mock_dependencies):
 
-    result = finanzas_service.get_forecast(None, 5)
+    result = asyncio.run(finanzas_service.get_forecast(None, 5))
 
     assert result["symbol"] == "AAPL"
 
 
 def test_get_forecast_serialization(mock_dependencies):
 
-    result = finanzas_service.get_forecast("AAPL", 3)
+    result = asyncio.run(finanzas_service.get_forecast("AAPL", 3))
 
     row = result["forecast"][0]
 
@@ -78,6 +117,129 @@ def test_get_forecast_serialization(mock_dependencies):
     assert "yhat_lower" in row
 
 
+def test_get_forecast_uses_cache(mock_dependencies):
+    """Misma serie y horizonte: Prophet se ajusta una sola vez"""
+
+    mocks = mock_dependencies
+
+    first = asyncio.run(finanzas_service.get_forecast("AAPL", 3))
+    second = asyncio.run(finanzas_service.get_forecast("AAPL", 3))
+
+    assert first == second
+    mocks["forecast"].assert_called_once()
+
+
+def test_get_forecast_shorter_periods_from_cache(mock_dependencies):
+    """Un horizonte más corto se sirve recortando el cacheado"""
+
+    mocks = mock_dependencies
+
+    asyncio.run(finanzas_service.get_forecast("AAPL", 3))
+    result = asyncio.run(finanzas_service.get_forecast("AAPL", 1))
+
+    mocks["forecast"].assert_called_once()
+    assert len(result["forecast"]) == 1
+
+
+def test_get_forecast_warm_start(mock_dependencies):
+    """Con datos nuevos se refita partiendo del ajuste anterior"""
+
+    mocks = mock_dependencies
+
+    params = {"k": 0.1}
+    mocks["forecast_df"].attrs["prophet_params"] = params
+
+    asyncio.run(finanzas_service.get_forecast("AAPL", 3))
+
+    # Llega un día nuevo
+    df = mocks["df"]
+    updated = pd.concat([
+        df,
+        pd.DataFrame({"4. close": [106.0]}, index=pd.to_datetime(["2024-01-04"]))
+    ])
+    mocks["market"].return_value = updated
+
+    asyncio.run(finanzas_service.get_forecast("AAPL", 3))
+
+    assert mocks["forecast"].call_count == 2
+    assert mocks["forecast"].call_args[0] == (updated, 3, params)
+
+
+def test_get_forecast_fast_engine(mock_dependencies):
+    """El motor rápido no usa Prophet y se cachea aparte"""
+
+    mocks = mock_dependencies
+
+    fast = asyncio.run(finanzas_service.get_forecast("AAPL", 3, "fast"))
+
+    mocks["forecast"].assert_not_called()
+    assert len(fast["forecast"]) == 3 + 3
+
+    asyncio.run(finanzas_service.get_forecast("AAPL", 3))
+
+    mocks["forecast"].assert_called_once()
+
+
+# ============================
+# Tests trabajos de pronóstico
+# ============================
+
+def test_forecast_job_lifecycle(mock_dependencies):
+    """El trabajo termina con el mismo resultado que get_forecast"""
+
+    async def scenario():
+
+        job = await finanzas_service.submit_forecast_job("AAPL", 3)
+
+        assert job["status"] == "pending"
+        assert await finanzas_service.get_forecast_job_result(job["job_id"]) is None
+
+        await asyncio.sleep(0.05)
+
+        status = await finanzas_service.get_forecast_job(job["job_id"])
+        result = await finanzas_service.get_forecast_job_result(job["job_id"])
+
+        return status, result
+
+    status, result = asyncio.run(scenario())
+
+    assert status["status"] == "done"
+    assert status["symbol"] == "AAPL"
+    assert status["periods"] == 3
+
+    assert result["symbol"] == "AAPL"
+    assert len(result["forecast"]) == 3
+
+
+def test_forecast_job_deduplicated(mock_dependencies):
+    """Misma petición y misma versión de datos reutiliza el trabajo"""
+
+    mocks = mock_dependencies
+
+    async def scenario():
+
+        first = await finanzas_service.submit_forecast_job("AAPL", 3)
+        second = await finanzas_service.submit_forecast_job("AAPL", 3)
+        other = await finanzas_service.submit_forecast_job("AAPL", 5)
+
+        await asyncio.sleep(0.05)
+
+        return first, second, other
+
+    first, second, other = asyncio.run(scenario())
+
+    assert first["job_id"] == second["job_id"]
+    assert other["job_id"] != first["job_id"]
+
+    assert mocks["forecast"].call_count == 2
+
+
+def test_forecast_job_unknown():
+    """Id desconocido devuelve None"""
+
+    assert asyncio.run(finanzas_service.get_forecast_job("nope")) is None
+
+
 # ============================
 # Tests get_kpis
 # ============================
@@ -86,12 +248,11 @@ def test_get_kpis_basic(mock_dependencies):
 
     mocks = mock_dependencies
 
-    result = finanzas_service.get_kpis("GOOG")
+    result = asyncio.run(finanzas_service.get_kpis("GOOG"))
 
-    mocks["market"].assert_called_once_with("GOOG")
-    mocks["kpis"].assert_called_once_with(
-        mocks["df"]
-    )
+    # Sin recalcular: se leen los KPIs del snapshot
+    mocks["kpis"].assert_called_once_with("GOOG")
+    mocks["market"].assert_not_called()
 
     assert result["symbol"] == "GOOG"
     assert result["kpis"]["trend"] == "bullish"
@@ -99,9 +260,106 @@ def test_get_kpis_basic(mock_dependencies):
 
 def test_get_kpis_default_symbol(mock_dependencies):
 
-    result = finanzas_service.get_kpis(None)
+    result = asyncio.run(finanzas_service.get_kpis(None))
+
+    assert result["symbol"] == "AAPL"
+
+
+def test_market_freshness(mock_dependencies, monkeypatch):
+    """Versión del snapshot y TTL restante del cache"""
+
+    monkeypatch.setattr(finanzas_service.time, "time", lambda: 1100.0)
+
+    result = asyncio.run(finanzas_service.market_freshness("AAPL"))
+
+    assert result["version"] == "v1"
+    assert result["max_age"] == 200
+    assert result["snapshot"]["kpis"] == {"last_price": 105, "trend": "bullish"}
+
+
+def test_stream_market_fetches_before_streaming(mock_dependencies, monkeypatch):
+    """El snapshot se lee al pedir el stream y se pasa al generador"""
+
+    subscribe = Mock(return_value="events")
+
+    monkeypatch.setattr(finanzas_service, "subscribe", subscribe)
+
+    result = asyncio.run(finanzas_service.stream_market("AAPL"))
+
+    assert result == "events"
+
+    mock_dependencies["kpis"].assert_called_once_with("AAPL")
+    subscribe.assert_called_once_with("AAPL", mock_dependencies["kpis"].return_value)
+
+
+def test_stream_market_propagates_fetch_error(mock_dependencies):
+
+    mock_dependencies["kpis"].side_effect = Exception("Alpha error")
+
+    with pytest.raises(Exception, match="Alpha error"):
+        asyncio.run(finanzas_service.stream_market("BAD"))
+
+
+def test_market_data_reuses_snapshot(mock_dependencies):
+    """Con el snapshot del ETag no se vuelve a leer el cache"""
+
+    snapshot = asyncio.run(finanzas_service.market_freshness("AAPL"))["snapshot"]
+
+    result = asyncio.run(finanzas_service.market_data("AAPL", snapshot=snapshot))
+
+    assert result["symbol"] == "AAPL"
+
+    mock_dependencies["market"].assert_not_called()
+    assert mock_dependencies["kpis"].call_count == 1
+
+
+def test_market_freshness_expired(mock_dependencies, monkeypatch):
+    """Datos vencidos (stale) no se cachean en el cliente"""
+
+    monkeypatch.setattr(finanzas_service.time, "time", lambda: 5000.0)
+
+    result = asyncio.run(finanzas_service.market_freshness("AAPL"))
+
+    assert result["max_age"] == 0
+
+
+def test_get_kpis_batch(mock_dependencies, bullish_df):
+    """Calcula KPIs de varios símbolos y reporta los que fallan"""
+
+    mocks = mock_dependencies
+
+    async def market(symbol):
+
+        if symbol == "BAD":
+            raise Exception("Alpha error")
+
+        return bullish_df
+
+    mocks["market"].side_effect = market
+
+    result = asyncio.run(
+        finanzas_service.get_kpis_batch(["AAPL", "MSFT", "AAPL", "BAD"])
+    )
+
+    assert list(result["kpis"]) == ["AAPL", "MSFT"]
+    assert result["kpis"]["AAPL"]["trend"] == "bullish"
+    assert result["errors"] == {"BAD": "Alpha error"}
+
+    # Símbolos repetidos se consultan una vez
+    assert mocks["market"].call_count == 3
+
+
+def test_get_indicators(mock_dependencies, bullish_df):
+    """Calcula solo los indicadores pedidos"""
+
+    mock_dependencies["market"].return_value = bullish_df
+
+    result = asyncio.run(
+        finanzas_service.get_indicators("AAPL", ["macd", "sharpe"])
+    )
 
     assert result["symbol"] == "AAPL"
+    assert list(result["indicators"]) == ["macd", "sharpe"]
 
 
 # ============================
@@ -110,21 +368,21 @@ def test_get_kpis_default_symbol(mock_dependencies):
 
 def test_market_data_returns_dict(mock_dependencies):
 
-    result = finanzas_service.market_data("AAPL")
+    result = asyncio.run(finanzas_service.market_data("AAPL"))
 
     assert isinstance(result, dict)
 
 
 def test_get_forecast_returns_dict(mock_dependencies):
 
-    result = finanzas_service.get_forecast("AAPL")
+    result = asyncio.run(finanzas_service.get_forecast("AAPL"))
 
     assert isinstance(result, dict)
 
 
 def test_get_kpis_returns_dict(mock_dependencies):
 
-    result = finanzas_service.get_kpis("AAPL")
+    result = asyncio.run(finanzas_service.get_kpis("AAPL"))
 
     assert isinstance(result, dict)
 
@@ -152,7 +410,7 @@ def test_search_symbols_success(mock_search):
 
     mock_search.return_value = fake_results
 
-    result = finanzas_service.search_symbols("app")
+    result = asyncio.run(finanzas_service.search_symbols("app"))
 
     assert result == {
         "results": fake_results
@@ -169,7 +427,7 @@ def test_search_symbols_empty(mock_search):
 
     mock_search.return_value = []
 
-    result = finanzas_service.search_symbols("zzz")
+    result = asyncio.run(finanzas_service.search_symbols("zzz"))
 
     assert result == {
         "results": []
@@ -187,7 +445,7 @@ def test_search_symbols_propagates_exception(mock_search):
     mock_search.side_effect = Exception("API error")
 
     try:
-        finanzas_service.search_symbols("fail")
+        asyncio.run(finanzas_service.search_symbols("fail"))
         assert False, "Exception not raised"
 
     except Exception as e:
@@ -203,11 +461,11 @@ def test_get_kpi_insight_ok(
 ):
     """Debe retornar insight con symbol"""
 
-    result = finanzas_service.get_kpi_insight(
+    result = asyncio.run(finanzas_service.get_kpi_insight(
         kpi_data["kpi"],
         kpi_data["value"],
         kpi_data["symbol"]
-    )
+    ))
 
     assert result == {
         "kpi": "RSI",
@@ -228,11 +486,11 @@ def test_get_kpi_insight_uses_default_symbol(
 ):
     """Debe usar DEFAULT_SYMBOL si symbol es None"""
 
-    result = finanzas_service.get_kpi_insight(
+    result = asyncio.run(finanzas_service.get_kpi_insight(
         kpi_data["kpi"],
         kpi_data["value"],
         None
-    )
+    ))
 
     assert result == {
         "kpi": "RSI",
@@ -254,10 +512,27 @@ def test_get_kpi_insight_propagates_exception(
 
     with pytest.raises(Exception) as exc:
 
-        finanzas_service.get_kpi_insight(
+        asyncio.run(finanzas_service.get_kpi_insight(
             kpi_data["kpi"],
             kpi_data["value"],
             kpi_data["symbol"]
-        )
+        ))
 
-    assert "Gemini error" in str(exc.value)
\ No newline at end of file
+    assert "Gemini error" in str(exc.value)
+
+def test_get_metrics_includes_insights():
+    """Debe exponer la cola de llamadas a Gemini"""
+
+    result = asyncio.run(finanzas_service.get_metrics())
+
+    assert {"waiting", "in_flight", "timeouts"} <= set(result["insights"])
+
+
+def test_get_metrics_includes_market_cache():
+    """Debe exponer las estadísticas del cache de mercado"""
+
+    result = asyncio.run(finanzas_service.get_metrics())
+
+    assert set(result["market_cache"]) == {
+        "entries", "bytes", "hits", "misses", "evictions"
+    }
@@ -1,3 +1,8 @@
+from unittest.mock import AsyncMock, Mock
+from fastapi.testclient import TestClient
+import app.main as main_app
+from app.core.rate_limit import RateLimitedError
+
 # ============================
 # Tests básicos
 # ============================
@@ -90,4 +95,47 @@ def test_unknown_route(client_main):
 
     res = test_client.get("/no-existe")
 
-    assert res.status_code == 404
\ No newline at end of file
+    assert res.status_code == 404
+
+def test_lifespan_starts_scheduler(client_main, monkeypatch):
+    """El scheduler arranca y se detiene con la app"""
+
+    start = Mock()
+    stop = AsyncMock()
+
+    monkeypatch.setattr(main_app.scheduler, "start", start)
+    monkeypatch.setattr(main_app.scheduler, "stop", stop)
+    monkeypatch.setattr(main_app.alpha_client, "close_client", AsyncMock())
+    monkeypatch.setattr(main_app.forecast_pool, "shutdown", Mock())
+    monkeypatch.setattr(main_app.search, "load_listing", Mock())
+
+    with TestClient(main_app.app):
+        start.assert_called_once()
+
+    stop.assert_awaited_once()
+
+
+def test_stream_error_before_headers(client_main):
+    """Si falla el primer snapshot no se abre un stream vacío"""
+
+    test_client, mock = client_main
+
+    mock.stream_market.side_effect = RateLimitedError(5)
+
+    res = test_client.get("/finance/stream?symbol=AAPL")
+
+    assert res.status_code == 429
+    assert res.headers["retry-after"] == "5"
+
+
+def test_rate_limited_returns_429(client_main):
+    """Sin cuota de Alpha se responde 429 con Retry-After"""
+
+    test_client, mock = client_main
+
+    mock.get_kpis.side_effect = RateLimitedError(12.3)
+
+    res = test_client.get("/finance/kpis?symbol=AAPL")
+
+    assert res.status_code == 429
+    assert res.headers["retry-after"] == "13"